@@ -0,0 +1,89 @@
+"""
+Concurrent throughput of the blocking (sync Session inside coroutines) and the async (AsyncSession) database paths.
+
+Every simulated request runs one deliberately slow query. With the sync path each query blocks the event loop,
+so requests are served one after another and the loop stalls for the whole query. With the async path
+the loop stays free while the driver works.
+
+Usage::
+
+    python -m benchmarks.bench_async_db --requests 50 --rows 200000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+SLOW_QUERY = text('WITH RECURSIVE cnt(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM cnt WHERE x < :n) '
+                  'SELECT count(*) FROM cnt')
+
+
+async def _loop_lag(stop: asyncio.Event) -> float:
+    """Measure the worst event loop stall while requests are running."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - started - 0.001)
+    return worst
+
+
+async def run_sync(url: str, requests: int, rows: int) -> dict:
+    engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=requests)
+    session_factory = sessionmaker(bind=engine)
+
+    async def request():
+        with session_factory() as db:
+            db.execute(SLOW_QUERY, {"n": rows}).scalar()
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    engine.dispose()
+    return {"elapsed": elapsed, "rps": requests / elapsed, "max_loop_lag": await lag}
+
+
+async def run_async(url: str, requests: int, rows: int) -> dict:
+    engine = create_async_engine(url, pool_size=requests)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession)
+
+    async def request():
+        async with session_factory() as db:
+            (await db.execute(SLOW_QUERY, {"n": rows})).scalar()
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await engine.dispose()
+    return {"elapsed": elapsed, "rps": requests / elapsed, "max_loop_lag": await lag}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        before = asyncio.run(run_sync(f'sqlite:///{path}', args.requests, args.rows))
+        after = asyncio.run(run_async(f'sqlite+aiosqlite:///{path}', args.requests, args.rows))
+
+    for label, res in (('sync Session', before), ('AsyncSession', after)):
+        print(f"{label:>13}: {res['elapsed']:.3f}s total, {res['rps']:.1f} req/s, "
+              f"max event loop stall {res['max_loop_lag'] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold-start cost of importing the app, per module, from ``python -X importtime``.
+
+Every run is a fresh interpreter; the fastest of --runs runs is kept for every module, which filters out most of
+the noise of a busy machine. Cumulative times include the modules imported by a module the first time.
+
+Usage::
+
+    python -m benchmarks.bench_import_time --module main --top 25
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict
+
+
+def parse_importtime(output: str) -> Dict[str, tuple[int, int]]:
+    """
+    The parse_importtime function reads the report printed by python -X importtime.
+
+    :param output: str: The standard error of the interpreter
+    :return: The self and cumulative time in microseconds by module
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, module = line[len('import time:'):].split('|')
+        times[module.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def measure(module: str = 'main', runs: int = 3) -> Dict[str, tuple[int, int]]:
+    """
+    The measure function imports the module in fresh interpreters and keeps the fastest time of every module.
+
+    :param module: str: The module to import
+    :param runs: int: Number of interpreters to start
+    :return: The self and cumulative time in microseconds by imported module
+    """
+    best = {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                capture_output=True, text=True, check=True)
+        for name, (own, cumulative) in parse_importtime(result.stderr).items():
+            previous = best.get(name)
+            best[name] = (own, cumulative) if previous is None else (min(own, previous[0]),
+                                                                     min(cumulative, previous[1]))
+    return best
+
+
+def report(times: Dict[str, tuple[int, int]], top: int = 20) -> str:
+    """
+    The report function lists the modules with the largest cumulative import time.
+
+    :param times: dict: The result of measure
+    :param top: int: Number of modules listed
+    :return: The report as text
+    """
+    rows = sorted(times.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return '\n'.join(f'{cumulative / 1000:9.1f} ms {own / 1000:8.1f} ms  {name}'
+                     for name, (own, cumulative) in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=25)
+    args = parser.parse_args()
+
+    print(f'{"cumulative":>12} {"self":>11}  module')
+    print(report(measure(args.module, args.runs), args.top))
+
+
+if __name__ == '__main__':
+    main()
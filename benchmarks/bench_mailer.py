@@ -0,0 +1,71 @@
+"""
+Throughput of confirmation emails sent one SMTP session per message, as FastMail did,
+against the pooled and batched Mailer.
+
+The relay is the SMTPStub from benchmarks.smtp_stub; --connect-latency stands in for the
+TCP, TLS and AUTH handshakes and --latency for the time the relay needs to accept a message.
+
+Usage::
+
+    python -m benchmarks.bench_mailer --messages 500 --connect-latency 0.05 --latency 0.002
+"""
+import argparse
+import asyncio
+import time
+
+import aiosmtplib
+
+from benchmarks.smtp_stub import SMTPStub
+from src.services.mailer import Mailer, SMTPPool, build_message
+
+
+def make_messages(count: int):
+    return [build_message('sender@example.com', f'user{i}@example.com', 'Confirm your email', f'<p>{i}</p>')
+            for i in range(count)]
+
+
+async def session_per_message(port: int, messages) -> None:
+    for message in messages:
+        smtp = aiosmtplib.SMTP(hostname='127.0.0.1', port=port, start_tls=False)
+        await smtp.connect()
+        await smtp.send_message(message)
+        await smtp.quit()
+
+
+async def pooled(port: int, messages, size: int, batch_size: int) -> None:
+    pool = SMTPPool(hostname='127.0.0.1', port=port, username=None, password=None, use_tls=False, start_tls=False,
+                    size=size, max_messages=1000, timeout=30)
+    mailer = Mailer(pool, batch_size=batch_size, retries=3, backoff=0.1)
+    await mailer.send_batch(messages)
+    await mailer.close()
+
+
+async def run(args) -> dict:
+    server = await SMTPStub(latency=args.latency, connect_latency=args.connect_latency).start()
+    messages = make_messages(args.messages)
+    results = {}
+    for name, job in (('session per message', session_per_message(server.port, messages)),
+                      (f'pool of {args.pool_size}, batches of {args.batch_size}',
+                       pooled(server.port, messages, args.pool_size, args.batch_size))):
+        started = time.perf_counter()
+        await job
+        results[name] = args.messages / (time.perf_counter() - started)
+    await server.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--connect-latency', type=float, default=0.05)
+    parser.add_argument('--latency', type=float, default=0.002)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=50)
+    args = parser.parse_args()
+
+    for name, rate in asyncio.run(run(args)).items():
+        print(f'{name:>30}: {rate:8.1f} messages/s')
+
+
+if __name__ == '__main__':
+    main()
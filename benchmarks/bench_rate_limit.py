@@ -0,0 +1,72 @@
+"""
+Per-request overhead of RateLimiter.check with local buckets, with Redis for every check,
+and with leased tokens that keep most checks away from Redis.
+
+Without --redis the Redis script is replaced by a stub that sleeps for --latency milliseconds,
+which stands in for one network round-trip.
+
+Usage::
+
+    python -m benchmarks.bench_rate_limit --requests 20000 --latency 0.3
+    python -m benchmarks.bench_rate_limit --redis
+"""
+import argparse
+import asyncio
+import time
+
+from src.database.models import User
+from src.services.rate_limit import RateLimiter
+
+SCOPES = {'bench': '1000000/60'}
+
+
+def make_limiter(use_redis: bool, lease_fraction: float) -> RateLimiter:
+    return RateLimiter(enabled=True, scopes=SCOPES, tiers={'default': 1}, user_tiers={}, use_redis=use_redis,
+                       lease_fraction=lease_fraction, lease_ttl=1, redis_retry=5, local_size=10000)
+
+
+def stub_script(latency: float):
+    async def script(keys, args):
+        await asyncio.sleep(latency)
+        return [int(args[2]), '0']
+
+    return script
+
+
+async def measure(limiter: RateLimiter, requests: int, users: int) -> float:
+    accounts = [User(id=i, email=f'user{i}@example.com') for i in range(users)]
+    started = time.perf_counter()
+    for i in range(requests):
+        await limiter.check('bench', accounts[i % users])
+    return (time.perf_counter() - started) / requests
+
+
+async def run(args) -> dict:
+    results = {'local buckets': await measure(make_limiter(False, 0), args.requests, args.users)}
+    for name, fraction in (('redis every check', 0), ('redis with leases', 0.001)):
+        limiter = make_limiter(True, fraction)
+        if not args.redis:
+            limiter._redis = object()
+            limiter._script = stub_script(args.latency / 1000)
+        results[name] = await measure(limiter, args.requests, args.users)
+        results[name + ' (redis calls)'] = limiter.redis_calls
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.3, help='simulated Redis round-trip in ms')
+    parser.add_argument('--redis', action='store_true', help='use the Redis server from the settings')
+    args = parser.parse_args()
+
+    for name, value in asyncio.run(run(args)).items():
+        if name.endswith('(redis calls)'):
+            print(f'{name:>32}: {value}')
+        else:
+            print(f'{name:>32}: {value * 1e6:8.1f} us per check')
+
+
+if __name__ == '__main__':
+    main()
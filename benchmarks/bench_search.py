@@ -0,0 +1,98 @@
+"""
+Latency of contact search with the LIKE '%x%' scan against the indexed search of search_everywhere_contacts.
+
+The contacts are generated into a temporary SQLite database created from the models, so the contacts_fts
+trigram table and its triggers exist exactly as in the application.
+
+Usage::
+
+    python -m benchmarks.bench_search --contacts 1000000 --users 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select, or_
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.database.models import Base, Contact, User
+from src.repository.contacts import search_everywhere_contacts
+
+SYLLABLES = ['ol', 'ga', 'iv', 'an', 'pe', 'tro', 'ko', 'na', 'ta', 'li', 'ya', 'ser', 'hii', 'mar', 'ia', 'dan']
+# from rare to common: no match at all, a single phone, a handful of emails, a popular syllable
+TERMS = ['zzqx', '00012345', 'enko4242', 'serol']
+
+
+def _word(rnd: random.Random) -> str:
+    return ''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))).capitalize()
+
+
+def generate(path: str, contacts: int, users: int, seed: int = 1) -> None:
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executemany('INSERT INTO users (id, email, password) VALUES (?, ?, ?)',
+                     ((i, f'user{i}@example.com', 'x') for i in range(1, users + 1)))
+
+    def rows():
+        for i in range(contacts):
+            name, surname = _word(rnd), _word(rnd) + rnd.choice(['enko', 'uk', 'ov', ''])
+            yield (name, surname, f'{name.lower()}.{surname.lower()}{i}@{rnd.choice(["mail.com", "ukr.net"])}',
+                   f'+380{i:09d}', f'19{rnd.randint(50, 99)}-01-01', i % users + 1)
+
+    conn.executemany('INSERT INTO contacts (name, surname, email, phone, birthday, user_id) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', rows())
+    conn.commit()
+    conn.close()
+
+
+async def measure(path: str, repeat: int) -> dict:
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    user = User(id=1)
+    timings = {(term, kind): [] for term in TERMS for kind in ('LIKE scan', 'indexed search')}
+    async with async_sessionmaker(bind=engine, class_=AsyncSession)() as db:
+        for _ in range(repeat):
+            for term in TERMS:
+                started = time.perf_counter()
+                like = select(Contact).where(Contact.user_id == user.id).where(
+                    or_(Contact.name.contains(term), Contact.surname.contains(term),
+                        Contact.email.contains(term), Contact.phone.contains(term))).limit(50)
+                (await db.execute(like)).scalars().all()
+                timings[(term, 'LIKE scan')].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await search_everywhere_contacts(term, user, db, limit=50)
+                timings[(term, 'indexed search')].append(time.perf_counter() - started)
+    await engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contacts', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'search.db')
+        started = time.perf_counter()
+        generate(path, args.contacts, args.users)
+        print(f'generated {args.contacts} contacts for {args.users} users in {time.perf_counter() - started:.1f}s')
+        timings = asyncio.run(measure(path, args.repeat))
+
+    for (term, kind), values in timings.items():
+        print(f'{term!r:>12} {kind:>15}: median {statistics.median(values) * 1000:8.2f} ms, '
+              f'max {max(values) * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
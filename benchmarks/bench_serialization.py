@@ -0,0 +1,61 @@
+"""
+Cost of serializing one page of contacts through the response_model path of FastAPI
+(orm_mode validation, jsonable_encoder and the stdlib json module) against the fast path
+(encode_contacts and orjson).
+
+Usage::
+
+    python -m benchmarks.bench_serialization --rows 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.database.models import Contact
+from src.schemas import ContactResponseModel
+from src.services.serialization import encode_contacts, fast_response
+
+
+def make_contacts(rows: int) -> List[Contact]:
+    return [Contact(id=i, name=f'Name{i}', surname=f'Surname{i}', email=f'contact{i}@mail.com',
+                    phone=f'+380{i:09d}', birthday=date(1990, i % 12 + 1, i % 28 + 1), user_id=1)
+            for i in range(rows)]
+
+
+async def measure(rows: int, repeat: int) -> dict:
+    contacts = make_contacts(rows)
+    field = create_response_field(name='Response', type_=List[ContactResponseModel])
+    timings = {'response_model + json': [], 'encode_contacts + orjson': []}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        content = await serialize_response(field=field, response_content=contacts)
+        JSONResponse(content)
+        timings['response_model + json'].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        fast_response(encode_contacts(contacts))
+        timings['encode_contacts + orjson'].append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    timings = asyncio.run(measure(args.rows, args.repeat))
+    for kind, values in timings.items():
+        print(f'{kind:>25}: median {statistics.median(values) * 1000:7.3f} ms per {args.rows} rows, '
+              f'max {max(values) * 1000:7.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Load scenarios against the ASGI app, run in-process through httpx, reporting throughput and latency percentiles.
+
+Every scenario sends --requests requests with --concurrency clients in flight, spread over --active-users users
+of the generated data set. The app runs with its real routes, dependencies and middleware; only get_db is
+pointed at the benchmark database, and the rate limiter is switched off so it does not turn the run into 429s.
+There is no network in between, so the numbers are the cost of the application and the database alone.
+
+Results are printed and, with --output, saved as JSON together with the commit they were measured on;
+--compare prints the change against an earlier result file.
+
+Usage::
+
+    python -m benchmarks.load --users 10000 --contacts 1000000 --output before.json
+    python -m benchmarks.load --database sqlite:///bench.db --scenarios search birthdays_week --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from benchmarks.datagen import NAMES, PASSWORD, SURNAMES, generate
+
+Scenario = Callable[[httpx.AsyncClient, random.Random, int, dict], Awaitable[httpx.Response]]
+
+
+async def contacts_page(client: httpx.AsyncClient, rnd: random.Random, user_id: int, headers: dict):
+    return await client.get('/contacts/', params={"limit": 50}, headers=headers)
+
+
+async def contacts_walk(client: httpx.AsyncClient, rnd: random.Random, user_id: int, headers: dict):
+    response = await client.get('/contacts/', params={"limit": 50}, headers=headers)
+    for _ in range(4):
+        cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+        if cursor is None:
+            break
+        response = await client.get('/contacts/', params={"limit": 50, "after": cursor}, headers=headers)
+    return response
+
+
+async def search(client: httpx.AsyncClient, rnd: random.Random, user_id: int, headers: dict):
+    term = rnd.choice(NAMES + SURNAMES)[:rnd.randint(3, 6)].lower()
+    return await client.get('/contacts/search/', params={"parameter": term}, headers=headers)
+
+
+async def birthdays_week(client: httpx.AsyncClient, rnd: random.Random, user_id: int, headers: dict):
+    return await client.get('/birthdays/', params={"days": 7}, headers=headers)
+
+
+async def login(client: httpx.AsyncClient, rnd: random.Random, user_id: int, headers: dict):
+    return await client.post('/api/auth/login', data={"username": f'user{user_id}@example.com',
+                                                      "password": PASSWORD})
+
+
+SCENARIOS: Dict[str, Scenario] = {"contacts_page": contacts_page, "contacts_walk": contacts_walk, "search": search,
+                                  "birthdays_week": birthdays_week, "login": login}
+# bcrypt makes every login cost a few hundred milliseconds of CPU, so the login scenario sends fewer requests
+REQUEST_SHARE = {"login": 0.1}
+
+
+def summarize(latencies: List[float], elapsed: float, statuses: Counter) -> dict:
+    """
+    The summarize function reduces the latencies of one scenario to throughput and percentiles.
+
+    :param latencies: List[float]: Seconds taken by every request
+    :param elapsed: float: Wall-clock seconds of the whole scenario
+    :param statuses: Counter: Number of responses by status code
+    :return: A dictionary with the results, latencies in milliseconds
+    """
+    ordered = sorted(latencies)
+    cuts = statistics.quantiles(ordered, n=100, method='inclusive') if len(ordered) > 1 else ordered * 99
+    return {"requests": len(ordered), "errors": sum(n for code, n in statuses.items() if code >= 400),
+            "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(cuts[49] * 1000, 2), "p95_ms": round(cuts[94] * 1000, 2),
+            "p99_ms": round(cuts[98] * 1000, 2), "max_ms": round(ordered[-1] * 1000, 2),
+            "status": {str(code): n for code, n in sorted(statuses.items())}}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, tokens: Dict[int, str], requests: int,
+                       concurrency: int, seed: int) -> dict:
+    """
+    The run_scenario function sends the requests of one scenario with concurrency clients in flight.
+
+    :param client: httpx.AsyncClient: Client bound to the app
+    :param scenario: Scenario: The scenario
+    :param tokens: Dict[int, str]: Access tokens of the active users by user id
+    :param requests: int: Number of requests
+    :param concurrency: int: Number of clients sending requests at the same time
+    :param seed: int: Seed of the random generator choosing users and terms
+    :return: The summary of the scenario
+    """
+    rnd = random.Random(seed)
+    users = list(tokens)
+    latencies, statuses = [], Counter()
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            user_id = rnd.choice(users)
+            headers = {"Authorization": f"Bearer {tokens[user_id]}"}
+            started = time.perf_counter()
+            response = await scenario(client, rnd, user_id, headers)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, statuses)
+
+
+async def run(url: str, scenarios: List[str], requests: int, concurrency: int, active_users: int,
+              users: int, seed: int) -> dict:
+    """
+    The run function points the app at the benchmark database and runs the scenarios one after another.
+
+    :param url: str: SQLAlchemy URL of the benchmark database
+    :param scenarios: List[str]: Names of the scenarios to run
+    :param requests: int: Number of requests per scenario
+    :param concurrency: int: Number of clients in flight
+    :param active_users: int: Number of users the requests are spread over
+    :param users: int: Number of users in the database
+    :param seed: int: Seed of the random generator
+    :return: The summary of every scenario by name
+    """
+    from main import app
+    from src.database.db import get_db
+    from src.services.auth import auth_service
+    from src.services.rate_limit import rate_limiter
+
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    rnd = random.Random(seed)
+    user_ids = rnd.sample(range(1, users + 1), min(active_users, users))
+    tokens = {user_id: await auth_service.create_access_token({"sub": f'user{user_id}@example.com'}, 3600)
+              for user_id in user_ids}
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    limiter_enabled, rate_limiter.enabled = rate_limiter.enabled, False
+    results = {}
+    try:
+        async with httpx.AsyncClient(app=app, base_url='http://bench') as client:
+            for name in scenarios:
+                count = max(1, int(requests * REQUEST_SHARE.get(name, 1)))
+                # warm up caches and connections before measuring
+                await run_scenario(client, SCENARIOS[name], tokens, min(count, concurrency), concurrency, seed)
+                results[name] = await run_scenario(client, SCENARIOS[name], tokens, count, concurrency, seed)
+    finally:
+        if previous_override is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous_override
+        rate_limiter.enabled = limiter_enabled
+        await engine.dispose()
+    return results
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, previous: dict) -> List[str]:
+    """
+    The compare function describes the change of throughput and p95 latency against an earlier result file.
+
+    :param results: dict: The current results
+    :param previous: dict: The earlier results
+    :return: One line per scenario present in both
+    """
+    lines = []
+    for name, current in results["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        rps = (current["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0
+        p95 = (current["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0
+        lines.append(f'{name:>15}: throughput {rps:+6.1f}%, p95 {p95:+6.1f}% '
+                     f'(vs {previous.get("commit") or "previous run"})')
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='existing database generated by benchmarks.datagen; '
+                                           'a temporary SQLite database is generated when omitted')
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--contacts', type=int, default=1_000_000)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--active-users', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', help='earlier JSON results to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database
+        if url is None:
+            url = f'sqlite+aiosqlite:///{os.path.join(tmp, "load.db")}'
+            started = time.perf_counter()
+            asyncio.run(generate(url, args.users, args.contacts, args.seed))
+            print(f'generated {args.users} users and {args.contacts} contacts in {time.perf_counter() - started:.1f}s')
+        scenarios = asyncio.run(run(url, args.scenarios, args.requests, args.concurrency, args.active_users,
+                                    args.users, args.seed))
+
+    results = {"commit": current_commit(), "created_at": datetime.utcnow().isoformat(timespec='seconds'),
+               "python": platform.python_version(), "database": make_url(url).get_backend_name(),
+               "users": args.users, "contacts": args.contacts, "concurrency": args.concurrency,
+               "active_users": args.active_users, "scenarios": scenarios}
+    for name, summary in scenarios.items():
+        print(f'{name:>15}: {summary["throughput_rps"]:8.1f} req/s, p50 {summary["p50_ms"]:7.2f} ms, '
+              f'p95 {summary["p95_ms"]:7.2f} ms, p99 {summary["p99_ms"]:7.2f} ms, errors {summary["errors"]}')
+    if args.compare:
+        with open(args.compare) as file:
+            print('\n'.join(compare(results, json.load(file))))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
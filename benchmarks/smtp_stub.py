@@ -0,0 +1,82 @@
+"""
+Minimal SMTP server used as a stand-in for a real relay in the benchmarks.
+
+It speaks just enough plain-text ESMTP for aiosmtplib (EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT),
+keeps the received messages in memory and can inject failures: temporary 421 replies to MAIL FROM,
+or closing the connection after a number of messages. connect_latency and latency delay the greeting
+and every accepted message, standing in for the TLS handshake and the relay's processing time.
+"""
+import asyncio
+
+
+class SMTPStub:
+
+    def __init__(self, latency: float = 0, connect_latency: float = 0, max_messages_per_connection: int | None = None):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.max_messages_per_connection = max_messages_per_connection
+        self.fail_next = 0
+        self.messages = []
+        self.connections = 0
+        self.port = None
+        self._server = None
+
+    async def start(self) -> 'SMTPStub':
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        sent = 0
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b'\r\n')
+            await writer.drain()
+
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        await reply('220 stub ESMTP')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode().strip().upper()
+                if command.startswith(('EHLO', 'HELO')):
+                    await reply('250-stub\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME')
+                elif command.startswith('AUTH'):
+                    await reply('235 2.7.0 Authentication successful')
+                elif command.startswith('MAIL'):
+                    if self.fail_next > 0:
+                        self.fail_next -= 1
+                        await reply('421 4.3.2 Service not available, try again later')
+                    else:
+                        await reply('250 OK')
+                elif command.startswith('RCPT'):
+                    await reply('250 OK')
+                elif command == 'DATA':
+                    await reply('354 End data with <CR><LF>.<CR><LF>')
+                    data = await reader.readuntil(b'\r\n.\r\n')
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    self.messages.append(data[:-5])
+                    sent += 1
+                    await reply('250 OK queued')
+                    if self.max_messages_per_connection and sent >= self.max_messages_per_connection:
+                        break
+                elif command in ('RSET', 'NOOP'):
+                    await reply('250 OK')
+                elif command == 'QUIT':
+                    await reply('221 Bye')
+                    break
+                else:
+                    await reply('502 Command not implemented')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -1,22 +1,55 @@
+import importlib
 
-import redis.asyncio as redis
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi.staticfiles import StaticFiles
 
 from src.conf.config import settings
-from src.database.db import get_db
-from src.routes import contacts_crud, birthdays, contacts_search, auth, users
+from src.database.db import get_engine
+from src.database.instrumentation import QueryTimingMiddleware
+from src.routes import contacts_crud, contacts_bulk, birthdays, contacts_search, auth, users, admin, metrics, health
+from src.services.auth import password_executor
+from src.services.avatar import avatar_image_executor, avatar_upload_executor, HAS_PILLOW
+from src.services.health import health_prober, check_database
+from src.services.mailer import mailer
+from src.services.metrics import MetricsMiddleware, metrics as metrics_registry
 
 app = FastAPI()
 
 
+def preload():
+    """
+    The preload function imports and sets up the subsystems that are otherwise loaded on first use:
+    the database engine and driver, the mail client and templates, Gravatar and the avatar libraries.
+    With the preload_on_startup setting it runs when a worker starts, so its first requests do not pay for them.
+
+    :return: None
+    """
+    get_engine()
+    modules = ['aiosmtplib', 'jinja2', 'libgravatar']
+    if settings.avatar_storage == 'cloudinary':
+        modules += ['cloudinary', 'cloudinary.uploader']
+    if HAS_PILLOW:
+        modules.append('PIL.Image')
+    for module in modules:
+        importlib.import_module(module)
+
+
 @app.on_event("startup")
 async def startup():
-    r = await redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
-    await FastAPILimiter.init(r)
+    if settings.preload_on_startup:
+        preload()
+    health_prober.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await health_prober.stop()
+    password_executor.shutdown()
+    avatar_image_executor.shutdown()
+    avatar_upload_executor.shutdown()
+    await mailer.close()
+    metrics_registry.flush()
 
 
 @app.get('/')
@@ -25,23 +58,43 @@ async def root():
 
 
 @app.get('/api/healthchecker')
-def healthchecker(db: Session = Depends(get_db)):
-    try:
-        res = db.execute(text('SELECT 1')).fetchone()
-        if res is None:
-            raise HTTPException(status_code=500, detail='DB configured not correctly')
-        return {'massage': 'Welcome to FastAPI'}
-    except Exception as err:
-        print(err)
+async def healthchecker():
+    """
+    The healthchecker function is kept for existing probes. It is answered from the last database check
+    of the health prober and only queries the database itself while the prober has no fresh result.
+
+    :return: A welcome message if the database is reachable
+    """
+    up = health_prober.is_up('database')
+    if up is None:
+        try:
+            await check_database()
+            up = True
+        except Exception as err:
+            print(err)
+            up = False
+    if not up:
         raise HTTPException(status_code=500, detail='Error connecting to the DB')
+    return {'massage': 'Welcome to FastAPI'}
 
 
 app.include_router(auth.router, prefix='/api')
+app.include_router(contacts_bulk.router)
 app.include_router(contacts_crud.router)
 app.include_router(contacts_search.router)
 app.include_router(birthdays.router)
 app.include_router(users.router, prefix='/api')
+app.include_router(admin.router, prefix='/api')
+app.include_router(health.router, prefix='/api')
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
+
+if settings.avatar_storage == 'local':
+    app.mount(settings.avatar_local_url, StaticFiles(directory=settings.avatar_local_dir, check_dir=False),
+              name='avatars')
 
+app.add_middleware(QueryTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.origins,
@@ -0,0 +1,33 @@
+"""add contacts birthday_mmdd
+
+Revision ID: 4f81c2d6e0b7
+Revises: 7c3e9b51a2d4
+Create Date: 2026-10-17 12:20:41.331870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f81c2d6e0b7'
+down_revision = '7c3e9b51a2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('birthday_mmdd', sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE contacts SET birthday_mmdd = CAST(strftime('%m%d', birthday) AS INTEGER) "
+                   "WHERE birthday IS NOT NULL")
+    else:
+        op.execute("UPDATE contacts SET birthday_mmdd = "
+                   "EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday) "
+                   "WHERE birthday IS NOT NULL")
+    op.create_index('ix_contacts_user_id_birthday_mmdd', 'contacts', ['user_id', 'birthday_mmdd'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_birthday_mmdd', table_name='contacts')
+    op.drop_column('contacts', 'birthday_mmdd')
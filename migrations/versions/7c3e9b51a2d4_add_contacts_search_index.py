@@ -0,0 +1,63 @@
+"""add contacts search index
+
+Revision ID: 7c3e9b51a2d4
+Revises: 2080d26b7fd0
+Create Date: 2026-10-17 11:03:27.904116
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e9b51a2d4'
+down_revision = '2080d26b7fd0'
+branch_labels = None
+depends_on = None
+
+TRGM_COLUMNS = ('name', 'surname', 'email', 'phone')
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+    "name, surname, email, phone, content='contacts', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_fts(rowid, name, surname, email, phone) "
+    "VALUES (new.id, new.name, new.surname, new.email, new.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, surname, email, phone) "
+    "VALUES ('delete', old.id, old.name, old.surname, old.email, old.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, surname, email, phone) "
+    "VALUES ('delete', old.id, old.name, old.surname, old.email, old.phone); "
+    "INSERT INTO contacts_fts(rowid, name, surname, email, phone) "
+    "VALUES (new.id, new.name, new.surname, new.email, new.phone); END",
+    "INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS contacts_fts_au",
+    "DROP TRIGGER IF EXISTS contacts_fts_ad",
+    "DROP TRIGGER IF EXISTS contacts_fts_ai",
+    "DROP TABLE IF EXISTS contacts_fts",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name in TRGM_COLUMNS:
+            op.create_index(f'ix_contacts_{name}_trgm', 'contacts', [name], unique=False,
+                            postgresql_using='gin', postgresql_ops={name: 'gin_trgm_ops'})
+    elif dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for name in TRGM_COLUMNS:
+            op.drop_index(f'ix_contacts_{name}_trgm', table_name='contacts')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
@@ -0,0 +1,38 @@
+"""add email outbox
+
+Revision ID: 9b2d5e7f1a3c
+Revises: 4f81c2d6e0b7
+Create Date: 2026-10-17 15:02:18.114023
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2d5e7f1a3c'
+down_revision = '4f81c2d6e0b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('email_outbox',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('kind', sa.String(length=50), nullable=False),
+                    sa.Column('recipient', sa.String(length=250), nullable=False),
+                    sa.Column('payload', sa.JSON(), nullable=False),
+                    sa.Column('status', sa.String(length=20), nullable=False),
+                    sa.Column('attempts', sa.Integer(), nullable=False),
+                    sa.Column('available_at', sa.DateTime(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=True),
+                    sa.Column('sent_at', sa.DateTime(), nullable=True),
+                    sa.Column('last_error', sa.Text(), nullable=True),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_email_outbox_status_available_at', 'email_outbox', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_status_available_at', table_name='email_outbox')
+    op.drop_table('email_outbox')
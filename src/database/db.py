@@ -1,27 +1,161 @@
-import configparser
-import pathlib
+import time
 
 from fastapi import HTTPException, status
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError, TimeoutError as PoolTimeoutError
 
 from src.conf.config import settings
 
 
 URI = settings.sqlalchemy_database_url
 
-engine = create_engine(URI, echo=True)
-DBSession = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+class PoolStats:
+    """
+    Counters for connection checkouts made through get_db.
+    The live pool state (size, checked-out, overflow) is read from the engine pool when a snapshot is taken.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        """
+        The record_wait function stores how long a request waited for a pooled connection.
+
+        :param self: Represent the instance of the class
+        :param seconds: float: Time spent waiting for the connection
+        :return: None
+        """
+        self.checkouts += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def record_timeout(self) -> None:
+        """
+        The record_timeout function counts a checkout that gave up after pool_timeout seconds.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        self.checkout_timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        """
+        The snapshot function combines the recorded counters with the current state of the pool.
+        Pools without a fixed size (NullPool, StaticPool) report None for the size related fields.
+
+        :param self: Represent the instance of the class
+        :param pool: The engine pool to read the state from
+        :return: A dictionary with pool statistics
+        """
+
+        def read(name):
+            method = getattr(pool, name, None)
+            return method() if callable(method) else None
+
+        return {
+            "pool_class": type(pool).__name__,
+            "size": read("size"),
+            "checked_in": read("checkedin"),
+            "checked_out": read("checkedout"),
+            "overflow": read("overflow"),
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+def engine_options(uri: str) -> dict:
+    """
+    The engine_options function builds the create_async_engine keyword arguments from the settings.
+    In-memory SQLite databases use a StaticPool, which does not accept the queue pool sizing options.
+
+    :param uri: str: Database URL the engine is created for
+    :return: A dictionary of engine keyword arguments
+    """
+    options = {"echo": settings.db_echo, "pool_pre_ping": settings.db_pool_pre_ping}
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    options.update(pool_size=settings.db_pool_size,
+                   max_overflow=settings.db_max_overflow,
+                   pool_timeout=settings.db_pool_timeout,
+                   pool_recycle=settings.db_pool_recycle)
+    return options
+
+
+_engine = None
+_session_factory = None
+pool_stats = PoolStats()
+
+
+def get_engine():
+    """
+    The get_engine function returns the async engine, creating it on first use.
+    Creating the engine imports the database driver, so it is left out of the import of the app;
+    processes and tests that never reach the database do not pay for it.
+
+    :return: The AsyncEngine of the application
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(URI, **engine_options(URI))
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker:
+    """
+    The get_session_factory function returns the sessionmaker bound to the engine, creating both on first use.
+
+    :return: The async_sessionmaker of the application
+    """
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(bind=get_engine(), class_=AsyncSession, autoflush=False,
+                                              expire_on_commit=False)
+    return _session_factory
+
+
+def __getattr__(name):
+    # engine and DBSession stay importable by name, created when they are first looked up
+    if name == 'engine':
+        return get_engine()
+    if name == 'DBSession':
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Dependency
-def get_db():
-    db = DBSession()
-    try:
-        yield db
-    except SQLAlchemyError as err:
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
-    finally:
-        db.close()
\ No newline at end of file
+async def get_db():
+    """
+    The get_db function is a dependency that yields an AsyncSession bound to the async engine.
+    The connection is checked out up front so that the time spent waiting for the pool is recorded,
+    and a request that can not get a connection within pool_timeout, or can not reach the database at all,
+    fails fast with 503.
+    The session is closed when the request is finished, and rolled back if a SQLAlchemy error occurs.
+
+    :return: An AsyncSession object
+    """
+    async with get_session_factory()() as db:
+        started = time.perf_counter()
+        try:
+            await db.connection()
+        except PoolTimeoutError:
+            pool_stats.record_timeout()
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Database connection pool exhausted")
+        except (DBAPIError, OSError):
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database unavailable")
+        pool_stats.record_wait(time.perf_counter() - started)
+        try:
+            yield db
+        except SQLAlchemyError as err:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
@@ -0,0 +1,247 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+(?:::\w+)?|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+_current_stats: ContextVar['QueryStats | None'] = ContextVar('query_stats', default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """
+    The statement_shape function reduces an SQL statement to its shape: literals become ?,
+    a list of placeholders becomes (?) and whitespace is collapsed. Statements that differ only
+    in their values, like the lazy loads of an N+1 pattern, have the same shape.
+
+    :param statement: str: The SQL statement sent to the database
+    :return: The shape of the statement
+    """
+    shape = _PLACEHOLDER_LIST.sub('(?)', statement)
+    shape = _LITERAL.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryStats:
+    """
+    Statements executed while one request (or one tracked block) was running.
+    """
+
+    def __init__(self, scope: dict | None = None, owner: 'DBInstrumentation | None' = None):
+        self.scope = scope or {}
+        self.owner = owner
+        self.queries = 0
+        self.duration = 0.0
+        self.slow = 0
+        self.shapes = Counter()
+
+    @property
+    def route(self) -> str:
+        """
+        The route property names the request: the method with the path template of the matched route,
+        or the raw path when no route has matched yet.
+
+        :param self: Represent the instance of the class
+        :return: The route, e.g. GET /contacts/{contact_id}
+        """
+        route = self.scope.get('route')
+        path = getattr(route, 'path', None) or self.scope.get('path', '-')
+        method = self.scope.get('method')
+        return f'{method} {path}' if method else path
+
+    def repeated(self, threshold: int) -> List[tuple[str, int]]:
+        """
+        The repeated function lists the statement shapes executed at least threshold times.
+
+        :param self: Represent the instance of the class
+        :param threshold: int: Smallest number of repetitions reported
+        :return: The shapes with their counts, most repeated first
+        """
+        if threshold <= 0:
+            return []
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get('query_started')
+    if stats is None or not started:
+        return
+    stats.owner.record(stats, statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def install_events() -> None:
+    """
+    The install_events function registers the cursor events on the Engine class, so every engine
+    of the process is covered. Calling it again has no effect.
+
+    :return: None
+    """
+    if event.contains(Engine, 'after_cursor_execute', _after_cursor_execute):
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+
+
+class DBInstrumentation:
+    """
+    Counts the statements and the database time of every request with SQLAlchemy cursor events.
+    A statement is attributed to the request whose QueryStats is set in the current context.
+    Statements slower than slow_query_ms and statement shapes repeated n_plus_one_threshold times
+    within one request are logged together with the route.
+    """
+
+    def __init__(self, enabled: bool, slow_query_ms: float, n_plus_one_threshold: int):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.listeners: List[Callable[[QueryStats], None]] = []
+        self.requests = 0
+        self.queries = 0
+        self.slow_queries = 0
+        self.n_plus_one = 0
+
+    def install(self) -> None:
+        """
+        The install function registers the cursor events, once per process.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        install_events()
+
+    def record(self, stats: QueryStats, statement: str, elapsed: float) -> None:
+        """
+        The record function adds one executed statement to the statistics of the request
+        and logs it if it was slow.
+
+        :param self: Represent the instance of the class
+        :param stats: QueryStats: The statistics of the request
+        :param statement: str: The SQL statement
+        :param elapsed: float: Seconds the statement took
+        :return: None
+        """
+        stats.queries += 1
+        stats.duration += elapsed
+        stats.shapes[statement_shape(statement)] += 1
+        if elapsed * 1000 >= self.slow_query_ms:
+            stats.slow += 1
+            self.slow_queries += 1
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, stats.route, statement)
+
+    @contextmanager
+    def track(self, scope: dict | None = None):
+        """
+        The track function collects the statements executed inside the with block, including those
+        of tasks started from it, and reports them when the block ends.
+
+        :param self: Represent the instance of the class
+        :param scope: dict: The ASGI scope of the request, used to name the route
+        :return: A context manager yielding the QueryStats
+        """
+        stats = QueryStats(scope, owner=self)
+        token = _current_stats.set(stats)
+        try:
+            yield stats
+        finally:
+            _current_stats.reset(token)
+            self.finish(stats)
+
+    def finish(self, stats: QueryStats) -> None:
+        """
+        The finish function logs the repeated statement shapes of a finished request
+        and passes its statistics to the listeners.
+
+        :param self: Represent the instance of the class
+        :param stats: QueryStats: The statistics of the request
+        :return: None
+        """
+        self.requests += 1
+        self.queries += stats.queries
+        for shape, count in stats.repeated(self.n_plus_one_threshold):
+            self.n_plus_one += 1
+            logger.warning("Possible N+1 in %s: %d x %s", stats.route, count, shape)
+        for listener in list(self.listeners):
+            listener(stats)
+
+    @staticmethod
+    def server_timing(stats: QueryStats, total: float) -> str:
+        """
+        The server_timing function formats the Server-Timing header of a request.
+
+        :param stats: QueryStats: The statistics of the request
+        :param total: float: Seconds the request has taken so far
+        :return: The header value
+        """
+        return f'db;dur={stats.duration * 1000:.1f};desc="{stats.queries} queries", app;dur={total * 1000:.1f}'
+
+    def stats(self) -> dict:
+        """
+        The stats function reports the totals over all instrumented requests of this worker.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary of statistics
+        """
+        return {"enabled": self.enabled, "requests": self.requests, "queries": self.queries,
+                "slow_queries": self.slow_queries, "n_plus_one": self.n_plus_one}
+
+
+class QueryTimingMiddleware:
+    """
+    ASGI middleware tracking the statements of every HTTP request and adding the Server-Timing header.
+    The header is written when the response starts, so for streamed responses it only covers
+    the statements executed before the first chunk.
+    """
+
+    def __init__(self, app, instrumentation: DBInstrumentation | None = None):
+        self.app = app
+        self.instrumentation = instrumentation or db_instrumentation
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.instrumentation.enabled:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        with self.instrumentation.track(scope) as stats:
+
+            async def send_with_timing(message):
+                if message['type'] == 'http.response.start':
+                    headers = MutableHeaders(scope=message)
+                    headers.append('Server-Timing',
+                                   self.instrumentation.server_timing(stats, time.perf_counter() - started))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+
+db_instrumentation = DBInstrumentation(enabled=settings.db_instrumentation,
+                                       slow_query_ms=settings.db_slow_query_ms,
+                                       n_plus_one_threshold=settings.db_n_plus_one_threshold)
+if db_instrumentation.enabled:
+    db_instrumentation.install()
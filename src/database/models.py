@@ -1,9 +1,24 @@
-from sqlalchemy import Column, Integer, String, DateTime, func, Date, ForeignKey, Boolean
-from sqlalchemy.orm import declarative_base, relationship
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, func, Date, ForeignKey, Boolean, Index, DDL, event, JSON, \
+    Text
+from sqlalchemy import table, column
+from sqlalchemy.orm import declarative_base, relationship, validates
 
 Base = declarative_base()
 
 
+def birthday_mmdd(birthday):
+    """
+    The birthday_mmdd function encodes the month and day of a birthday as month * 100 + day,
+    so that birthdays sort in calendar order regardless of the year of birth.
+
+    :param birthday: date | None: The birthday
+    :return: The MMDD integer, or None if there is no birthday
+    """
+    return birthday.month * 100 + birthday.day if birthday is not None else None
+
+
 
 class Contact(Base):
     __tablename__ = "contacts"
@@ -13,11 +28,59 @@ class Contact(Base):
     email = Column(String, unique=True, index=True)
     phone = Column(String, unique=True, index=True)
     birthday = Column(Date)
+    birthday_mmdd = Column(Integer)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     user_id = Column('user_id', ForeignKey('users.id', ondelete='CASCADE'), default=None)
     user = relationship('User', backref="contacts")
 
+    __table_args__ = (
+        # keyset pagination walks a user's contacts in (user_id, id) order
+        Index('ix_contacts_user_id_id', 'user_id', 'id'),
+        # upcoming birthdays are a range scan over a user's contacts in (user_id, birthday_mmdd) order
+        Index('ix_contacts_user_id_birthday_mmdd', 'user_id', 'birthday_mmdd'),
+        # substring search on PostgreSQL: pg_trgm GIN indexes serve ILIKE '%x%' and similarity()
+        Index('ix_contacts_name_trgm', 'name',
+              postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_contacts_surname_trgm', 'surname',
+              postgresql_using='gin', postgresql_ops={'surname': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_contacts_email_trgm', 'email',
+              postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_contacts_phone_trgm', 'phone',
+              postgresql_using='gin', postgresql_ops={'phone': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+    @validates('birthday')
+    def _set_birthday_mmdd(self, key, value):
+        self.birthday_mmdd = birthday_mmdd(value)
+        return value
+
+
+# substring search on SQLite: FTS5 trigram shadow table kept in sync with contacts by triggers
+contacts_fts = table('contacts_fts', column('rowid'), column('rank'))
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+    "name, surname, email, phone, content='contacts', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_fts(rowid, name, surname, email, phone) "
+    "VALUES (new.id, new.name, new.surname, new.email, new.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, surname, email, phone) "
+    "VALUES ('delete', old.id, old.name, old.surname, old.email, old.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, surname, email, phone) "
+    "VALUES ('delete', old.id, old.name, old.surname, old.email, old.phone); "
+    "INSERT INTO contacts_fts(rowid, name, surname, email, phone) "
+    "VALUES (new.id, new.name, new.surname, new.email, new.phone); END",
+)
+
+event.listen(Base.metadata, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+for statement in SQLITE_FTS_DDL:
+    event.listen(Contact.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Contact.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS contacts_fts').execute_if(dialect='sqlite'))
+
 
 class User(Base):
     __tablename__ = "users"
@@ -28,4 +91,23 @@ class User(Base):
     created_at = Column('crated_at', DateTime, default=func.now())
     avatar = Column(String(255), nullable=True)
     refresh_token = Column(String(255), nullable=True)
-    confirmed = Column(Boolean, default=False)
\ No newline at end of file
+    confirmed = Column(Boolean, default=False)
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    recipient = Column(String(250), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    # a claimed email becomes visible again at available_at if its worker never reports back
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # workers claim the oldest pending emails that are due
+        Index('ix_email_outbox_status_available_at', 'status', 'available_at'),
+    )
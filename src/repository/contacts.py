@@ -1,29 +1,47 @@
+import calendar
 from datetime import date, timedelta, datetime
-from typing import List
+from typing import List, AsyncIterator
 
 from pydantic import EmailStr
-from sqlalchemy import func, and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, or_, select, literal_column, case, insert, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Contact, User
-from src.schemas import ContactInputModel
+from src.database.models import Contact, User, contacts_fts, birthday_mmdd
+from src.schemas import ContactInputModel, ContactPatchModel
+from src.services.search_index import search_index
 
 
-async def get_contacts(skip: int, limit: int, user: User, db: Session) -> List[Contact]:
+def _page(stmt, skip: int, limit: int, user: User, after: int | None):
+    stmt = stmt.where(Contact.user_id == user.id)
+    if after is not None:
+        stmt = stmt.where(Contact.id > after)
+    else:
+        stmt = stmt.offset(skip)
+    return stmt.order_by(Contact.user_id, Contact.id).limit(limit)
+
+
+async def get_contacts(skip: int, limit: int, user: User, db: AsyncSession, after: int | None = None) -> List[Contact]:
     """
-    The get_contacts function returns a list of contacts for the user.
+    The get_contacts function returns a list of contacts for the user, ordered by id.
+    When after is given, the page starts right after that contact id (keyset pagination),
+    so the (user_id, id) index is used and deep pages cost the same as the first one.
 
     :param skip: int: Skip over a certain number of contacts
     :param limit: int: Limit the number of contacts returned
     :param user: User: Get the user_id from the database
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
+    :param after: int | None: Id of the last contact of the previous page
     :return: A list of contacts
 
     """
-    return db.query(Contact).filter(Contact.user_id == user.id).offset(skip).limit(limit).all()
+    result = await db.execute(_page(select(Contact), skip, limit, user, after))
+    return result.scalars().all()
 
 
-async def get_contact(contact_id: int, user: User, db: Session) -> Contact:
+async def get_contact(contact_id: int, user: User, db: AsyncSession) -> Contact:
     """
     The get_contact function takes in a contact_id and user, and returns the contact with that id.
     Args:
@@ -32,107 +50,395 @@ async def get_contact(contact_id: int, user: User, db: Session) -> Contact:
 
     :param contact_id: int: Specify the contact id of the contact to be retrieved
     :param user: User: Get the user_id from the user object
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: The contact object
 
     """
-    return db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
+    result = await db.execute(select(Contact).where(and_(Contact.id == contact_id, Contact.user_id == user.id)))
+    return result.scalars().first()
+
+
+async def get_contact_updated_at(contact_id: int, user: User, db: AsyncSession) -> datetime | None:
+    """
+    The get_contact_updated_at function returns when the contact was last changed, without loading the contact.
+
+    :param contact_id: int: Id of the contact
+    :param user: User: Owner of the contact
+    :param db: AsyncSession: Access the database
+    :return: The updated_at of the contact, or None if it does not exist
+    """
+    result = await db.execute(select(Contact.updated_at).where(Contact.id == contact_id, Contact.user_id == user.id))
+    return result.scalar_one_or_none()
+
+
+async def get_contacts_version(skip: int, limit: int, user: User, db: AsyncSession,
+                               after: int | None = None) -> tuple:
+    """
+    The get_contacts_version function reads the id and updated_at of the contacts of one page, without loading
+    the contacts. It selects the same rows as get_contacts, so it costs no more than reading the page,
+    and any contact created, deleted or updated within the page changes the result.
+
+    :param skip: int: Skip over a certain number of contacts
+    :param limit: int: Limit the number of contacts in the page
+    :param user: User: Owner of the contacts
+    :param db: AsyncSession: Access the database
+    :param after: int | None: Id of the last contact of the previous page
+    :return: The same version contacts_version returns for the page
+    """
+    result = await db.execute(_page(select(Contact.id, Contact.updated_at), skip, limit, user, after))
+    return tuple(tuple(row) for row in result.all())
+
+
+def contacts_version(contacts: List[Contact]) -> tuple:
+    """
+    The contacts_version function summarizes a page of contacts already loaded, like get_contacts_version.
+
+    :param contacts: List[Contact]: The contacts of the page
+    :return: The id and updated_at of every contact
+    """
+    return tuple((contact.id, contact.updated_at) for contact in contacts)
+
+
+def _with_birthday_mmdd(values: dict) -> dict:
+    if 'birthday' in values:
+        return dict(values, birthday_mmdd=birthday_mmdd(values['birthday']))
+    return values
 
 
-async def post_contact(body: ContactInputModel, user: User, db: Session) -> Contact:
+async def post_contact(body: ContactInputModel, user: User, db: AsyncSession) -> Contact:
     """
     The post_contact function creates a new contact in the database.
+    Where the database supports it, the row comes back from INSERT ... RETURNING,
+    so the contact with its generated id and timestamps costs a single statement.
 
     :param body: ContactInputModel: Get the data from the request body
     :param user: User: Get the user id from the token that is passed in
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: The contact object that was added
 
     """
-    contact = Contact(name=body.name,
-                      surname=body.surname,
-                      birthday=body.birthday,
-                      email=body.email,
-                      phone=body.phone,
-                      user_id=user.id)
-    db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    values = _with_birthday_mmdd(dict(body.dict(), user_id=user.id))
+    if db.get_bind().dialect.insert_returning:
+        result = await db.execute(insert(Contact).values(**values).returning(Contact))
+        contact = result.scalar_one()
+        await db.commit()
+    else:
+        contact = Contact(**values)
+        db.add(contact)
+        await db.commit()
+        await db.refresh(contact)
+    search_index.upsert(user.id, contact)
     return contact
 
 
-async def put_contact(contact_id: int, body: ContactInputModel, user: User, db: Session) -> Contact:
+async def _update_contact(contact_id: int, values: dict, user: User, db: AsyncSession) -> Contact | None:
+    values = _with_birthday_mmdd(values)
+    if not values:
+        return await get_contact(contact_id, user, db)
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(update(Contact)
+                                  .where(Contact.id == contact_id, Contact.user_id == user.id)
+                                  .values(**values)
+                                  .returning(Contact)
+                                  .execution_options(synchronize_session=False, populate_existing=True))
+        contact = result.scalar_one_or_none()
+    else:
+        contact = await get_contact(contact_id, user, db)
+        if contact is not None:
+            for name, value in values.items():
+                setattr(contact, name, value)
+    if contact is None:
+        return None
+    await db.commit()
+    search_index.upsert(user.id, contact)
+    return contact
+
+
+async def put_contact(contact_id: int, body: ContactInputModel, user: User, db: AsyncSession) -> Contact:
     """
     The put_contact function updates a contact in the database.
     Args:
     contact_id (int): The id of the contact to update.
     body (ContactInputModel): A ContactInputModel object containing all fields that can be updated for a given user's contacts.
+    The row is updated and returned by one UPDATE ... RETURNING filtered by id and owner.
 
     :param contact_id: int: Identify the contact that is being updated
     :param body: ContactInputModel: Get the data from the request body
     :param user: User: Check if the user is logged in
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: The contact object
 
     """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
-    if contact:
-        contact.name = body.name
-        contact.surname = body.surname
-        contact.birthday = body.birthday
-        contact.email = body.email
-        contact.phone = body.phone
+    return await _update_contact(contact_id, body.dict(), user, db)
 
-        db.commit()
-    return contact
+
+async def patch_contact(contact_id: int, body: ContactPatchModel, user: User, db: AsyncSession) -> Contact | None:
+    """
+    The patch_contact function changes only the fields present in the request body,
+    so the UPDATE sets just those columns.
+
+    :param contact_id: int: Identify the contact that is being updated
+    :param body: ContactPatchModel: The fields to change
+    :param user: User: Owner of the contact
+    :param db: AsyncSession: Access the database
+    :return: The updated contact, or None if it does not exist
+    """
+    return await _update_contact(contact_id, body.dict(exclude_unset=True), user, db)
 
 
-async def delete_contact(contact_id: int, user: User, db: Session) -> Contact:
+async def delete_contact(contact_id: int, user: User, db: AsyncSession) -> Contact:
     """
     The delete_contact function deletes a contact from the database.
     Args:
     contact_id (int): The id of the contact to be deleted.
     user (User): The user who is deleting the contact.  This is used to ensure that only contacts belonging to this user are deleted, and not contacts belonging to other users with similar IDs.
-    db (Session): A connection object for interacting with our database using SQLAlchemy's ORM methods.
+    db (AsyncSession): A connection object for interacting with our database using SQLAlchemy's ORM methods.
+    The deleted row is returned by one DELETE ... RETURNING where the database supports it.
 
     :param contact_id: int: Identify the contact to be deleted
     :param user: User: Identify the user that is making the request
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: The deleted contact
 
     """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(delete(Contact)
+                                  .where(Contact.id == contact_id, Contact.user_id == user.id)
+                                  .returning(Contact)
+                                  .execution_options(synchronize_session=False))
+        contact = result.scalar_one_or_none()
+    else:
+        contact = await get_contact(contact_id, user, db)
+        if contact:
+            await db.delete(contact)
     if contact:
-        db.delete(contact)
-        db.commit()
+        await db.commit()
+        search_index.remove(user.id, contact.id)
     return contact
 
 
-async def search_everywhere_contacts(parameter: str, user: User, db: Session):
+async def get_contacts_by_ids(ids: List[int], user: User, db: AsyncSession) -> List[Contact]:
+    """
+    The get_contacts_by_ids function returns the user's contacts with the given ids using one IN query.
+    Ids that do not exist or belong to another user are left out.
+
+    :param ids: List[int]: Ids of the contacts
+    :param user: User: Owner of the contacts
+    :param db: AsyncSession: Access the database
+    :return: A list of contacts
+    """
+    result = await db.execute(select(Contact).where(Contact.id.in_(ids), Contact.user_id == user.id))
+    return result.scalars().all()
+
+
+async def update_contacts(changes: List[dict], user: User, db: AsyncSession) -> dict:
+    """
+    The update_contacts function applies several partial updates in one transaction.
+    Ownership is checked with one IN query, then all updates are sent as a single bulk UPDATE by primary key
+    and committed once. If the batch violates a unique index, it is retried item by item in savepoints
+    so that only the clashing items fail.
+
+    :param changes: List[dict]: Dictionaries with the contact id and the columns to change
+    :param user: User: Owner of the contacts
+    :param db: AsyncSession: Access the database
+    :return: A dictionary mapping every id to updated, not_found or conflict
+    """
+    ids = [change['id'] for change in changes]
+    result = await db.execute(select(Contact.id).where(Contact.id.in_(ids), Contact.user_id == user.id))
+    owned = set(result.scalars().all())
+    statuses = {contact_id: 'updated' if contact_id in owned else 'not_found' for contact_id in ids}
+    params = [_with_birthday_mmdd(change) for change in changes if change['id'] in owned and len(change) > 1]
+    try:
+        if params:
+            await db.execute(update(Contact), params)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        for change in params:
+            try:
+                async with db.begin_nested():
+                    await db.execute(update(Contact), [change])
+            except IntegrityError:
+                statuses[change['id']] = 'conflict'
+        await db.commit()
+    search_index.invalidate(user.id)
+    return statuses
+
+
+async def delete_contacts(ids: List[int], user: User, db: AsyncSession) -> set:
+    """
+    The delete_contacts function deletes the user's contacts with the given ids with one DELETE and one commit.
+
+    :param ids: List[int]: Ids of the contacts
+    :param user: User: Owner of the contacts
+    :param db: AsyncSession: Access the database
+    :return: The ids of the contacts that were deleted
+    """
+    stmt = delete(Contact).where(Contact.id.in_(ids), Contact.user_id == user.id)
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(stmt.returning(Contact.id))
+        deleted = set(result.scalars().all())
+    else:
+        result = await db.execute(select(Contact.id).where(Contact.id.in_(ids), Contact.user_id == user.id))
+        deleted = set(result.scalars().all())
+        await db.execute(stmt)
+    await db.commit()
+    for contact_id in deleted:
+        search_index.remove(user.id, contact_id)
+    return deleted
+
+
+# columns bound for every row by _insert_statement; asyncpg accepts at most 32767 parameters per statement,
+# and the upsert binds one more for the owner check
+INSERT_COLUMNS = (*ContactInputModel.__fields__, 'birthday_mmdd', 'user_id')
+MAX_INSERT_BATCH_SIZE = (32767 - 1) // len(INSERT_COLUMNS)
+
+
+def _insert_statement(rows: List[dict], user: User, dialect: str, on_conflict: str):
+    """
+    The _insert_statement function builds one multi-row INSERT for the rows, with the conflict clause of the dialect.
+
+    :param rows: List[dict]: Column values of the contacts
+    :param user: User: Owner of the contacts
+    :param dialect: str: Name of the database dialect
+    :param on_conflict: str: Either skip or upsert
+    :return: The INSERT statement returning the emails written
+    """
+    contacts = Contact.__table__
+    values = [dict(row, user_id=user.id, birthday_mmdd=birthday_mmdd(row['birthday'])) for row in rows]
+    if dialect not in ('postgresql', 'sqlite'):
+        return insert(contacts).values(values).returning(contacts.c.email)
+    stmt = (pg_insert if dialect == 'postgresql' else sqlite_insert)(contacts).values(values)
+    if on_conflict == 'upsert':
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[contacts.c.email],
+            set_={name: stmt.excluded[name] for name in ('name', 'surname', 'phone', 'birthday', 'birthday_mmdd')}
+            | {'updated_at': func.now()},
+            # never take over a contact that belongs to another user
+            where=contacts.c.user_id == user.id,
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing()
+    return stmt.returning(contacts.c.email)
+
+
+async def insert_contacts(rows: List[dict], user: User, db: AsyncSession, on_conflict: str = 'skip') -> set:
+    """
+    The insert_contacts function writes a batch of validated contacts with a single multi-row INSERT and commits it.
+    With on_conflict='skip' rows hitting the unique email or phone index are left out;
+    with on_conflict='upsert' a row whose email already exists updates that contact of the user.
+    If the batch still violates a constraint (an upsert whose phone belongs to another contact),
+    it is retried row by row in savepoints so the rest of the batch is kept.
+
+    :param rows: List[dict]: Contact values as produced by ContactInputModel.dict()
+    :param user: User: Owner of the contacts
+    :param db: AsyncSession: Access the database
+    :param on_conflict: str: Either skip or upsert
+    :return: The emails of the contacts inserted or updated
+    """
+    dialect = db.get_bind().dialect.name
+    try:
+        result = await db.execute(_insert_statement(rows, user, dialect, on_conflict))
+        written = set(result.scalars().all())
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        written = set()
+        for row in rows:
+            try:
+                async with db.begin_nested():
+                    result = await db.execute(_insert_statement([row], user, dialect, on_conflict))
+                    written.update(result.scalars().all())
+            except IntegrityError:
+                pass
+        await db.commit()
+    search_index.invalidate(user.id)
+    return written
+
+
+EXPORT_COLUMNS = ('id', 'name', 'surname', 'email', 'phone', 'birthday')
+
+
+async def stream_contacts(user: User, db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[list]:
+    """
+    The stream_contacts function reads all contacts of the user through a server-side cursor,
+    yielding them in batches of plain rows, so memory use does not depend on how many contacts there are.
+
+    :param user: User: Owner of the contacts
+    :param db: AsyncSession: Access the database
+    :param batch_size: int: Number of rows fetched from the cursor at a time
+    :return: An async iterator of lists of rows with the EXPORT_COLUMNS
+    """
+    stmt = select(*(getattr(Contact, column) for column in EXPORT_COLUMNS)) \
+        .where(Contact.user_id == user.id).order_by(Contact.id).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+FTS_MIN_TERM_LENGTH = 3
+
+
+def _fts_phrase(term: str) -> str:
+    """
+    The _fts_phrase function quotes a search term as an FTS5 phrase, so that operators in user input are ignored.
+
+    :param term: str: The raw search term
+    :return: The term as a quoted FTS5 phrase
+    """
+    return '"' + term.replace('"', '""') + '"'
+
+
+async def search_everywhere_contacts(parameter: str, user: User, db: AsyncSession, limit: int = 50):
     """
     The search_everywhere_contacts function searches for contacts in the database that match a given parameter.
-    The function takes three parameters:
-    - parameter: A string containing the search term to be used when searching for contacts.
-    - user: An object of type User, representing the user who is currently logged in and using this function.
-    This is needed because we want to return only those contacts that belong to this particular user,
-    not all users' contacts from the database. We can get it from our request's context (see below).
+    The parameter is matched as a case-insensitive substring of the name, surname, email or phone,
+    and the results are ranked by relevance:
+    - on PostgreSQL the pg_trgm GIN indexes serve the ILIKE filter and similarity() ranks the rows;
+    - on SQLite the contacts_fts trigram table is queried and ranked with bm25.
+    Terms shorter than a trigram can not use those indexes and fall back to a plain ILIKE scan.
+    When the in-process search index is enabled, the search is answered from it without a database round-trip.
 
     :param parameter: str: Search for a contact in the database
     :param user: User: Get the user id of the current logged in user
-    :param db: Session: Access the database and perform queries on it
-    :return: A list of contacts that match the parameter
+    :param db: AsyncSession: Access the database and perform queries on it
+    :param limit: int: Maximum number of contacts returned
+    :return: A list of contacts that match the parameter, most relevant first
 
     """
-    contacts = db.query(Contact).filter(Contact.user_id == user.id).filter(or_(Contact.name.contains(parameter),
-                                                                               Contact.surname.contains(parameter),
-                                                                               Contact.email.contains(parameter))).all()
-    return contacts
-
-
-async def filter_contacts(name: str, surname: str, email: str, user: User, db: Session):
+    contacts = await search_index.search(user.id, parameter, limit, db)
+    if contacts is not None:
+        return contacts
+
+    dialect = db.get_bind().dialect.name
+    stmt = select(Contact).where(Contact.user_id == user.id)
+    if dialect == 'sqlite' and len(parameter) >= FTS_MIN_TERM_LENGTH:
+        stmt = stmt.join(contacts_fts, contacts_fts.c.rowid == Contact.id) \
+            .where(literal_column('contacts_fts').match(_fts_phrase(parameter))) \
+            .order_by(contacts_fts.c.rank, Contact.id)
+    else:
+        stmt = stmt.where(or_(Contact.name.icontains(parameter, autoescape=True),
+                              Contact.surname.icontains(parameter, autoescape=True),
+                              Contact.email.icontains(parameter, autoescape=True),
+                              Contact.phone.icontains(parameter, autoescape=True)))
+        if dialect == 'postgresql':
+            stmt = stmt.order_by(func.greatest(func.similarity(Contact.name, parameter),
+                                               func.similarity(Contact.surname, parameter),
+                                               func.similarity(Contact.email, parameter),
+                                               func.similarity(Contact.phone, parameter)).desc(), Contact.id)
+        else:
+            stmt = stmt.order_by(Contact.id)
+    result = await db.execute(stmt.limit(limit))
+    return result.scalars().all()
+
+
+async def filter_contacts(name: str, surname: str, email: str, user: User, db: AsyncSession, limit: int = 50):
 
     """
     The filter_contacts function filters contacts by name, surname and email.
+    Every non-empty filter is a case-insensitive substring match on its own column.
+    On SQLite the terms long enough for the trigram index first narrow the rows through contacts_fts;
+    on PostgreSQL the pg_trgm GIN indexes serve the ILIKE filters directly.
     Args:
     name (str): The contact's first name.
     surname (str): The contact's last name.
@@ -142,65 +448,93 @@ async def filter_contacts(name: str, surname: str, email: str, user: User, db: S
     :param surname: str: Filter contacts by surname
     :param email: str: Filter the contacts by email address
     :param user: User: Get the user id from the token
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
+    :param limit: int: Maximum number of contacts returned
     :return: A list of contacts that match the criteria
 
     """
-
-    contacts = db.query(Contact).filter(and_(Contact.user_id == user.id,
-                                             Contact.name.contains(name),
-                                             Contact.surname.contains(surname),
-                                             Contact.email.contains(email))).all()
-    return contacts
+    filters = {'name': name, 'surname': surname, 'email': email}
+    stmt = select(Contact).where(Contact.user_id == user.id)
+    for field, term in filters.items():
+        if term:
+            stmt = stmt.where(getattr(Contact, field).icontains(term, autoescape=True))
+
+    fts_terms = [f'{field} : {_fts_phrase(term)}' for field, term in filters.items()
+                 if len(term) >= FTS_MIN_TERM_LENGTH]
+    if fts_terms and db.get_bind().dialect.name == 'sqlite':
+        stmt = stmt.join(contacts_fts, contacts_fts.c.rowid == Contact.id) \
+            .where(literal_column('contacts_fts').match(' AND '.join(fts_terms))) \
+            .order_by(contacts_fts.c.rank, Contact.id)
+    else:
+        stmt = stmt.order_by(Contact.id)
+    result = await db.execute(stmt.limit(limit))
+    return result.scalars().all()
 
 
-# async def match_by_name(name: str, user: User, db: Session) -> List[Contact]:
-#     return db.query(Contact).filter(and_(Contact.name == name, Contact.user_id == user.id)).all()
+# async def match_by_name(name: str, user: User, db: AsyncSession) -> List[Contact]:
+#     return (await db.execute(select(Contact).where(and_(Contact.name == name, Contact.user_id == user.id)))).scalars().all()
 #
 #
-# async def match_by_surname(surname: str, user: User, db: Session) -> List[Contact]:
-#     return db.query(Contact).filter(and_(Contact.surname == surname, Contact.user_id == user.id)).all()
+# async def match_by_surname(surname: str, user: User, db: AsyncSession) -> List[Contact]:
+#     return (await db.execute(select(Contact).where(and_(Contact.surname == surname, Contact.user_id == user.id)))).scalars().all()
 #
 #
-# async def match_by_email(email: EmailStr, user: User, db: Session) -> Contact:
-#     return db.query(Contact).filter(and_(Contact.email == email, Contact.user_id == user.id)).first()
+# async def match_by_email(email: EmailStr, user: User, db: AsyncSession) -> Contact:
+#     return (await db.execute(select(Contact).where(and_(Contact.email == email, Contact.user_id == user.id)))).scalars().first()
+
+
+LEAP_DAY_MMDD = 229
 
 
-async def get_birthdays_week(db: Session, user: User):
+def _celebrates_leap_day_on_feb_28(start: date, end: date) -> bool:
+    # 29 February birthdays are celebrated on 28 February in common years, see services.birthdays.next_birthday
+    return any(not calendar.isleap(year) and start <= date(year, 2, 28) <= end
+               for year in range(start.year, end.year + 1))
+
+
+async def get_birthdays(user: User, db: AsyncSession, start: date, end: date) -> List[Contact]:
+    """
+    The get_birthdays function returns the contacts whose birthdays fall between start and end, inclusive,
+    sorted by the date of their next birthday.
+    The window is matched against the precomputed birthday_mmdd column, so it is a single range query
+    on the (user_id, birthday_mmdd) index, also when it wraps across the end of the year.
+    29 February birthdays are included whenever the window covers 28 February of a common year.
+
+    :param user: User: Get the user id from the user object
+    :param db: AsyncSession: Connect to the database
+    :param start: date: First day of the window
+    :param end: date: Last day of the window
+    :return: A list of contacts ordered by upcoming birthday
+
+    """
+    low, high = birthday_mmdd(start), birthday_mmdd(end)
+    stmt = select(Contact).where(Contact.user_id == user.id, Contact.birthday_mmdd.is_not(None))
+    if (end - start).days < 365:
+        if low <= high:
+            in_window = Contact.birthday_mmdd.between(low, high)
+        else:
+            in_window = or_(Contact.birthday_mmdd >= low, Contact.birthday_mmdd <= high)
+        if _celebrates_leap_day_on_feb_28(start, end):
+            in_window = or_(in_window, Contact.birthday_mmdd == LEAP_DAY_MMDD)
+        stmt = stmt.where(in_window)
+    # birthdays still ahead in the year of start come first, the ones after the new year follow
+    stmt = stmt.order_by(case((Contact.birthday_mmdd >= low, 0), else_=1), Contact.birthday_mmdd, Contact.id)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def get_birthdays_week(db: AsyncSession, user: User):
 
     """
     The get_birthdays_week function returns a list of contacts whose birthdays are within the next 7 days.
     Args:
-    db (Session): The database session to use for querying.
+    db (AsyncSession): The database session to use for querying.
     user (User): The user who's contacts we want to query.
 
-    :param db: Session: Connect to the database
+    :param db: AsyncSession: Connect to the database
     :param user: User: Get the user id from the user object
     :return: A list of contacts whose birthdays are in the next week
 
     """
-
     today = date.today()
-
-
-    if today.day <= 21:
-        next_week_days = [str(today.day + x) for x in range(7)]
-        next_week_days = list(map((lambda x: '0' + x if len(x) < 2 else x), next_week_days))
-
-        current_month = str(today.month)
-        if len(current_month) < 2:
-            current_month = '0' + current_month
-
-        contacts = db.query(Contact).filter(and_(Contact.user_id == user.id, func.date_part('month', Contact.birthday) == current_month,
-                                            func.date_part('day', Contact.birthday).in_(next_week_days))).all()
-
-    else:
-        next_week = [((today + timedelta(x)).day, (today + timedelta(x)).month) for x in range(7)]
-
-        contacts = []
-        for day, month in next_week:
-            contacts.extend(db.query(Contact).filter(and_(Contact.user_id == user.id, func.date_part('month', Contact.birthday) == month,
-                                                     func.date_part('day', Contact.birthday) == day)).all())
-
-    return contacts
-
+    return await get_birthdays(user, db, today, today + timedelta(days=6))
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import EmailOutbox
+from src.services.mailer import is_transient
+
+CONFIRM_EMAIL = 'confirm_email'
+# emails that used up max_attempts stay in the outbox with this status until an operator re-queues them
+DEAD_LETTER = 'dead'
+
+
+def enqueue_email(kind: str, recipient: str, payload: dict, db: AsyncSession) -> EmailOutbox:
+    """
+    The enqueue_email function adds an email to the outbox without committing,
+    so it is written in the same transaction as the change that triggered it.
+
+    :param kind: str: Which email to build, e.g. confirm_email
+    :param recipient: str: Email address of the recipient
+    :param payload: dict: Values needed to build the email
+    :param db: AsyncSession: Access the database
+    :return: The pending outbox row
+    """
+    email = EmailOutbox(kind=kind, recipient=recipient, payload=payload, status='pending', attempts=0,
+                        available_at=datetime.utcnow())
+    db.add(email)
+    return email
+
+
+async def claim_emails(batch_size: int, visibility_timeout: float, max_attempts: int,
+                       db: AsyncSession) -> List[EmailOutbox]:
+    """
+    The claim_emails function takes up to batch_size due emails for one worker and commits the claim.
+    A claimed email is hidden for visibility_timeout seconds; if the worker dies before reporting back,
+    another worker picks it up once the timeout has passed. An email that comes due again after
+    max_attempts claims, e.g. because it crashes every worker that sends it, is moved to the dead letter
+    status instead of being claimed forever. On PostgreSQL, rows locked by a concurrent claim are skipped
+    instead of waited for.
+
+    :param batch_size: int: Maximum number of emails claimed
+    :param visibility_timeout: float: Seconds the claimed emails stay hidden from other workers
+    :param max_attempts: int: Claims after which an email is given up
+    :param db: AsyncSession: Access the database
+    :return: The claimed emails with their attempt counter already increased
+    """
+    now = datetime.utcnow()
+    await db.execute(update(EmailOutbox)
+                     .where(EmailOutbox.status == 'pending', EmailOutbox.available_at <= now,
+                            EmailOutbox.attempts >= max_attempts)
+                     .values(status=DEAD_LETTER,
+                             last_error=func.coalesce(EmailOutbox.last_error,
+                                                      f'No outcome reported after {max_attempts} attempts'))
+                     .execution_options(synchronize_session=False))
+    due = (select(EmailOutbox.id)
+           .where(EmailOutbox.status == 'pending', EmailOutbox.available_at <= now,
+                  EmailOutbox.attempts < max_attempts)
+           .order_by(EmailOutbox.id)
+           .limit(batch_size)
+           .with_for_update(skip_locked=True))
+    result = await db.execute(update(EmailOutbox)
+                              .where(EmailOutbox.id.in_(due.scalar_subquery()), EmailOutbox.available_at <= now)
+                              .values(available_at=now + timedelta(seconds=visibility_timeout),
+                                      attempts=EmailOutbox.attempts + 1)
+                              .returning(EmailOutbox)
+                              .execution_options(synchronize_session=False, populate_existing=True))
+    emails = sorted(result.scalars().all(), key=lambda email: email.id)
+    await db.commit()
+    return emails
+
+
+async def complete_emails(emails: Sequence[EmailOutbox], errors: Sequence[Exception | None], max_attempts: int,
+                          retry_backoff: float, db: AsyncSession) -> None:
+    """
+    The complete_emails function records the outcome of a claimed batch.
+    Sent emails are marked in one UPDATE. A failed email is scheduled again with exponential backoff,
+    marked as failed when the error is permanent, or moved to the dead letter status when max_attempts
+    is reached.
+
+    :param emails: Sequence[EmailOutbox]: The claimed emails
+    :param errors: Sequence[Exception | None]: For every email, None if it was sent or the error
+    :param max_attempts: int: Attempts after which an email is given up
+    :param retry_backoff: float: Delay before the second attempt, doubled for every further attempt
+    :param db: AsyncSession: Access the database
+    :return: None
+    """
+    now = datetime.utcnow()
+    sent = [email.id for email, error in zip(emails, errors) if error is None]
+    if sent:
+        await db.execute(update(EmailOutbox).where(EmailOutbox.id.in_(sent))
+                         .values(status='sent', sent_at=now, last_error=None))
+    for email, error in zip(emails, errors):
+        if error is None:
+            continue
+        values = {"last_error": repr(error)[:1000]}
+        if not is_transient(error):
+            values["status"] = 'failed'
+        elif email.attempts < max_attempts:
+            values["available_at"] = now + timedelta(seconds=retry_backoff * 2 ** (email.attempts - 1))
+        else:
+            values["status"] = DEAD_LETTER
+        await db.execute(update(EmailOutbox).where(EmailOutbox.id == email.id).values(**values))
+    await db.commit()
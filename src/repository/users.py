@@ -1,34 +1,42 @@
-from libgravatar import Gravatar
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
+from src.repository.outbox import enqueue_email, CONFIRM_EMAIL
 from src.schemas import UserModel
+from src.services.cache import user_cache
 
 
-async def get_user_by_email(email: str, db: Session) -> User:
+async def get_user_by_email(email: str, db: AsyncSession) -> User:
     """
     The get_user_by_email function takes in an email and a database session, then returns the user with that email.
 
     :param email: str: Specify the email address of the user to be retrieved
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :return: The user with the given email address
 
     """
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession, confirmation_host: str | None = None) -> User:
     """
     The create_user function creates a new user in the database.
     Args:
     body (UserModel): The UserModel object containing the data to be inserted into the database.
-    db (Session): The SQLAlchemy Session object used to interact with our PostgreSQL database.
+    db (AsyncSession): The SQLAlchemy Session object used to interact with our PostgreSQL database.
+    When confirmation_host is given, the confirmation email is put in the outbox in the same transaction,
+    so it is sent exactly when the user exists.
 
     :param body: UserModel: Pass the user data to the function
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
+    :param confirmation_host: str | None: Base url used in the confirmation link
     :return: The new user object
 
     """
+    from libgravatar import Gravatar
+
     avatar = None
     try:
         g = Gravatar(body.email)
@@ -37,51 +45,56 @@ async def create_user(body: UserModel, db: Session) -> User:
         print(e)
     new_user = User(**body.dict(), avatar=avatar)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    if confirmation_host is not None:
+        enqueue_email(CONFIRM_EMAIL, body.email, {"username": body.username, "host": confirmation_host}, db)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
-async def update_token(user: User, token: str | None, db: Session) -> None:
+async def update_token(user: User, token: str | None, db: AsyncSession) -> None:
     """
     The update_token function updates the refresh token for a user.
 
     :param user: User: Identify the user in the database
     :param token: str | None: Pass in the new token
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: None, meaning it doesn't return anything
     :doc-author: Trelent
     """
     user.refresh_token = token
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(user.email)
 
 
-async def mark_email_confirmed(email: str, db: Session) -> None:
+async def mark_email_confirmed(email: str, db: AsyncSession) -> None:
     """
     The mark_email_confirmed function marks a user's email as confirmed in the database.
 
     :param email: str: Get the user's email
-    :param db: Session: Pass the database session into the function
+    :param db: AsyncSession: Pass the database session into the function
     :return: None
 
     """
     user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
 
 
-async def update_avatar(email, url: str, db: Session) -> User:
+async def update_avatar(email, url: str, db: AsyncSession) -> User:
 
     """
     The update_avatar function updates the avatar of a user in the database.
 
     :param email: Identify the user
     :param url: str: Specify the type of data that is being passed into the function
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :return: The updated user object
 
     """
     user = await get_user_by_email(email, db)
     user.avatar = url
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
     return user
\ No newline at end of file
@@ -0,0 +1,73 @@
+from typing import Dict
+
+from fastapi import APIRouter, Depends
+
+from src.database.db import get_engine, pool_stats
+from src.database.models import User
+from src.schemas import PoolStatsModel, SearchIndexStatsModel, CacheStatsModel, ExecutorStatsModel, \
+    RateLimitStatsModel
+from src.services.auth import auth_service, password_executor
+from src.services.avatar import avatar_image_executor, avatar_upload_executor
+from src.services.cache import user_cache
+from src.services.rate_limit import rate_limiter
+from src.services.search_index import search_index
+
+router = APIRouter(prefix='/admin', tags=['admin'])
+
+
+@router.get('/pool', response_model=PoolStatsModel)
+async def read_pool_stats(current_user: User = Depends(auth_service.get_current_admin)):
+    """
+    The read_pool_stats function returns the state of the database connection pool of this worker:
+    connections checked out, overflow in use, checkout wait times and checkout timeouts.
+
+    :param current_user: User: Get the current user, who must be an admin
+    :return: The pool statistics
+    """
+    return pool_stats.snapshot(get_engine().pool)
+
+
+@router.get('/search-index', response_model=SearchIndexStatsModel)
+async def read_search_index_stats(current_user: User = Depends(auth_service.get_current_admin)):
+    """
+    The read_search_index_stats function returns the state of the in-process contact search index of this worker.
+
+    :param current_user: User: Get the current user, who must be an admin
+    :return: The search index statistics
+    """
+    return search_index.stats()
+
+
+@router.get('/caches', response_model=Dict[str, CacheStatsModel])
+async def read_cache_stats(current_user: User = Depends(auth_service.get_current_admin)):
+    """
+    The read_cache_stats function returns the hit and miss counters of the caches of this worker.
+
+    :param current_user: User: Get the current user, who must be an admin
+    :return: The statistics of every cache by name
+    """
+    return {"users": user_cache.stats(), "tokens": auth_service.token_cache.stats()}
+
+
+@router.get('/executors', response_model=Dict[str, ExecutorStatsModel])
+async def read_executor_stats(current_user: User = Depends(auth_service.get_current_admin)):
+    """
+    The read_executor_stats function returns the load of the worker pools that run blocking work off the event loop.
+
+    :param current_user: User: Get the current user, who must be an admin
+    :return: The statistics of every executor by name
+    """
+    return {"password_hash": password_executor.stats(), "avatar_image": avatar_image_executor.stats(),
+            "avatar_upload": avatar_upload_executor.stats()}
+
+
+@router.get('/rate-limit', response_model=RateLimitStatsModel)
+async def read_rate_limit_stats(current_user: User = Depends(auth_service.get_current_admin)):
+    """
+    The read_rate_limit_stats function returns the counters of the rate limiter of this worker,
+    including how many checks were answered from leased tokens instead of Redis.
+
+    :param current_user: User: Get the current user, who must be an admin
+    :return: The rate limiter statistics
+    """
+    return rate_limiter.stats()
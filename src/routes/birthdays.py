@@ -1,28 +1,68 @@
+from datetime import date
 from typing import List
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models import User
-from src.repository.contacts import get_birthdays_week
-from src.schemas import ContactResponseModel
+from src.repository.contacts import get_birthdays as get_birthdays_between
+from src.schemas import ContactResponseModel, BirthdayDayModel
 from src.services.auth import auth_service
+from src.services.rate_limit import rate_limit
+from src.services.birthdays import birthday_window, group_by_day, MAX_WINDOW_DAYS
+from src.services.serialization import encode_contacts, fast_response
 
-router = APIRouter(prefix='/birthdays', tags=['birthdays'])
+router = APIRouter(prefix='/birthdays', tags=['birthdays'], dependencies=[Depends(rate_limit('birthdays'))])
 
 
 @router.get('/', response_model=List[ContactResponseModel])
-async def get_birthdays(current_user: User = Depends(auth_service.get_current_user),
-                        db: Session = Depends(get_db)):
+async def get_birthdays(days: int = Query(7, ge=1, le=MAX_WINDOW_DAYS),
+                        from_: date | None = Query(None, alias='from'),
+                        to: date | None = None,
+                        current_user: User = Depends(auth_service.get_current_user),
+                        db: AsyncSession = Depends(get_db)):
     """
-    The get_birthdays function returns a list of contacts that have birthdays in the next week.
+    The get_birthdays function returns a list of contacts that have birthdays in the given window,
+    sorted by upcoming date. By default the window is the next 7 days, starting today.
     The current_user parameter is used to determine which user's contacts are being returned.
     The db parameter is used to access the database.
 
+    :param days: int: Length of the window in days, used when to is not given
+    :param from_: date | None: First day of the window, today by default
+    :param to: date | None: Last day of the window
     :param current_user: User: Get the current user
-    :param db: Session: Pass the database session to the function
-    :return: A list of contacts with birthdays in the next 7 days
+    :param db: AsyncSession: Pass the database session to the function
+    :return: A list of contacts with birthdays in the window
     """
-    contacts = await get_birthdays_week(db, current_user)
+    start, end = birthday_window(days, from_, to)
+    contacts = await get_birthdays_between(current_user, db, start, end)
+    if settings.fast_serialization:
+        return fast_response(encode_contacts(contacts))
     return contacts
+
+
+@router.get('/calendar', response_model=List[BirthdayDayModel])
+async def get_birthdays_calendar(days: int = Query(7, ge=1, le=MAX_WINDOW_DAYS),
+                                 from_: date | None = Query(None, alias='from'),
+                                 to: date | None = None,
+                                 current_user: User = Depends(auth_service.get_current_user),
+                                 db: AsyncSession = Depends(get_db)):
+    """
+    The get_birthdays_calendar function returns the birthdays of the window grouped by day,
+    so that a month or a whole year view is a single request.
+
+    :param days: int: Length of the window in days, used when to is not given
+    :param from_: date | None: First day of the window, today by default
+    :param to: date | None: Last day of the window
+    :param current_user: User: Get the current user
+    :param db: AsyncSession: Pass the database session to the function
+    :return: A list of days, each with the contacts celebrating on it
+    """
+    start, end = birthday_window(days, from_, to)
+    contacts = await get_birthdays_between(current_user, db, start, end)
+    days = group_by_day(contacts, start)
+    if settings.fast_serialization:
+        return fast_response([{"date": day["date"], "contacts": encode_contacts(day["contacts"])} for day in days])
+    return days
@@ -0,0 +1,170 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.database.db import get_db
+from src.database.models import User
+from src.repository.contacts import insert_contacts, stream_contacts, EXPORT_COLUMNS, get_contacts_by_ids, \
+    update_contacts, delete_contacts, MAX_INSERT_BATCH_SIZE
+from src.schemas import ContactInputModel, ImportReportModel, ContactIdsModel, ContactBatchUpdateModel, \
+    BatchResultModel
+from src.services.auth import auth_service
+from src.services.rate_limit import rate_limit
+from src.services.contacts_io import iter_records, encode_records, MEDIA_TYPES
+
+router = APIRouter(prefix='/contacts', tags=['contacts bulk'], dependencies=[Depends(rate_limit('contacts_bulk'))])
+
+
+@router.post('/import', response_model=ImportReportModel)
+async def import_contacts(request: Request,
+                          format: str = Query('ndjson', regex='^(csv|ndjson)$'),
+                          on_conflict: str = Query('skip', regex='^(skip|upsert)$'),
+                          batch_size: int = Query(settings.import_batch_size, ge=1, le=MAX_INSERT_BATCH_SIZE),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The import_contacts function imports contacts from a CSV or NDJSON request body.
+    The body is read as a stream: every line is validated with ContactInputModel as it arrives,
+    and valid rows are written in batches of batch_size with one multi-row INSERT and one commit per batch,
+    so the file is never held in memory. A line longer than the import_max_line_bytes setting fails
+    the import with 413; the batches written before it stay imported.
+    Rows clashing with an existing email or phone are skipped, or with on_conflict=upsert update
+    the user's contact with the same email.
+
+    :param request: Request: Stream the request body
+    :param format: str: Either csv (with a header line) or ndjson
+    :param on_conflict: str: Either skip or upsert
+    :param batch_size: int: Number of rows written per INSERT
+    :param db: AsyncSession: Pass the database session to the function
+    :param current_user: User: Get the current user
+    :return: Counters and the list of rows that were not imported, with the reason
+    """
+    report = ImportReportModel()
+    batch, batch_lines, batch_keys = [], [], set()
+
+    def add_error(line: int, error: str):
+        if len(report.errors) < settings.import_max_errors:
+            report.errors.append({"line": line, "error": error})
+        else:
+            report.errors_truncated = True
+
+    async def flush():
+        written = await insert_contacts(batch, current_user, db, on_conflict)
+        for line, row in zip(batch_lines, batch):
+            if row['email'] in written:
+                report.imported += 1
+            else:
+                report.skipped += 1
+                add_error(line, "Skipped: the email or phone is already used by another contact")
+        batch.clear()
+        batch_lines.clear()
+        batch_keys.clear()
+
+    async for line, record, error in iter_records(request.stream(), format, settings.import_max_line_bytes):
+        report.processed += 1
+        if error is None:
+            try:
+                row = ContactInputModel(**record).dict()
+            except ValidationError as err:
+                error = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err.errors())
+        if error is not None:
+            report.failed += 1
+            add_error(line, error)
+            continue
+        # a duplicate inside the batch is written after the batch, so it is handled like any other conflict
+        keys = {('email', row['email']), ('phone', row['phone'])}
+        if batch_keys & keys:
+            await flush()
+        batch.append(row)
+        batch_lines.append(line)
+        batch_keys.update(keys)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return report
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_contacts(format: str = Query('ndjson', regex='^(csv|ndjson)$'),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The export_contacts function streams all contacts of the user as NDJSON or CSV.
+    Rows are read through a server-side cursor and sent batch by batch as they are fetched,
+    so memory stays flat and the first bytes go out before the last rows are read.
+
+    :param format: str: Either csv or ndjson
+    :param db: AsyncSession: Pass the database session to the function
+    :param current_user: User: Get the current user
+    :return: A streaming response with the contacts
+    """
+    batches = stream_contacts(current_user, db, batch_size=settings.export_batch_size)
+    return StreamingResponse(encode_records(batches, EXPORT_COLUMNS, format),
+                             media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'})
+
+
+def _check_batch_size(size: int) -> None:
+    if size > settings.batch_max_items:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"A batch can not contain more than {settings.batch_max_items} items")
+
+
+@router.post('/batch/get', response_model=BatchResultModel)
+async def read_contacts_batch(body: ContactIdsModel,
+                              db: AsyncSession = Depends(get_db),
+                              current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The read_contacts_batch function returns several contacts by id with one query.
+
+    :param body: ContactIdsModel: The ids of the contacts
+    :param db: AsyncSession: Pass the database session to the function
+    :param current_user: User: Get the current user
+    :return: The status of every id, with the contact when it was found
+    """
+    ids = list(dict.fromkeys(body.ids))
+    _check_batch_size(len(ids))
+    contacts = {contact.id: contact for contact in await get_contacts_by_ids(ids, current_user, db)}
+    return {"results": [{"id": contact_id, "status": "ok" if contact_id in contacts else "not_found",
+                         "contact": contacts.get(contact_id)} for contact_id in ids]}
+
+
+@router.put('/batch/update', response_model=BatchResultModel)
+async def update_contacts_batch(body: ContactBatchUpdateModel,
+                                db: AsyncSession = Depends(get_db),
+                                current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The update_contacts_batch function applies partial updates to several contacts in one transaction.
+    Only the fields present in an item are changed.
+
+    :param body: ContactBatchUpdateModel: The id and the changed fields of every contact
+    :param db: AsyncSession: Pass the database session to the function
+    :param current_user: User: Get the current user
+    :return: The status of every item: updated, not_found or conflict
+    """
+    _check_batch_size(len(body.items))
+    changes = list({item.id: item.dict(exclude_unset=True, exclude_none=True) for item in body.items}.values())
+    statuses = await update_contacts(changes, current_user, db)
+    return {"results": [{"id": contact_id, "status": state} for contact_id, state in statuses.items()]}
+
+
+@router.post('/batch/delete', response_model=BatchResultModel)
+async def remove_contacts_batch(body: ContactIdsModel,
+                                db: AsyncSession = Depends(get_db),
+                                current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The remove_contacts_batch function deletes several contacts with one statement.
+
+    :param body: ContactIdsModel: The ids of the contacts
+    :param db: AsyncSession: Pass the database session to the function
+    :param current_user: User: Get the current user
+    :return: The status of every id: deleted or not_found
+    """
+    ids = list(dict.fromkeys(body.ids))
+    _check_batch_size(len(ids))
+    deleted = await delete_contacts(ids, current_user, db)
+    return {"results": [{"id": contact_id, "status": "deleted" if contact_id in deleted else "not_found"}
+                        for contact_id in ids]}
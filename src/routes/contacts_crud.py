@@ -1,75 +1,116 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi_limiter.depends import RateLimiter
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models import User
-from src.repository.contacts import get_contacts, get_contact, post_contact, put_contact, delete_contact
-from src.schemas import ContactResponseModel, ContactInputModel
+from src.repository.contacts import get_contacts, get_contact, post_contact, put_contact, delete_contact, \
+    get_contact_updated_at, get_contacts_version, contacts_version, patch_contact
+from src.schemas import ContactResponseModel, ContactInputModel, ContactPageModel, ContactPatchModel
 from src.services.auth import auth_service
+from src.services.etag import make_etag, etag_matches
+from src.services.pagination import encode_cursor, decode_cursor
+from src.services.rate_limit import rate_limit
+from src.services.serialization import encode_contacts, fast_response
 
 router = APIRouter(prefix='/contacts', tags=['contacts'])
 
+MAX_PAGE_SIZE = 500
+
 
-@router.get('/', response_model=List[ContactResponseModel], dependencies=[Depends(RateLimiter(times=2, seconds=5))])
-async def read_contacts(skip: int = 0,
-                        limit: int = 10,
-                        db: Session = Depends(get_db),
+@router.get('/', response_model=ContactPageModel, dependencies=[Depends(rate_limit('contacts_read'))])
+async def read_contacts(response: Response,
+                        skip: int = 0,
+                        limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+                        after: str | None = None,
+                        if_none_match: str | None = Header(None),
+                        db: AsyncSession = Depends(get_db),
                         current_user: User = Depends(auth_service.get_current_user)):
     """
-    The read_contacts function returns a list of contacts.
-
+    The read_contacts function returns a page of at most MAX_PAGE_SIZE contacts ordered by id,
+    as an object with the items and next_cursor, not a bare list. Pass the next_cursor of a page as the after parameter to get the following page;
+    skip is only used when no cursor is given.
+    The page carries a weak ETag built from the ids and updated_at of its contacts. When the client sends it back
+    in If-None-Match, only the ids and updated_at of the page are queried and an unchanged page is answered
+    with 304 without loading the contacts; without If-None-Match no extra query is made.
+    With the fast_serialization setting the page is encoded straight from the rows and rendered with orjson.
+
+    :param response: Response: Used to set the ETag header
     :param skip: int: Skip a number of records in the database
     :param limit: int: Limit the number of contacts returned
-    :param db: Session: Pass a database session to the function
+    :param after: str | None: Cursor returned as next_cursor by the previous page
+    :param if_none_match: str | None: ETag of the page the client already holds
+    :param db: AsyncSession: Pass a database session to the function
     :param current_user: User: Get the user who is making the request
-    :return: A list of contacts, which is the same as the return type of get_contacts
+    :return: A page with the contacts and the cursor of the next page
     """
-    contacts = await get_contacts(skip, limit, current_user, db)
-    return contacts
-
-
-@router.get('/{contact_id}', response_model=ContactResponseModel)
+    after_id = decode_cursor(after) if after else None
+    if if_none_match:
+        version = await get_contacts_version(skip, limit, current_user, db, after=after_id)
+        etag = make_etag('contacts', current_user.id, skip, limit, after_id, version)
+        if etag_matches(etag, if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    contacts = await get_contacts(skip, limit, current_user, db, after=after_id)
+    etag = make_etag('contacts', current_user.id, skip, limit, after_id, contacts_version(contacts))
+    next_cursor = encode_cursor(contacts[-1].id) if len(contacts) == limit else None
+    if settings.fast_serialization:
+        return fast_response({"items": encode_contacts(contacts), "next_cursor": next_cursor}, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return {"items": contacts, "next_cursor": next_cursor}
+
+
+@router.get('/{contact_id}', response_model=ContactResponseModel, dependencies=[Depends(rate_limit('contacts_read'))])
 async def read_contact(contact_id: int,
-                       db: Session = Depends(get_db),
+                       response: Response,
+                       if_none_match: str | None = Header(None),
+                       db: AsyncSession = Depends(get_db),
                        current_user: User = Depends(auth_service.get_current_user)):
     """
     The read_contact function is used to read a single contact from the database.
     It takes in an integer representing the ID of the contact, and returns a Contact object.
+    The contact carries a weak ETag built from its updated_at; when the client sends it back in If-None-Match,
+    only updated_at is queried and an unchanged contact is answered with 304.
 
     :param contact_id: int: Specify the contact id
-    :param db: Session: Pass a database session to the function
+    :param response: Response: Used to set the ETag header
+    :param if_none_match: str | None: ETag of the contact the client already holds
+    :param db: AsyncSession: Pass a database session to the function
     :param current_user: User: Pass the current user to the function
     :return: A contact object
     """
+    if if_none_match:
+        updated_at = await get_contact_updated_at(contact_id, current_user, db)
+        etag = make_etag('contact', contact_id, updated_at)
+        if updated_at is not None and etag_matches(etag, if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
     contact = await get_contact(contact_id, current_user, db)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+    response.headers["ETag"] = make_etag('contact', contact.id, contact.updated_at)
     return contact
 
 
-@router.post('/', response_model=ContactInputModel)
+@router.post('/', response_model=ContactResponseModel, dependencies=[Depends(rate_limit('contacts_write'))])
 async def create_contact(body: ContactInputModel,
-                         db: Session = Depends(get_db),
+                         db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     """
     The create_contact function creates a new contact in the database.
 
     :param body: ContactInputModel: Define the body of the request
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :param current_user: User: Get the current user from the database
     :return: A contact object
     """
     return await post_contact(body, current_user, db)
 
 
-@router.put('/update/{contact_id}', response_model=ContactResponseModel)
+@router.put('/update/{contact_id}', response_model=ContactResponseModel,
+            dependencies=[Depends(rate_limit('contacts_write'))])
 async def update_contact(contact_id: int,
                          body: ContactInputModel,
-                         db: Session = Depends(get_db),
+                         db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     """
     The update_contact function updates a contact in the database.
@@ -79,7 +120,7 @@ async def update_contact(contact_id: int,
 
     :param contact_id: int: Identify the contact to be updated
     :param body: ContactInputModel: Define the body of the request
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :param current_user: User: Get the user that is currently logged in
     :return: The updated contact
 
@@ -87,15 +128,37 @@ async def update_contact(contact_id: int,
     return await put_contact(contact_id, body, current_user, db)
 
 
-@router.delete('/del/{contact_id}', response_model=ContactResponseModel)
+@router.patch('/update/{contact_id}', response_model=ContactResponseModel,
+              dependencies=[Depends(rate_limit('contacts_write'))])
+async def patch_contact_fields(contact_id: int,
+                               body: ContactPatchModel,
+                               db: AsyncSession = Depends(get_db),
+                               current_user: User = Depends(auth_service.get_current_user)):
+    """
+    The patch_contact_fields function changes only the fields sent in the request body.
+
+    :param contact_id: int: Identify the contact to be updated
+    :param body: ContactPatchModel: The fields to change
+    :param db: AsyncSession: Pass the database session to the function
+    :param current_user: User: Get the user that is currently logged in
+    :return: The updated contact
+    """
+    contact = await patch_contact(contact_id, body, current_user, db)
+    if contact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+    return contact
+
+
+@router.delete('/del/{contact_id}', response_model=ContactResponseModel,
+               dependencies=[Depends(rate_limit('contacts_write'))])
 async def remove_contact(contact_id: int,
-                         db: Session = Depends(get_db),
+                         db: AsyncSession = Depends(get_db),
                          current_user: User = Depends(auth_service.get_current_user)):
     """
     The remove_contact function removes a contact from the database.
 
     :param contact_id: int: Specify the contact to be deleted
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :param current_user: User: Get the user that is currently logged in
     :return: The contact that was deleted
 
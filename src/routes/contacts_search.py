@@ -1,39 +1,49 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models import User
 from src.repository.contacts import search_everywhere_contacts, filter_contacts
 from src.schemas import ContactResponseModel
 from src.services.auth import auth_service
+from src.services.rate_limit import rate_limit
+from src.services.serialization import encode_contacts, fast_response
 
-router = APIRouter(prefix='/contacts/search', tags=['search contacts'])
+router = APIRouter(prefix='/contacts/search', tags=['search contacts'],
+                   dependencies=[Depends(rate_limit('contacts_search'))])
 
 
 @router.get('/', response_model=List[ContactResponseModel])
 async def search_contacts(parameter: str,
-                          db: Session = Depends(get_db),
+                          limit: int = Query(50, ge=1, le=500),
+                          db: AsyncSession = Depends(get_db),
                           current_user: User = Depends(auth_service.get_current_user)):
     """
     The search_contacts function searches for contacts in the database.
-    It takes a parameter, which is the search term, and returns a list of contacts that match.
+    It takes a parameter, which is the search term, and returns a list of contacts that match,
+    most relevant first.
 
     :param parameter: str: Search for a contact
-    :param db: Session: Access the database
+    :param limit: int: Maximum number of contacts returned
+    :param db: AsyncSession: Access the database
     :param current_user: User: Get the current user
     :return: A list of contacts
     """
-    contacts = await search_everywhere_contacts(parameter, current_user, db)
+    contacts = await search_everywhere_contacts(parameter, current_user, db, limit=limit)
+    if settings.fast_serialization:
+        return fast_response(encode_contacts(contacts))
     return contacts
 
 
 @router.get('/filter', response_model=List[ContactResponseModel])
 async def search_with_filter_contacts(name: str = '', surname: str = '', email: str = '',
-                                      db: Session = Depends(get_db),
+                                      limit: int = Query(50, ge=1, le=500),
+                                      db: AsyncSession = Depends(get_db),
                                       current_user: User = Depends(auth_service.get_current_user)):
     """
     The search_with_filter_contacts function searches for contacts in the database.
@@ -43,16 +53,19 @@ async def search_with_filter_contacts(name: str = '', surname: str = '', email:
     :param name: str: Filter the contacts by name
     :param surname: str: Filter the contacts by surname
     :param email: str: Filter the contacts by email
-    :param db: Session: Pass the database session to the function
+    :param limit: int: Maximum number of contacts returned
+    :param db: AsyncSession: Pass the database session to the function
     :param current_user: User: Get the current user from the database
     :return: A list of contacts
     """
-    contacts = await filter_contacts(name, surname, email, current_user, db)
+    contacts = await filter_contacts(name, surname, email, current_user, db, limit=limit)
+    if settings.fast_serialization:
+        return fast_response(encode_contacts(contacts))
     return contacts
 
 # @router.get('/name/{name}', response_model=List[ContactResponseModel])
 # async def search_by_name(name: str,
-#                          db: Session = Depends(get_db),
+#                          db: AsyncSession = Depends(get_db),
 #                          current_user: User = Depends(auth_service.get_current_user)):
 #     contacts = await match_by_name(name, current_user, db)
 #     return contacts
@@ -60,7 +73,7 @@ async def search_with_filter_contacts(name: str = '', surname: str = '', email:
 #
 # @router.get('/surname/{surname}', response_model=List[ContactResponseModel])
 # async def search_by_surname(surname: str,
-#                             db: Session = Depends(get_db),
+#                             db: AsyncSession = Depends(get_db),
 #                             current_user: User = Depends(auth_service.get_current_user)):
 #     contacts = await match_by_surname(surname, current_user, db)
 #     return contacts
@@ -68,7 +81,7 @@ async def search_with_filter_contacts(name: str = '', surname: str = '', email:
 #
 # @router.get('/email/{email}', response_model=ContactResponseModel)
 # async def search_by_email(email: EmailStr,
-#                           db: Session = Depends(get_db),
+#                           db: AsyncSession = Depends(get_db),
 #                           current_user: User = Depends(auth_service.get_current_user)):
 #     contact = await match_by_email(email, current_user, db)
 #     if contact is None:
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from src.services.health import health_prober
+
+router = APIRouter(prefix='/health', tags=['health'])
+
+
+@router.get('/live')
+async def liveness():
+    """
+    The liveness function answers as long as the worker serves requests; it does not touch any dependency.
+
+    :return: The liveness report
+    """
+    return health_prober.liveness()
+
+
+@router.get('/ready')
+async def readiness():
+    """
+    The readiness function reports whether the worker should receive traffic, from the results of the
+    background prober: 200 while every required dependency is up, 503 otherwise or before the first probe.
+    Each dependency is listed with its status and the latency of its last check.
+
+    :return: The readiness report
+    """
+    ready, report = health_prober.readiness()
+    return JSONResponse(report, status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
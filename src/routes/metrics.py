@@ -0,0 +1,116 @@
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.conf.config import settings
+from src.database.db import get_engine, get_session_factory, pool_stats
+from src.database.instrumentation import db_instrumentation
+from src.database.models import EmailOutbox
+from src.services.auth import auth_service, password_executor
+from src.services.avatar import avatar_image_executor, avatar_upload_executor
+from src.services.cache import user_cache
+from src.services.health import health_prober
+from src.services.mailer import mailer
+from src.services.metrics import labels, metrics
+from src.services.rate_limit import rate_limiter
+from src.services.search_index import search_index
+
+router = APIRouter(tags=['metrics'])
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+EXECUTORS = {"password_hash": password_executor, "avatar_image": avatar_image_executor,
+             "avatar_upload": avatar_upload_executor}
+
+
+def collect_subsystems():
+    """
+    The collect_subsystems function reads the state of the database pool, caches, rate limiter,
+    executors, health checks and mailer of this worker as metric samples.
+
+    :return: A generator of (kind, name, labels, value) samples
+    """
+    pool = pool_stats.snapshot(get_engine().pool)
+    yield 'gauge', 'db_pool_size', '', pool['size']
+    yield 'gauge', 'db_pool_checked_out', '', pool['checked_out']
+    yield 'gauge', 'db_pool_overflow', '', pool['overflow']
+    yield 'gauge', 'db_pool_wait_seconds_max', '', pool['wait_max_ms'] / 1000
+    yield 'counter', 'db_pool_checkouts_total', '', pool['checkouts']
+    yield 'counter', 'db_pool_checkout_timeouts_total', '', pool['checkout_timeouts']
+
+    queries = db_instrumentation.stats()
+    yield 'counter', 'db_queries_total', '', queries['queries']
+    yield 'counter', 'db_slow_queries_total', '', queries['slow_queries']
+    yield 'counter', 'db_n_plus_one_total', '', queries['n_plus_one']
+
+    caches = {"users": user_cache.local.stats(), "tokens": auth_service.token_cache.stats()}
+    index = search_index.stats()
+    caches["search_index"] = {"size": index["users"], "hits": index["hits"], "misses": index["builds"],
+                              "evictions": index["evictions"]}
+    for name, stats in caches.items():
+        cache = labels(cache=name)
+        yield 'gauge', 'cache_size', cache, stats['size']
+        yield 'counter', 'cache_hits_total', cache, stats['hits']
+        yield 'counter', 'cache_misses_total', cache, stats['misses']
+        yield 'counter', 'cache_evictions_total', cache, stats['evictions']
+
+    limits = rate_limiter.stats()
+    yield 'counter', 'rate_limit_decisions_total', labels(decision='allowed'), limits['allowed']
+    yield 'counter', 'rate_limit_decisions_total', labels(decision='rejected'), limits['rejected']
+    yield 'counter', 'rate_limit_lease_hits_total', '', limits['lease_hits']
+    yield 'counter', 'rate_limit_redis_calls_total', '', limits['redis_calls']
+    yield 'counter', 'rate_limit_redis_errors_total', '', limits['redis_errors']
+
+    for name, executor in EXECUTORS.items():
+        stats = executor.stats()
+        executor_labels = labels(executor=name)
+        yield 'gauge', 'executor_in_flight', executor_labels, stats['in_flight']
+        yield 'gauge', 'executor_queue_depth', executor_labels, stats['queue_depth']
+        yield 'counter', 'executor_completed_total', executor_labels, stats['completed']
+        yield 'counter', 'executor_failed_total', executor_labels, stats['failed']
+        yield 'counter', 'executor_rejected_total', executor_labels, stats['rejected']
+
+    for name, result in health_prober.results.items():
+        check = labels(check=name)
+        yield 'gauge', 'health_check_up', check, int(result.ok)
+        yield 'gauge', 'health_check_latency_seconds', check, result.latency
+
+    mail = mailer.stats()
+    yield 'counter', 'mail_sent_total', '', mail['sent']
+    yield 'counter', 'mail_failed_total', '', mail['failed']
+    yield 'counter', 'mail_retried_total', '', mail['retried']
+
+
+metrics.register(collect_subsystems)
+
+
+async def read_outbox_depth() -> dict:
+    """
+    The read_outbox_depth function counts the emails in the outbox by status.
+
+    :return: The email_outbox_messages samples by labels
+    """
+    async with get_session_factory()() as db:
+        result = await db.execute(select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status))
+        outbox = {labels(status=status): 0 for status in ('pending', 'sent', 'failed', 'dead')}
+        outbox.update({labels(status=status): count for status, count in result.all()})
+    return outbox
+
+
+@router.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics():
+    """
+    The read_metrics function serves the metrics of all workers in the Prometheus text format.
+    The depth of the email outbox is shared by all workers, so it is read from the database once per scrape.
+    The session is opened here rather than through get_db: if the database is unreachable or does not answer
+    within health_timeout, the outbox gauge is left out instead of failing the scrape.
+
+    :return: The metrics as text
+    """
+    try:
+        outbox = await asyncio.wait_for(read_outbox_depth(), settings.health_timeout)
+    except (SQLAlchemyError, OSError, asyncio.TimeoutError):
+        outbox = {}
+    return PlainTextResponse(metrics.render({"email_outbox_messages": outbox}), media_type=CONTENT_TYPE)
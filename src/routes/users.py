@@ -1,16 +1,15 @@
-from fastapi import APIRouter, Depends, status, UploadFile, File
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
+from fastapi import APIRouter, Depends, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.conf.config import settings
+from src.services.avatar import avatar_pipeline, AvatarUploadRoute
 from src.schemas import UserDb
 
-router = APIRouter(prefix="/users", tags=["users"])
+# the avatar upload is refused from its Content-Length before the body is received
+router = APIRouter(prefix="/users", tags=["users"], route_class=AvatarUploadRoute)
 
 
 @router.get("/me/", response_model=UserDb)
@@ -20,26 +19,19 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
 
 @router.patch('/avatar', response_model=UserDb)
 async def update_avatar_user(file: UploadFile = File(), current_user: User = Depends(auth_service.get_current_user),
-                             db: Session = Depends(get_db)):
+                             db: AsyncSession = Depends(get_db)):
     """
     The update_avatar_user function updates the avatar of a user.
     The function takes in an UploadFile object, which is a file that has been uploaded to the server.
-    It also takes in a User object and Session object as dependencies.
+    It also takes in a User object and AsyncSession object as dependencies.
+    The upload is spooled to a temporary file, cropped to a square avatar in a worker pool
+    and stored by the configured avatar storage, without blocking the event loop.
 
     :param file: UploadFile: Get the file from the request body
     :param current_user: User: Get the current user's email
-    :param db: Session: Get the database session
+    :param db: AsyncSession: Get the database session
     :return: The updated user object
     """
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True
-    )
-
-    r = cloudinary.uploader.upload(file.file, public_id=f'NotesApp/{current_user.username}', overwrite=True)
-    src_url = cloudinary.CloudinaryImage(f'ContsctsApp/{current_user.username}')\
-                        .build_url(width=250, height=250, crop='fill', version=r.get('version'))
+    src_url = await avatar_pipeline.update(file, key=f'user-{current_user.id}')
     user = await repository_users.update_avatar(current_user.email, src_url, db)
     return user
\ No newline at end of file
@@ -1,6 +1,7 @@
 from datetime import date, datetime
+from typing import List
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, validator
 
 
 class ContactInputModel(BaseModel):
@@ -11,6 +12,21 @@ class ContactInputModel(BaseModel):
     birthday: date
 
 
+class ContactPatchModel(BaseModel):
+    name: str | None = None
+    surname: str | None = None
+    email: EmailStr | None = None
+    phone: str | None = None
+    birthday: date | None = None
+
+    @validator('*', pre=True)
+    def not_null(cls, value):
+        # a field is either left out or set; every contact column is required
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
 class ContactResponseModel(BaseModel):
     id: int
     name: str
@@ -23,6 +39,52 @@ class ContactResponseModel(BaseModel):
         orm_mode = True
 
 
+class ContactPageModel(BaseModel):
+    items: List[ContactResponseModel]
+    next_cursor: str | None = None
+
+
+class ContactIdsModel(BaseModel):
+    ids: List[int] = Field(min_items=1)
+
+
+class ContactBatchUpdateItemModel(ContactPatchModel):
+    id: int
+
+
+class ContactBatchUpdateModel(BaseModel):
+    items: List[ContactBatchUpdateItemModel] = Field(min_items=1)
+
+
+class BatchItemResultModel(BaseModel):
+    id: int
+    status: str
+    contact: ContactResponseModel | None = None
+
+
+class BatchResultModel(BaseModel):
+    results: List[BatchItemResultModel]
+
+
+class ImportErrorModel(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReportModel(BaseModel):
+    processed: int = 0
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: List[ImportErrorModel] = []
+    errors_truncated: bool = False
+
+
+class BirthdayDayModel(BaseModel):
+    date: date
+    contacts: List[ContactResponseModel]
+
+
 class UserModel(BaseModel):
     username: str = Field(min_length=5, max_length=16)
     email: str
@@ -53,3 +115,59 @@ class TokenModel(BaseModel):
 
 class RequestEmail(BaseModel):
     email: EmailStr
+
+
+class PoolStatsModel(BaseModel):
+    pool_class: str
+    size: int | None
+    checked_in: int | None
+    checked_out: int | None
+    overflow: int | None
+    checkouts: int
+    checkout_timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class SearchIndexStatsModel(BaseModel):
+    enabled: bool
+    users: int
+    bytes: int
+    memory_budget: int
+    hits: int
+    builds: int
+    evictions: int
+
+
+class CacheStatsModel(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    redis: bool | None = None
+    redis_hits: int | None = None
+    redis_misses: int | None = None
+    redis_errors: int | None = None
+
+
+class ExecutorStatsModel(BaseModel):
+    kind: str
+    workers: int
+    max_pending: int
+    in_flight: int
+    queue_depth: int
+    completed: int
+    rejected: int
+
+
+class RateLimitStatsModel(BaseModel):
+    enabled: bool
+    redis: bool
+    redis_available: bool
+    allowed: int
+    rejected: int
+    lease_hits: int
+    redis_calls: int
+    redis_errors: int
+    local_buckets: int
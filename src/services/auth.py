@@ -1,3 +1,5 @@
+import hashlib
+import time
 from typing import Optional
 
 from jose import JWTError, jwt
@@ -5,42 +7,64 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.conf.config import settings
 from src.database.db import get_db
 from src.repository import users as repository_users
+from src.services.cache import user_cache, LRUCache
+from src.services.executors import BoundedExecutor
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+password_executor = BoundedExecutor('password-hash',
+                                    kind=settings.password_hash_executor,
+                                    workers=settings.password_hash_workers,
+                                    max_pending=settings.password_hash_max_pending)
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = pwd_context
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+    token_cache = LRUCache(settings.jwt_cache_size)
 
-    def verify_password(self, plain_password, hashed_password):
+    async def verify_password(self, plain_password, hashed_password):
         """
     The verify_password function takes a plain-text password and hashed
     password as arguments. It then uses the pwd_context object to verify that the
     plain-text password matches the hashed one.
+    The bcrypt check runs in the password executor, so it does not block the event loop;
+    when the executor is saturated an HTTPException with status code 503 is raised.
 
     :param self: Make the function a method of the user class
     :param plain_password: Pass in the password that is being verified
     :param hashed_password: Compare the hashed password stored in the database with
     :return: True if the password is correct, and false otherwise
     """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await password_executor.run(_verify_password, plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
+    async def get_password_hash(self, password: str):
         """
     The get_password_hash function takes a password as input and returns the hash of that password.
-    The hash is generated using the pwd_context object, which is an instance of Flask-Bcrypt's Bcrypt class.
+    The hash is generated using the pwd_context object, which is an instance of Flask-Bcrypt's Bcrypt class,
+    in the password executor, off the event loop.
 
     :param self: Represent the instance of the class
     :param password: str: Pass in the password that is to be hashed
     :return: A hash of the password that is stored in the database
     """
-        return self.pwd_context.hash(password)
+        return await password_executor.run(_hash_password, password)
 
     # define a function to generate a new access token
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
@@ -87,6 +111,25 @@ class Auth:
         encoded_refresh_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return encoded_refresh_token
 
+    def decode_token(self, token: str) -> dict:
+        """
+        The decode_token function verifies the signature of a token and returns its claims.
+        Verified claims are memoized under the SHA-256 digest of the token until the token's exp,
+        so a client sending the same token again does not pay for another HMAC verification.
+        An invalid token raises JWTError and is never cached.
+
+        :param self: Represent the instance of the class
+        :param token: str: The encoded token
+        :return: The decoded claims
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self.token_cache.get(key)
+        if payload is None:
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            if isinstance(payload.get("exp"), (int, float)):
+                self.token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+        return payload
+
     async def decode_refresh_token(self, refresh_token: str):
         """
         The decode_refresh_token function is used to decode the refresh token.
@@ -99,7 +142,7 @@ class Auth:
         :return: The email of the user
         """
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_token(refresh_token)
             if payload['scope'] == 'refresh_token':
                 email = payload['sub']
                 return email
@@ -107,7 +150,7 @@ class Auth:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
         """
     The get_current_user function is a dependency that will be used in the
         protected endpoints. It takes a token as an argument and returns the user
@@ -115,7 +158,7 @@ class Auth:
 
         :param self: Access the class attributes
         :param token: str: Get the token from the request header
-        :param db: Session: Get the database session
+        :param db: AsyncSession: Get the database session
         :return: A user object
         """
         credentials_exception = HTTPException(
@@ -126,7 +169,7 @@ class Auth:
 
         try:
             # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_token(token)
             if payload['scope'] == 'access_token':
                 email = payload["sub"]
                 if email is None:
@@ -136,11 +179,29 @@ class Auth:
         except JWTError as e:
             raise credentials_exception
 
-        user = await repository_users.get_user_by_email(email, db)
+        user = await user_cache.get(email)
         if user is None:
-            raise credentials_exception
+            user = await repository_users.get_user_by_email(email, db)
+            if user is None:
+                raise credentials_exception
+            await user_cache.set(user)
         return user
 
+    async def get_current_admin(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+        """
+        The get_current_admin function is a dependency of the admin endpoints: it returns the current user
+        if their email is in the admin_emails setting, and raises 403 otherwise.
+
+        :param self: Access the class attributes
+        :param token: str: Get the token from the request header
+        :param db: AsyncSession: Get the database session
+        :return: A user object
+        """
+        current_user = await self.get_current_user(token, db)
+        if current_user.email not in settings.admin_emails:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+        return current_user
+
 
     def create_email_token(self, data: dict):
         """
@@ -169,7 +230,7 @@ class Auth:
     :return: The email that is used to verify the user
     """
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_token(token)
             email = payload["sub"]
             return email
         except JWTError as e:
@@ -0,0 +1,295 @@
+import hashlib
+import importlib.util
+import io
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response, UploadFile, status
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from src.conf.config import settings
+from src.services.executors import BoundedExecutor
+
+# Pillow is optional, without it images are stored as uploaded. It is imported by the first avatar upload.
+HAS_PILLOW = importlib.util.find_spec('PIL') is not None
+
+CHUNK_SIZE = 64 * 1024
+# room for the boundaries and part headers of a multipart body around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+SIGNATURES = {b'\x89PNG\r\n\x1a\n': 'png', b'\xff\xd8\xff': 'jpg', b'GIF87a': 'gif', b'GIF89a': 'gif'}
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """
+    The sniff_image_type function recognizes PNG, JPEG, GIF and WebP files by their first bytes.
+
+    :param head: bytes: The first bytes of the file
+    :return: The file extension, or None if the format is not supported
+    """
+    for signature, extension in SIGNATURES.items():
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def prepare_avatar(path: str, size: int, max_pixels: int) -> tuple[bytes, str, bool]:
+    """
+    The prepare_avatar function turns an uploaded image into the stored avatar.
+    With Pillow the image is cropped to a centered square, resized to size x size and saved as PNG;
+    without it the file is only checked to be an image and kept as it is.
+    The dimensions are read from the header before anything is decoded, so a small file that unpacks
+    into a huge image is refused instead of filling the memory of the worker.
+    It is CPU bound and runs in the avatar executor.
+
+    :param path: str: Path of the uploaded file
+    :param size: int: Width and height of the avatar in pixels
+    :param max_pixels: int: Largest accepted width times height of the uploaded image
+    :return: The image data, its file extension and whether it was resized
+    """
+    if not HAS_PILLOW:
+        data = Path(path).read_bytes()
+        extension = sniff_image_type(data[:16])
+        if extension is None:
+            raise ValueError("Unsupported image format")
+        return data, extension, False
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            if width * height > max_pixels:
+                raise ValueError(f"Avatar can not have more than {max_pixels} pixels")
+            avatar = ImageOps.fit(ImageOps.exif_transpose(image).convert('RGBA'), (size, size))
+    except Image.DecompressionBombError as err:
+        raise ValueError(f"Avatar can not have more than {max_pixels} pixels") from err
+    except (UnidentifiedImageError, OSError) as err:
+        raise ValueError("Unsupported image format") from err
+    buffer = io.BytesIO()
+    avatar.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue(), 'png', True
+
+
+async def receive_upload(file: UploadFile, max_bytes: int) -> Path:
+    """
+    The receive_upload function copies an uploaded file to a temporary file chunk by chunk,
+    so the upload is never held in memory, and stops as soon as it exceeds max_bytes.
+    The file operations run in the thread pool, so a slow disk does not block the event loop.
+
+    :param file: UploadFile: The uploaded file
+    :param max_bytes: int: Largest accepted file size
+    :return: Path of the temporary file, which the caller removes
+    """
+    received = 0
+    handle, name = await run_in_threadpool(tempfile.mkstemp, prefix='avatar-')
+    try:
+        target = os.fdopen(handle, 'wb')
+        try:
+            while chunk := await file.read(CHUNK_SIZE):
+                received += len(chunk)
+                if received > max_bytes:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                        detail=f"Avatar can not be larger than {max_bytes} bytes")
+                await run_in_threadpool(target.write, chunk)
+        finally:
+            await run_in_threadpool(target.close)
+    except BaseException:
+        await run_in_threadpool(os.unlink, name)
+        raise
+    return Path(name)
+
+
+class AvatarUploadRoute(APIRoute):
+    """
+    Route class of the users router: a request whose Content-Length already exceeds the avatar size limit
+    is answered with 413 before Starlette spools the multipart body to disk.
+    Chunked requests without Content-Length are still stopped by receive_upload.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            length = request.headers.get('content-length', '')
+            limit = avatar_pipeline.max_bytes
+            if length.isdigit() and int(length) > limit + MULTIPART_OVERHEAD:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    detail=f"Avatar can not be larger than {limit} bytes")
+            return await handler(request)
+
+        return limited_handler
+
+
+class AvatarStorage(ABC):
+    """
+    Where avatars are kept. save stores the image of one user and returns the URL to show.
+    """
+
+    def __init__(self, executor: BoundedExecutor):
+        self.executor = executor
+
+    @abstractmethod
+    async def save(self, key: str, data: bytes, extension: str, resized: bool) -> str:
+        """
+        The save function stores the avatar of one user.
+
+        :param self: Represent the instance of the class
+        :param key: str: Identifies the owner of the avatar
+        :param data: bytes: The image data
+        :param extension: str: The file extension
+        :param resized: bool: Whether the image already has its final size
+        :return: The URL of the avatar
+        """
+
+
+class LocalAvatarStorage(AvatarStorage):
+    """
+    Content-addressed store on the local filesystem: a file is named after the SHA-256 of its data,
+    so identical avatars are stored once and a changed avatar always gets a new URL.
+    """
+
+    def __init__(self, executor: BoundedExecutor, root: str, base_url: str):
+        super().__init__(executor)
+        self.root = Path(root)
+        self.base_url = base_url.rstrip('/')
+
+    def _write(self, relative: str, data: bytes) -> None:
+        path = self.root / relative
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(path.suffix + '.tmp')
+        temporary.write_bytes(data)
+        temporary.replace(path)
+
+    async def save(self, key: str, data: bytes, extension: str, resized: bool) -> str:
+        """
+        The save function writes the avatar under its content hash.
+
+        :param self: Represent the instance of the class
+        :param key: str: Identifies the owner of the avatar, not used for content-addressed files
+        :param data: bytes: The image data
+        :param extension: str: The file extension
+        :param resized: bool: Whether the image already has its final size
+        :return: The URL of the avatar
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        relative = f'{digest[:2]}/{digest}.{extension}'
+        await self.executor.run(self._write, relative, data)
+        return f'{self.base_url}/{relative}'
+
+
+class CloudinaryAvatarStorage(AvatarStorage):
+    """
+    Stores avatars in Cloudinary. The client is configured once, on the first upload,
+    and the blocking upload runs in the upload executor instead of on the event loop.
+    """
+
+    def __init__(self, executor: BoundedExecutor, cloud_name: str, api_key: str, api_secret: str, size: int):
+        super().__init__(executor)
+        self.cloud_name = cloud_name
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.size = size
+        self._cloudinary = None
+
+    def _client(self):
+        if self._cloudinary is None:
+            import cloudinary
+            import cloudinary.uploader
+
+            cloudinary.config(cloud_name=self.cloud_name, api_key=self.api_key, api_secret=self.api_secret,
+                              secure=True)
+            self._cloudinary = cloudinary
+        return self._cloudinary
+
+    def _upload(self, public_id: str, data: bytes, resized: bool) -> str:
+        cloudinary = self._client()
+        result = cloudinary.uploader.upload(data, public_id=public_id, overwrite=True)
+        if resized:
+            return result['secure_url']
+        return cloudinary.CloudinaryImage(public_id).build_url(width=self.size, height=self.size, crop='fill',
+                                                               version=result.get('version'))
+
+    async def save(self, key: str, data: bytes, extension: str, resized: bool) -> str:
+        """
+        The save function uploads the avatar, replacing the previous one of the same user.
+        An image that was not resized locally is cropped by Cloudinary when it is delivered.
+
+        :param self: Represent the instance of the class
+        :param key: str: Identifies the owner of the avatar
+        :param data: bytes: The image data
+        :param extension: str: The file extension
+        :param resized: bool: Whether the image already has its final size
+        :return: The URL of the avatar
+        """
+        return await self.executor.run(self._upload, f'ContactsApp/{key}', data, resized)
+
+
+class AvatarPipeline:
+    """
+    Receives an avatar upload, prepares the image in the image executor and stores it.
+    Both executors are bounded, so a burst of avatar uploads is answered with 503
+    instead of occupying all the threads and the memory of the worker.
+    """
+
+    def __init__(self, storage: AvatarStorage, image_executor: BoundedExecutor, size: int, max_bytes: int,
+                 max_pixels: int):
+        self.storage = storage
+        self.image_executor = image_executor
+        self.size = size
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+
+    async def update(self, file: UploadFile, key: str) -> str:
+        """
+        The update function runs the whole pipeline for one uploaded avatar.
+        If the file is not an image, or has more pixels than max_pixels, it raises an HTTPException
+        with status code 400.
+
+        :param self: Represent the instance of the class
+        :param file: UploadFile: The uploaded file
+        :param key: str: Identifies the owner of the avatar
+        :return: The URL of the stored avatar
+        """
+        path = await receive_upload(file, self.max_bytes)
+        try:
+            data, extension, resized = await self.image_executor.run(prepare_avatar, str(path), self.size,
+                                                                     self.max_pixels)
+        except ValueError as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+        finally:
+            path.unlink(missing_ok=True)
+        return await self.storage.save(key, data, extension, resized)
+
+
+avatar_image_executor = BoundedExecutor('avatar-image', settings.avatar_executor, workers=settings.avatar_workers,
+                                        max_pending=settings.avatar_max_pending)
+avatar_upload_executor = BoundedExecutor('avatar-upload', 'thread', workers=settings.avatar_max_uploads,
+                                         max_pending=settings.avatar_max_pending)
+
+
+def make_storage(backend: str) -> AvatarStorage:
+    """
+    The make_storage function builds the avatar storage selected by the avatar_storage setting.
+
+    :param backend: str: Either cloudinary or local
+    :return: The storage backend
+    """
+    if backend == 'cloudinary':
+        return CloudinaryAvatarStorage(avatar_upload_executor, settings.cloudinary_name,
+                                       str(settings.cloudinary_api_key), settings.cloudinary_api_secret,
+                                       settings.avatar_size)
+    if backend == 'local':
+        return LocalAvatarStorage(avatar_upload_executor, settings.avatar_local_dir, settings.avatar_local_url)
+    raise ValueError(f"Unknown avatar storage: {backend}")
+
+
+avatar_pipeline = AvatarPipeline(make_storage(settings.avatar_storage), avatar_image_executor,
+                                 size=settings.avatar_size, max_bytes=settings.avatar_max_bytes,
+                                 max_pixels=settings.avatar_max_pixels)
@@ -0,0 +1,64 @@
+import calendar
+from datetime import date, timedelta
+from typing import List
+
+from fastapi import HTTPException, status
+
+from src.database.models import Contact
+
+MAX_WINDOW_DAYS = 366
+
+
+def birthday_window(days: int, start: date | None = None, end: date | None = None) -> tuple[date, date]:
+    """
+    The birthday_window function resolves the query parameters of the birthday endpoints into an inclusive window.
+    Without start the window begins today; without end it lasts the given number of days.
+
+    :param days: int: Length of the window when end is not given
+    :param start: date | None: First day of the window
+    :param end: date | None: Last day of the window
+    :return: A (start, end) tuple of dates
+    """
+    start = start or date.today()
+    end = end or start + timedelta(days=days - 1)
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'to' must not be before 'from'")
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"The window can not be longer than {MAX_WINDOW_DAYS} days")
+    return start, end
+
+
+def next_birthday(birthday: date, start: date) -> date:
+    """
+    The next_birthday function returns the first anniversary of a birthday on or after start.
+    A 29 February birthday is celebrated on 28 February in common years.
+
+    :param birthday: date: The birthday
+    :param start: date: Day to count from
+    :return: The date of the next birthday
+    """
+    for year in (start.year, start.year + 1):
+        day = birthday.day
+        if birthday.month == 2 and day == 29 and not calendar.isleap(year):
+            day = 28
+        anniversary = date(year, birthday.month, day)
+        if anniversary >= start:
+            return anniversary
+
+
+def group_by_day(contacts: List[Contact], start: date) -> List[dict]:
+    """
+    The group_by_day function buckets contacts sorted by upcoming birthday into calendar days in one pass.
+
+    :param contacts: List[Contact]: Contacts ordered by their next birthday after start
+    :param start: date: First day of the window
+    :return: A list of {"date", "contacts"} dictionaries, one per day that has birthdays
+    """
+    days = []
+    for contact in contacts:
+        day = next_birthday(contact.birthday, start)
+        if not days or days[-1]["date"] != day:
+            days.append({"date": day, "contacts": []})
+        days[-1]["contacts"].append(contact)
+    return days
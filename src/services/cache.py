@@ -0,0 +1,197 @@
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+
+
+class LRUCache:
+    """
+    Bounded in-process mapping with a time to live per entry.
+    When the cache is full the least recently used entry is evicted; expired entries are dropped on access.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """
+        The get function returns the cached value for the key, or None if it is missing or expired.
+
+        :param self: Represent the instance of the class
+        :param key: The cache key
+        :return: The cached value or None
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        """
+        The set function stores a value, evicting the least recently used entry if the cache is full.
+
+        :param self: Represent the instance of the class
+        :param key: The cache key
+        :param value: The value to store
+        :param ttl: float | None: Seconds the entry stays valid, the cache default when omitted
+        :return: None
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or (ttl is not None and ttl <= 0):
+            return
+        self._data[key] = (time.monotonic() + ttl if ttl is not None else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key) -> None:
+        """
+        The delete function removes the key from the cache, if present.
+
+        :param self: Represent the instance of the class
+        :param key: The cache key
+        :return: None
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        The stats function reports the size of the cache and its hit, miss and eviction counters.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary of statistics
+        """
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+
+class UserCache:
+    """
+    Two-tier cache of authenticated users keyed by email: an in-process LRU in front of an optional Redis layer.
+    Only the columns needed by the protected routes are cached; the password hash and the refresh token are not.
+    Every hit returns a new transient User, so cached data is never shared between sessions.
+    """
+
+    COLUMNS = ('id', 'username', 'email', 'created_at', 'avatar', 'confirmed')
+    KEY_PREFIX = 'contacts:user:'
+
+    def __init__(self, local: LRUCache, use_redis: bool, redis_ttl: int):
+        self.local = local
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+        return self._redis
+
+    @staticmethod
+    def _dumps(data: dict) -> str:
+        return json.dumps({k: v.isoformat() if isinstance(v, datetime) else v for k, v in data.items()})
+
+    @staticmethod
+    def _loads(raw) -> dict:
+        data = json.loads(raw)
+        if data.get('created_at'):
+            data['created_at'] = datetime.fromisoformat(data['created_at'])
+        return data
+
+    async def get(self, email: str) -> User | None:
+        """
+        The get function looks the user up in the local tier, then in Redis.
+        A Redis hit is copied into the local tier; Redis errors are counted and treated as misses.
+
+        :param self: Represent the instance of the class
+        :param email: str: Email of the user
+        :return: A transient User object, or None on a miss
+        """
+        data = self.local.get(email)
+        if data is None and self.use_redis:
+            try:
+                raw = await self._client().get(self.KEY_PREFIX + email)
+            except RedisError:
+                self.redis_errors += 1
+                raw = None
+            if raw is None:
+                self.redis_misses += 1
+            else:
+                self.redis_hits += 1
+                data = self._loads(raw)
+                self.local.set(email, data)
+        return User(**data) if data is not None else None
+
+    async def set(self, user: User) -> None:
+        """
+        The set function stores a user loaded from the database in both tiers.
+
+        :param self: Represent the instance of the class
+        :param user: User: The user to cache
+        :return: None
+        """
+        data = {column: getattr(user, column) for column in self.COLUMNS}
+        self.local.set(user.email, data)
+        if self.use_redis:
+            try:
+                await self._client().set(self.KEY_PREFIX + user.email, self._dumps(data), ex=self.redis_ttl)
+            except RedisError:
+                self.redis_errors += 1
+
+    async def invalidate(self, email: str | None) -> None:
+        """
+        The invalidate function drops the user from both tiers after the user row has changed.
+        Other workers drop their local copy when its time to live runs out.
+
+        :param self: Represent the instance of the class
+        :param email: str | None: Email of the changed user
+        :return: None
+        """
+        if email is None:
+            return
+        self.local.delete(email)
+        if self.use_redis:
+            try:
+                await self._client().delete(self.KEY_PREFIX + email)
+            except RedisError:
+                self.redis_errors += 1
+
+    def stats(self) -> dict:
+        """
+        The stats function reports the local tier statistics together with the Redis hit, miss and error counters.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary of statistics
+        """
+        return {**self.local.stats(), "redis": self.use_redis, "redis_hits": self.redis_hits,
+                "redis_misses": self.redis_misses, "redis_errors": self.redis_errors}
+
+
+user_cache = UserCache(LRUCache(settings.user_cache_size, ttl=settings.user_cache_local_ttl),
+                       use_redis=settings.user_cache_redis, redis_ttl=settings.user_cache_redis_ttl)
@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Sequence
+
+from fastapi import HTTPException, status
+
+FORMATS = ('csv', 'ndjson')
+MEDIA_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """
+    The iter_lines function splits a stream of byte chunks into lines as the chunks arrive,
+    so only the current chunk and an unfinished line are held in memory.
+    A line longer than max_line_bytes fails the request with 413 as soon as it is detected,
+    so a body without line breaks can not grow the buffer without limit.
+    Lines are not decoded here, so a line that is not valid UTF-8 is reported on its own by iter_records.
+
+    :param chunks: AsyncIterator[bytes]: The request body stream
+    :param max_line_bytes: int: Maximum length of a line in bytes, without its line ending
+    :return: An async iterator of lines without their line endings
+    """
+    buffer = b''
+    line_no = 0
+    async for chunk in chunks:
+        # a newline byte never occurs inside a multi-byte UTF-8 sequence, so the bytes can be split as they are
+        *lines, buffer = (buffer + chunk).split(b'\n')
+        for line in lines:
+            line_no += 1
+            yield _check_line(line, line_no, max_line_bytes)
+        if len(buffer.rstrip(b'\r')) > max_line_bytes:
+            _line_too_long(line_no + 1, max_line_bytes)
+    if buffer:
+        yield _check_line(buffer, line_no + 1, max_line_bytes)
+
+
+def _check_line(line: bytes, line_no: int, max_line_bytes: int) -> bytes:
+    line = line.rstrip(b'\r')
+    if len(line) > max_line_bytes:
+        _line_too_long(line_no, max_line_bytes)
+    return line
+
+
+def _line_too_long(line_no: int, max_line_bytes: int):
+    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Line {line_no} is longer than {max_line_bytes} bytes")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str,
+                       max_line_bytes: int) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    The iter_records function parses a streamed CSV or NDJSON upload into records, one line at a time.
+    CSV input starts with a header line naming the columns; quoted values can not span several lines.
+    Blank lines are skipped. A line that can not be parsed, or is not valid UTF-8, is yielded with an error
+    instead of a record.
+
+    :param chunks: AsyncIterator[bytes]: The request body stream
+    :param fmt: str: Either csv or ndjson
+    :param max_line_bytes: int: Maximum length of a line in bytes
+    :return: An async iterator of (line number, record or None, error or None) tuples
+    """
+    header = None
+    line_no = 0
+    async for raw in iter_lines(chunks, max_line_bytes):
+        line_no += 1
+        try:
+            line = raw.decode('utf-8')
+        except UnicodeDecodeError as err:
+            yield line_no, None, f"Invalid UTF-8: {err.reason} at byte {err.start + 1}"
+            continue
+        if not line.strip():
+            continue
+        if fmt == 'csv':
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_no, None, f"Expected {len(header)} values, got {len(values)}"
+                continue
+            yield line_no, dict(zip(header, values)), None
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError as err:
+                yield line_no, None, f"Invalid JSON: {err}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
+
+
+async def encode_records(batches: AsyncIterator[Sequence], columns: Sequence[str], fmt: str) -> AsyncIterator[bytes]:
+    """
+    The encode_records function turns batches of rows into CSV or NDJSON chunks, one chunk per batch.
+    CSV output starts with a header line with the column names.
+
+    :param batches: AsyncIterator[Sequence]: Batches of rows with values in the order of columns
+    :param columns: Sequence[str]: Names of the columns
+    :param fmt: str: Either csv or ndjson
+    :return: An async iterator of encoded chunks
+    """
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+        async for rows in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+    else:
+        async for rows in batches:
+            yield ''.join(json.dumps(dict(zip(columns, row)), default=_json_default) + '\n' for row in rows).encode()
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
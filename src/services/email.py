@@ -1,51 +1,37 @@
-from pathlib import Path
+from email.message import EmailMessage
+from email.utils import formataddr
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
 
 from src.conf.config import settings
+from src.repository.outbox import CONFIRM_EMAIL
 from src.services.auth import auth_service
+from src.services.mailer import render_template, build_message
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME=settings.mail_username,
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-)
-
-
-async def send_email(email: EmailStr, username: str, host: str):
+
+def confirmation_message(email: EmailStr, username: str, host: str) -> EmailMessage:
     """
-    The send_email function sends an email to the user with a link to confirm their email address.
-    The function takes in three parameters:
-        -email: EmailStr, the user's email address.
-        -username: str, the username of the user who is registering for an account.  This will be used in a greeting message within the body of the email sent to them.
-        -host: str, this is where we are hosting our application (i.e., localhost).  This will be used as part of a URL that they can click on within their browser.
+    The confirmation_message function builds the email with the link that confirms the user's email address.
 
     :param email: EmailStr: Specify the email address of the recipient
     :param username: str: Pass the username to the template
     :param host: str: Pass the hostname of the server to the email template
-    :return: A coroutine, which is an object that can be used to run the function asynchronously
-    :doc-author: Trelent
+    :return: The message, ready to send
+    """
+    token_verification = auth_service.create_email_token({"sub": email})
+    html = render_template("email_template.html", {"host": host, "username": username, "token": token_verification})
+    return build_message(formataddr((settings.mail_username, settings.mail_from)), email, "Confirm your email ", html)
+
+
+def outbox_message(kind: str, recipient: str, payload: dict) -> EmailMessage:
+    """
+    The outbox_message function builds the email for an outbox entry.
+
+    :param kind: str: Which email to build
+    :param recipient: str: Email address of the recipient
+    :param payload: dict: Values stored with the outbox entry
+    :return: The message, ready to send
     """
-    try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as err:
-        print(err)
+    if kind == CONFIRM_EMAIL:
+        return confirmation_message(recipient, payload["username"], payload["host"])
+    raise ValueError(f"Unknown email kind: {kind}")
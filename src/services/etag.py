@@ -0,0 +1,28 @@
+import hashlib
+
+
+def make_etag(*parts) -> str:
+    """
+    The make_etag function builds a weak entity tag from the values that identify a version of a resource.
+
+    :param parts: Values that change whenever the representation changes
+    :return: A weak ETag header value
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """
+    The etag_matches function checks an If-None-Match header against the current ETag using weak comparison.
+
+    :param etag: str: The current ETag of the resource
+    :param if_none_match: str | None: The If-None-Match header sent by the client
+    :return: True if the client already holds the current version
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
@@ -0,0 +1,101 @@
+import asyncio
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+
+
+class BoundedExecutor:
+    """
+    Runs blocking functions in a dedicated thread or process pool, away from the event loop.
+    At most max_pending calls may be running or queued; further calls are rejected at once with 503,
+    so a burst of expensive work can not build an unbounded backlog and starve the rest of the API.
+    """
+
+    def __init__(self, name: str, kind: str, workers: int, max_pending: int):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor: Executor | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of accepted calls waiting for a free worker."""
+        return max(0, self.in_flight - self.workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, fn, *args):
+        """
+        The run function executes fn(*args) in the pool and awaits its result.
+        If max_pending calls are already in flight, it raises an HTTPException with status code 503.
+        A call keeps its slot until the pool finishes it: when the caller is cancelled, a call that has
+        not started is dropped, but one that is already running still counts until it returns.
+
+        :param self: Represent the instance of the class
+        :param fn: A picklable function when the pool runs processes
+        :param args: Positional arguments for fn
+        :return: The return value of fn
+        """
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Server is busy, try again later",
+                                headers={"Retry-After": "1"})
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(fn, *args)
+        self.in_flight += 1
+        future.add_done_callback(lambda done: self._call_in_loop(loop, done))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _call_in_loop(self, loop: asyncio.AbstractEventLoop, future: Future) -> None:
+        # runs in the worker thread, while the counters belong to the event loop
+        try:
+            loop.call_soon_threadsafe(self._finished, future)
+        except RuntimeError:
+            # the loop is already closed, nobody reads the counters any more
+            pass
+
+    def _finished(self, future: Future) -> None:
+        self.in_flight -= 1
+        if future.cancelled():
+            return
+        if future.exception() is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    def shutdown(self) -> None:
+        """
+        The shutdown function stops the pool; it is created again on the next call.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """
+        The stats function reports the pool size, the calls in flight and queued, and the completed, failed
+        and rejected counters.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary of statistics
+        """
+        return {"kind": self.kind, "workers": self.workers, "max_pending": self.max_pending,
+                "in_flight": self.in_flight, "queue_depth": self.queue_depth, "completed": self.completed,
+                "failed": self.failed, "rejected": self.rejected}
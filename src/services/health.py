@@ -0,0 +1,176 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable
+
+import redis.asyncio as redis
+from sqlalchemy import text
+
+from src.conf.config import settings
+from src.database.db import get_engine
+
+Check = Callable[[], Awaitable[None]]
+
+
+class CheckResult:
+    """
+    Outcome of the last run of one dependency check.
+    """
+
+    __slots__ = ('ok', 'latency', 'error', 'checked_at')
+
+    def __init__(self, ok: bool, latency: float, error: str | None, checked_at: float):
+        self.ok = ok
+        self.latency = latency
+        self.error = error
+        self.checked_at = checked_at
+
+    def as_dict(self, now: float) -> dict:
+        return {"status": "ok" if self.ok else "error", "latency_ms": round(self.latency * 1000, 2),
+                "error": self.error, "age_s": round(now - self.checked_at, 2)}
+
+
+class HealthProber:
+    """
+    Checks the dependencies of the service in the background every interval seconds and keeps the results,
+    so readiness probes are answered from memory instead of opening a database connection each time.
+
+    The service is ready when every required check passed on its last run and that run is not older than
+    stale_after seconds, which also catches a prober task that stopped. Failing optional checks only mark
+    the service as degraded: the rate limiter falls back to local buckets without Redis. The API does not
+    talk to the mail server, emails are sent by the outbox worker.
+    """
+
+    def __init__(self, checks: Dict[str, Check], required: Iterable[str], interval: float, timeout: float,
+                 stale_after: float):
+        self.checks = checks
+        self.required = set(required) & set(checks)
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.results: Dict[str, CheckResult] = {}
+        self.started_at = time.monotonic()
+        self._task = None
+
+    async def _run_check(self, name: str, check: Check) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+            ok, error = True, None
+        except asyncio.TimeoutError:
+            ok, error = False, f"Timed out after {self.timeout}s"
+        except Exception as err:
+            ok, error = False, f"{type(err).__name__}: {err}"
+        self.results[name] = CheckResult(ok, time.perf_counter() - started, error, time.monotonic())
+
+    async def run_once(self) -> None:
+        """
+        The run_once function runs all checks concurrently and stores their results.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        await asyncio.gather(*(self._run_check(name, check) for name, check in self.checks.items()))
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        The start function starts probing in a background task of the running event loop.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """
+        The stop function cancels the background task.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_up(self, name: str) -> bool | None:
+        """
+        The is_up function tells whether the last run of a check passed and is still fresh.
+
+        :param self: Represent the instance of the class
+        :param name: str: Name of the check
+        :return: True or False, or None if there is no fresh result
+        """
+        result = self.results.get(name)
+        if result is None or time.monotonic() - result.checked_at > self.stale_after:
+            return None
+        return result.ok
+
+    def readiness(self) -> tuple[bool, dict]:
+        """
+        The readiness function builds the readiness report from the stored results.
+
+        :param self: Represent the instance of the class
+        :return: Whether the service is ready and the report with every check and its latency
+        """
+        now = time.monotonic()
+        ready = all(self.is_up(name) for name in self.required)
+        degraded = not all(self.is_up(name) for name in self.checks)
+        if not self.results:
+            state = "starting"
+        else:
+            state = "unavailable" if not ready else "degraded" if degraded else "ok"
+        return ready, {"status": state,
+                       "checks": {name: dict(result.as_dict(now), required=name in self.required)
+                                  for name, result in self.results.items()}}
+
+    def liveness(self) -> dict:
+        """
+        The liveness function reports that the process is serving requests. It never looks at dependencies,
+        so a failing database does not get healthy workers restarted.
+
+        :param self: Represent the instance of the class
+        :return: The liveness report
+        """
+        return {"status": "ok", "uptime_s": round(time.monotonic() - self.started_at, 1)}
+
+
+async def check_database() -> None:
+    async with get_engine().connect() as conn:
+        await conn.execute(text('SELECT 1'))
+
+
+_redis = None
+
+
+async def check_redis() -> None:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0,
+                             socket_connect_timeout=settings.health_timeout, socket_timeout=settings.health_timeout)
+    await _redis.ping()
+
+
+def default_checks() -> Dict[str, Check]:
+    """
+    The default_checks function selects the checks of the dependencies the settings actually use.
+
+    :return: The checks by name
+    """
+    checks = {"database": check_database}
+    if settings.rate_limit_redis or settings.user_cache_redis:
+        checks["redis"] = check_redis
+    return checks
+
+
+health_prober = HealthProber(default_checks(), required=settings.health_required,
+                             interval=settings.health_interval, timeout=settings.health_timeout,
+                             stale_after=settings.health_interval * 3 + settings.health_timeout)
@@ -0,0 +1,256 @@
+import asyncio
+import random
+from collections import deque
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Sequence, TYPE_CHECKING
+
+from src.conf.config import settings
+
+if TYPE_CHECKING:
+    import aiosmtplib
+    from jinja2 import Environment
+
+# aiosmtplib and jinja2 are imported on first use: the API process only enqueues emails,
+# sending and rendering happen in the outbox worker
+TEMPLATE_FOLDER = Path(__file__).parent / 'templates'
+
+
+@lru_cache
+def _environment() -> 'Environment':
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    return Environment(loader=FileSystemLoader(TEMPLATE_FOLDER), autoescape=select_autoescape())
+
+
+def render_template(name: str, context: dict) -> str:
+    """
+    The render_template function renders one of the email templates with jinja2.
+
+    :param name: str: File name of the template in the templates folder
+    :param context: dict: Values available in the template
+    :return: The rendered text
+    """
+    return _environment().get_template(name).render(**context)
+
+
+def build_message(sender: str, recipient: str, subject: str, html: str) -> EmailMessage:
+    """
+    The build_message function builds an HTML email for a single recipient.
+
+    :param sender: str: The From header
+    :param recipient: str: Email address of the recipient
+    :param subject: str: The subject line
+    :param html: str: The HTML body
+    :return: An EmailMessage ready to send
+    """
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = recipient
+    message['Subject'] = subject
+    message.set_content(html, subtype='html')
+    return message
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    The is_transient function tells whether sending may succeed if retried later:
+    dropped connections, timeouts and 4xx replies are transient, 5xx replies are permanent.
+
+    :param error: Exception: The error raised while sending
+    :return: True if the message should be retried
+    """
+    import aiosmtplib
+
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return 400 <= error.code < 500
+    return isinstance(error, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                              aiosmtplib.SMTPTimeoutError, asyncio.TimeoutError, OSError))
+
+
+class _Connection:
+    __slots__ = ('smtp', 'sent')
+
+    def __init__(self, smtp: 'aiosmtplib.SMTP'):
+        self.smtp = smtp
+        self.sent = 0
+
+
+class SMTPPool:
+    """
+    Keeps up to size authenticated SMTP sessions open and hands them out one at a time,
+    so consecutive messages skip the TCP, TLS and AUTH handshakes.
+    A session is closed after max_messages messages and discarded after any error.
+    """
+
+    def __init__(self, hostname: str, port: int, username: str | None, password: str | None, use_tls: bool,
+                 start_tls: bool, size: int, max_messages: int, timeout: float):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.size = size
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.opened = 0
+        self.reused = 0
+        self._idle = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> _Connection:
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(hostname=self.hostname, port=self.port, username=self.username,
+                               password=self.password, use_tls=self.use_tls, start_tls=self.start_tls,
+                               timeout=self.timeout)
+        await smtp.connect()
+        self.opened += 1
+        return _Connection(smtp)
+
+    @staticmethod
+    async def _quit(connection: _Connection) -> None:
+        import aiosmtplib
+
+        try:
+            await connection.smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        The connection function lends an open session, waiting while all size sessions are busy.
+        The session goes back to the pool when the block ends, unless the block raised.
+
+        :param self: Represent the instance of the class
+        :return: An async context manager yielding the session
+        """
+        async with self._semaphore:
+            connection = None
+            while self._idle and connection is None:
+                candidate = self._idle.pop()
+                if candidate.smtp.is_connected:
+                    connection = candidate
+                    self.reused += 1
+            if connection is None:
+                connection = await self._connect()
+            try:
+                yield connection
+            except BaseException:
+                connection.smtp.close()
+                raise
+            if connection.smtp.is_connected and connection.sent < self.max_messages:
+                self._idle.append(connection)
+            else:
+                await self._quit(connection)
+
+    async def close(self) -> None:
+        """
+        The close function ends the idle sessions.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._quit(connection)
+
+
+class Mailer:
+    """
+    Long-lived mail sender on top of an SMTPPool.
+    A batch is split into chunks of batch_size messages; every chunk is sent over one reused session,
+    and the chunks run concurrently up to the size of the pool. Transient failures are retried
+    with exponential backoff, so a dropped session only delays the messages that were still queued on it.
+    """
+
+    def __init__(self, pool: SMTPPool, batch_size: int, retries: int, backoff: float):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def _delay(self, attempt: int) -> float:
+        return self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1)
+
+    async def _send_chunk(self, messages: Sequence[EmailMessage]) -> List[Exception | None]:
+        import aiosmtplib
+
+        results = [None] * len(messages)
+        attempts = [0] * len(messages)
+        queue = deque(range(len(messages)))
+        while queue:
+            try:
+                async with self.pool.connection() as connection:
+                    while queue and connection.sent < self.pool.max_messages:
+                        await connection.smtp.send_message(messages[queue[0]])
+                        connection.sent += 1
+                        self.sent += 1
+                        queue.popleft()
+            except Exception as error:
+                if not isinstance(error, (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError)):
+                    raise
+                index = queue[0]
+                attempts[index] += 1
+                if is_transient(error) and attempts[index] <= self.retries:
+                    self.retried += 1
+                    await asyncio.sleep(self._delay(attempts[index]))
+                else:
+                    self.failed += 1
+                    results[index] = error
+                    queue.popleft()
+        return results
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        The send function delivers one message, retrying transient failures.
+
+        :param self: Represent the instance of the class
+        :param message: EmailMessage: The message to send
+        :return: None
+        """
+        error = (await self._send_chunk([message]))[0]
+        if error is not None:
+            raise error
+
+    async def send_batch(self, messages: Sequence[EmailMessage]) -> List[Exception | None]:
+        """
+        The send_batch function delivers many messages over pooled sessions.
+        One failed message does not stop the others.
+
+        :param self: Represent the instance of the class
+        :param messages: Sequence[EmailMessage]: The messages to send
+        :return: For every message, None if it was sent or the error that made it fail
+        """
+        chunks = [messages[i:i + self.batch_size] for i in range(0, len(messages), self.batch_size)]
+        results = await asyncio.gather(*(self._send_chunk(chunk) for chunk in chunks))
+        return [result for chunk in results for result in chunk]
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    def stats(self) -> dict:
+        """
+        The stats function reports the messages sent, failed and retried and how often sessions were reused.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary of statistics
+        """
+        return {"sent": self.sent, "failed": self.failed, "retried": self.retried,
+                "connections_opened": self.pool.opened, "connections_reused": self.pool.reused,
+                "idle": len(self.pool._idle)}
+
+
+mailer = Mailer(SMTPPool(hostname=settings.mail_server, port=settings.mail_port, username=settings.mail_username,
+                         password=settings.mail_password, use_tls=settings.mail_ssl_tls,
+                         start_tls=settings.mail_starttls, size=settings.mail_pool_size,
+                         max_messages=settings.mail_max_messages_per_connection, timeout=settings.mail_timeout),
+                batch_size=settings.mail_batch_size, retries=settings.mail_retries,
+                backoff=settings.mail_retry_backoff)
@@ -0,0 +1,298 @@
+import bisect
+import json
+import operator
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from src.conf.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = '<unmatched>'
+
+# Type and help text of every metric; names missing here are exposed as untyped
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by method, route template and status code"),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by method and route template"),
+    "db_pool_size": ("gauge", "Configured size of the database connection pool"),
+    "db_pool_checked_out": ("gauge", "Database connections currently checked out"),
+    "db_pool_overflow": ("gauge", "Overflow connections currently open"),
+    "db_pool_checkouts_total": ("counter", "Connections checked out by requests"),
+    "db_pool_checkout_timeouts_total": ("counter", "Requests that could not get a connection in time"),
+    "db_pool_wait_seconds_max": ("gauge", "Longest wait for a pooled connection"),
+    "db_queries_total": ("counter", "Statements executed by instrumented requests"),
+    "db_slow_queries_total": ("counter", "Statements slower than db_slow_query_ms"),
+    "db_n_plus_one_total": ("counter", "Requests that repeated a statement shape n_plus_one_threshold times"),
+    "cache_size": ("gauge", "Entries held by the cache"),
+    "cache_hits_total": ("counter", "Cache lookups answered by the cache"),
+    "cache_misses_total": ("counter", "Cache lookups that missed"),
+    "cache_evictions_total": ("counter", "Entries evicted from the cache"),
+    "rate_limit_decisions_total": ("counter", "Rate limit checks by decision"),
+    "rate_limit_lease_hits_total": ("counter", "Rate limit checks answered from leased tokens"),
+    "rate_limit_redis_calls_total": ("counter", "Rate limit calls to Redis"),
+    "rate_limit_redis_errors_total": ("counter", "Rate limit calls to Redis that failed"),
+    "executor_in_flight": ("gauge", "Calls running in the executor"),
+    "executor_queue_depth": ("gauge", "Calls waiting for a worker of the executor"),
+    "executor_completed_total": ("counter", "Calls completed by the executor"),
+    "executor_failed_total": ("counter", "Calls of the executor that raised an exception"),
+    "executor_rejected_total": ("counter", "Calls rejected because the executor was saturated"),
+    "mail_sent_total": ("counter", "Emails delivered to the SMTP server"),
+    "mail_failed_total": ("counter", "Emails given up after retries"),
+    "mail_retried_total": ("counter", "Email delivery attempts retried"),
+    "health_check_up": ("gauge", "1 if the last check of the dependency passed"),
+    "health_check_latency_seconds": ("gauge", "Latency of the last check of the dependency"),
+    "email_outbox_messages": ("gauge", "Emails in the outbox by status"),
+}
+
+# How the gauges of several workers are combined; the others measure a share of the service and are added up.
+# Every worker probes the dependencies on its own, so a check is up only while it is up in all of them.
+GAUGE_MERGE = {
+    "health_check_up": min,
+    "health_check_latency_seconds": max,
+    "db_pool_wait_seconds_max": max,
+}
+
+Sample = Tuple[str, str, str, float]
+
+
+def labels(**values) -> str:
+    """
+    The labels function renders a Prometheus label set, e.g. method="GET",route="/contacts/".
+
+    :param values: Label names and values
+    :return: The labels without the surrounding braces
+    """
+    return ','.join(f'{name}="{_escape(str(value))}"' for name, value in values.items())
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Each bucket counts only its own observations; they are made cumulative
+    when the histogram is rendered, so observe is one bisect and two additions.
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        The observe function records one value.
+
+        :param self: Represent the instance of the class
+        :param value: float: The observed value
+        :return: None
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    Metrics of one worker process. Requests are recorded into plain dictionaries without locks:
+    the event loop of a worker is single-threaded, so there is nothing to contend with.
+
+    Subsystem values are read from the collectors only when a snapshot is taken. With a directory set,
+    every worker writes its snapshot to <directory>/<pid>.json every flush_interval seconds and on scrape,
+    and a scrape sums the snapshots of all workers, except the gauges combined as GAUGE_MERGE says.
+    Counters of workers that have exited are kept, so totals never go backwards; their gauges are dropped
+    once the file is older than stale_after seconds.
+    The directory must be emptied before the server starts.
+    """
+
+    def __init__(self, enabled: bool, directory: str | None, flush_interval: float, stale_after: float,
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.stale_after = stale_after
+        self.buckets = buckets
+        self.requests: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._next_flush = 0.0
+
+    def register(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """
+        The register function adds a collector, a callable yielding (kind, name, labels, value) samples
+        where kind is counter or gauge.
+
+        :param self: Represent the instance of the class
+        :param collector: Callable: The collector
+        :return: None
+        """
+        self.collectors.append(collector)
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        """
+        The observe_request function records one finished HTTP request.
+
+        :param self: Represent the instance of the class
+        :param method: str: The HTTP method
+        :param route: str: The path template of the route
+        :param status_code: int: The status code of the response
+        :param seconds: float: How long the request took
+        :return: None
+        """
+        key = labels(method=method, route=route, status=status_code)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        key = labels(method=method, route=route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def snapshot(self) -> dict:
+        """
+        The snapshot function reads the metrics of this worker, including the values of the collectors.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary with counters, gauges and histograms by metric name and labels
+        """
+        counters = {"http_requests_total": dict(self.requests)}
+        gauges = {}
+        for collector in self.collectors:
+            for kind, name, label_set, value in collector():
+                if value is None:
+                    continue
+                (counters if kind == 'counter' else gauges).setdefault(name, {})[label_set] = value
+        histograms = {"http_request_duration_seconds": {key: histogram.counts + [histogram.sum]
+                                                        for key, histogram in self.latency.items()}}
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def flush(self) -> None:
+        """
+        The flush function writes the snapshot of this worker to the metrics directory.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        if self.directory is None:
+            return
+        self._next_flush = time.monotonic() + self.flush_interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{os.getpid()}.json'
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        temporary.replace(path)
+
+    def maybe_flush(self) -> None:
+        """
+        The maybe_flush function flushes the snapshot if flush_interval seconds have passed since the last one.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        if self.directory is not None and time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def collect(self) -> dict:
+        """
+        The collect function returns the metrics of all workers, or of this worker alone without a directory.
+
+        :param self: Represent the instance of the class
+        :return: A snapshot combined over the workers
+        """
+        if self.directory is None:
+            return self.snapshot()
+        self.flush()
+        merged = {"counters": {}, "gauges": {}, "histograms": {}}
+        stale_before = time.time() - self.stale_after
+        for path in self.directory.glob('*.json'):
+            try:
+                snapshot = json.loads(path.read_text())
+                fresh = path.stat().st_mtime >= stale_before
+            except (OSError, ValueError):
+                continue
+            for section in ('counters', 'gauges') if fresh else ('counters',):
+                for name, samples in snapshot[section].items():
+                    target = merged[section].setdefault(name, {})
+                    combine = GAUGE_MERGE.get(name, operator.add) if section == 'gauges' else operator.add
+                    for label_set, value in samples.items():
+                        current = target.get(label_set)
+                        target[label_set] = value if current is None else combine(current, value)
+            for name, samples in snapshot['histograms'].items():
+                target = merged['histograms'].setdefault(name, {})
+                for label_set, values in samples.items():
+                    current = target.get(label_set)
+                    target[label_set] = values if current is None else [a + b for a, b in zip(current, values)]
+        return merged
+
+    def render(self, extra_gauges: Dict[str, Dict[str, float]] | None = None) -> str:
+        """
+        The render function formats the metrics of all workers in the Prometheus text format.
+
+        :param self: Represent the instance of the class
+        :param extra_gauges: dict: Gauges measured once for the whole service, e.g. read from the database
+        :return: The text of the /metrics response
+        """
+        merged = self.collect()
+        gauges = {**merged['gauges'], **(extra_gauges or {})}
+        lines = []
+
+        def header(name, kind):
+            lines.append(f'# HELP {name} {METRICS.get(name, ("", name))[1]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        for kind, section in (('counter', merged['counters']), ('gauge', gauges)):
+            for name in sorted(section):
+                if not section[name]:
+                    continue
+                header(name, METRICS.get(name, (kind,))[0])
+                for label_set, value in sorted(section[name].items()):
+                    lines.append(f'{name}{{{label_set}}} {value}' if label_set else f'{name} {value}')
+        bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+        for name in sorted(merged['histograms']):
+            header(name, 'histogram')
+            for label_set, values in sorted(merged['histograms'][name].items()):
+                prefix = f'{label_set},' if label_set else ''
+                cumulative = 0
+                for bound, count in zip(bounds, values[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label_set}}} {values[-1]}')
+                lines.append(f'{name}_count{{{label_set}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency and status code of every HTTP request by route template.
+    Requests that match no route are counted under <unmatched>, so unknown paths can not create new series.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry | None = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get('route'), 'path', None) or UNMATCHED_ROUTE
+            self.registry.observe_request(scope['method'], route, status_code, time.perf_counter() - started)
+            self.registry.maybe_flush()
+
+
+metrics = MetricsRegistry(enabled=settings.metrics_enabled, directory=settings.metrics_dir,
+                          flush_interval=settings.metrics_flush_interval, stale_after=settings.metrics_stale_after)
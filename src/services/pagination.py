@@ -0,0 +1,34 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(contact_id: int) -> str:
+    """
+    The encode_cursor function turns the id of the last contact on a page into an opaque cursor.
+
+    :param contact_id: int: The id of the last contact returned
+    :return: A url-safe cursor string
+    """
+    raw = json.dumps({"id": contact_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    The decode_cursor function reads the contact id back from a cursor made by encode_cursor.
+    If the cursor is malformed, it raises an HTTPException with status code 400.
+
+    :param cursor: str: The cursor received from the client
+    :return: The id of the last contact of the previous page
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        contact_id = json.loads(raw)["id"]
+        if not isinstance(contact_id, int):
+            raise ValueError(contact_id)
+        return contact_id
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
@@ -0,0 +1,263 @@
+import math
+import time
+
+import redis.asyncio as redis
+from fastapi import Depends, HTTPException, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.cache import LRUCache
+
+# Token bucket kept in a Redis hash. Puts back the ARGV[4] unused tokens of an expired lease, takes up to
+# ARGV[3] tokens at once and returns the number granted together with the seconds until the next token
+# is available. Redis' own clock is used, so all workers agree.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local returned = tonumber(ARGV[4]) or 0
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate + returned)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+local retry_after = 0
+if granted == 0 then retry_after = (1 - tokens) / rate end
+return {granted, tostring(retry_after)}
+"""
+
+
+def parse_limit(limit: str) -> tuple[int, float]:
+    """
+    The parse_limit function reads a limit written as "times/seconds", for example "60/60".
+
+    :param limit: str: The limit from the settings
+    :return: The number of requests and the length of the period in seconds
+    """
+    times, _, seconds = limit.partition('/')
+    times, seconds = int(times), float(seconds)
+    if times <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit: {limit}")
+    return times, seconds
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to capacity tokens and refills at rate tokens per second.
+    """
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        The take function takes one token from the bucket.
+
+        :param self: Represent the instance of the class
+        :param now: float: The current monotonic time
+        :return: 0 if a token was taken, otherwise the seconds until the next token is available
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class Lease:
+    """
+    Tokens taken from the shared Redis bucket in advance and spent by this worker without asking Redis again.
+    A lease with no tokens left marks a key that Redis refused until expires_at.
+    """
+
+    __slots__ = ('tokens', 'expires_at')
+
+    def __init__(self, tokens: int, expires_at: float):
+        self.tokens = tokens
+        self.expires_at = expires_at
+
+
+class RateLimiter:
+    """
+    Per-user rate limits for groups of routes ("scopes"), each configured as "times/seconds" and
+    multiplied by the tier of the user.
+
+    With Redis enabled, every scope and user shares one token bucket across all workers, updated atomically
+    by a Lua script. To keep Redis off the hot path a worker leases a slice of the bucket at once and
+    serves the following requests from the lease; a refusal is remembered locally until the next token is due.
+    The tokens left in a lease when it expires are put back into the shared bucket by the next call to Redis
+    for that key, so a client that sends fewer requests than a lease holds is only charged for what it used.
+    If Redis can not be reached, the limiter falls back to in-process buckets, so every worker then
+    enforces the limit on its own, and tries Redis again after redis_retry seconds.
+    """
+
+    KEY_PREFIX = 'contacts:rate:'
+
+    def __init__(self, enabled: bool, scopes: dict, tiers: dict, user_tiers: dict, use_redis: bool,
+                 lease_fraction: float, lease_ttl: float, redis_retry: float, local_size: int):
+        self.enabled = enabled
+        self.scopes = {scope: parse_limit(limit) for scope, limit in scopes.items()}
+        self.tiers = tiers
+        self.user_tiers = user_tiers
+        self.use_redis = use_redis
+        self.lease_fraction = lease_fraction
+        self.lease_ttl = lease_ttl
+        self.redis_retry = redis_retry
+        self.buckets = LRUCache(local_size)
+        self.leases = LRUCache(local_size)
+        self.allowed = 0
+        self.rejected = 0
+        self.lease_hits = 0
+        self.redis_calls = 0
+        self.redis_errors = 0
+        self._redis_down_until = 0.0
+        self._redis = None
+        self._script = None
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0,
+                                      socket_connect_timeout=0.25, socket_timeout=0.25)
+            self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._redis
+
+    def limit_for(self, scope: str, user: User) -> tuple[int, float]:
+        """
+        The limit_for function returns the limit of the scope for the user, scaled by the user's tier.
+
+        :param self: Represent the instance of the class
+        :param scope: str: Name of the group of routes
+        :param user: User: The authenticated user
+        :return: The capacity of the bucket and its refill rate in tokens per second
+        """
+        times, seconds = self.scopes[scope]
+        multiplier = self.tiers.get(self.user_tiers.get(user.email, 'default'), 1)
+        capacity = max(1, int(times * multiplier))
+        return capacity, capacity / seconds
+
+    def _reject(self, retry_after: float):
+        self.rejected += 1
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests",
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    def _take_local(self, key: str, capacity: int, rate: float, now: float) -> float:
+        bucket = self.buckets.get(key)
+        if bucket is None or bucket.capacity != capacity:
+            bucket = TokenBucket(capacity, rate, now)
+            self.buckets.set(key, bucket)
+        return bucket.take(now)
+
+    async def _take_redis(self, key: str, capacity: int, rate: float, now: float) -> float | None:
+        lease = self.leases.get(key)
+        if lease is not None and lease.expires_at > now:
+            if lease.tokens == 0:
+                return lease.expires_at - now
+            lease.tokens -= 1
+            if lease.tokens == 0:
+                self.leases.delete(key)
+            self.lease_hits += 1
+            return 0
+        requested = max(1, int(capacity * self.lease_fraction))
+        returned = lease.tokens if lease is not None else 0
+        try:
+            self._client()
+            self.redis_calls += 1
+            granted, retry_after = await self._script(keys=[self.KEY_PREFIX + key],
+                                                      args=[capacity, rate, requested, returned])
+        except (RedisError, OSError):
+            self.redis_errors += 1
+            self._redis_down_until = now + self.redis_retry
+            return None
+        granted, retry_after = int(granted), float(retry_after)
+        if granted == 0:
+            self.leases.set(key, Lease(0, now + retry_after))
+            return retry_after
+        if granted > 1:
+            self.leases.set(key, Lease(granted - 1, now + self.lease_ttl))
+        else:
+            self.leases.delete(key)
+        return 0
+
+    async def check(self, scope: str, user: User) -> None:
+        """
+        The check function counts a request of the user against the limit of the scope.
+        If the limit is exhausted, it raises an HTTPException with status code 429 and a Retry-After header.
+
+        :param self: Represent the instance of the class
+        :param scope: str: Name of the group of routes
+        :param user: User: The authenticated user
+        :return: None
+        """
+        if not self.enabled:
+            return
+        capacity, rate = self.limit_for(scope, user)
+        key = f'{scope}:{user.id}'
+        now = time.monotonic()
+        retry_after = None
+        if self.use_redis and now >= self._redis_down_until:
+            retry_after = await self._take_redis(key, capacity, rate, now)
+        if retry_after is None:
+            retry_after = self._take_local(key, capacity, rate, now)
+        if retry_after > 0:
+            self._reject(retry_after)
+        self.allowed += 1
+
+    def reset(self) -> None:
+        """
+        The reset function forgets the local buckets and leases of this worker.
+
+        :param self: Represent the instance of the class
+        :return: None
+        """
+        self.buckets.clear()
+        self.leases.clear()
+        self._redis_down_until = 0.0
+
+    def stats(self) -> dict:
+        """
+        The stats function reports the allowed and rejected requests and how many checks needed Redis.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary of statistics
+        """
+        return {"enabled": self.enabled, "redis": self.use_redis,
+                "redis_available": self.use_redis and time.monotonic() >= self._redis_down_until,
+                "allowed": self.allowed, "rejected": self.rejected, "lease_hits": self.lease_hits,
+                "redis_calls": self.redis_calls, "redis_errors": self.redis_errors,
+                "local_buckets": len(self.buckets)}
+
+
+rate_limiter = RateLimiter(enabled=settings.rate_limit_enabled, scopes=settings.rate_limits,
+                           tiers=settings.rate_limit_tiers, user_tiers=settings.rate_limit_user_tiers,
+                           use_redis=settings.rate_limit_redis, lease_fraction=settings.rate_limit_lease_fraction,
+                           lease_ttl=settings.rate_limit_lease_ttl, redis_retry=settings.rate_limit_redis_retry,
+                           local_size=settings.rate_limit_local_size)
+
+
+def rate_limit(scope: str):
+    """
+    The rate_limit function returns a dependency that applies the limit of the scope to the current user.
+
+    :param scope: str: Name of the group of routes, a key of the rate_limits setting
+    :return: A dependency for Depends
+    """
+    if scope not in rate_limiter.scopes:
+        raise ValueError(f"Unknown rate limit scope: {scope}")
+
+    async def check_rate_limit(current_user: User = Depends(auth_service.get_current_user)) -> None:
+        await rate_limiter.check(scope, current_user)
+
+    return check_rate_limit
@@ -0,0 +1,283 @@
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.database.models import Contact
+
+FIELDS = ('name', 'surname', 'email', 'phone')
+ROW_COLUMNS = ('id',) + FIELDS + ('birthday',)
+GRAM = 3
+
+
+def trigrams(text: str) -> set:
+    """
+    The trigrams function returns the set of three character substrings of a lowercased text.
+
+    :param text: str: Text to split, already lowercased
+    :return: A set of trigrams
+    """
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class UserSearchIndex:
+    """
+    Trigram postings over the name, surname, email and phone of one user's contacts.
+    Every posting list is an array of contact ids kept sorted, so lookups intersect compact arrays.
+    """
+
+    __slots__ = ('rows', 'texts', 'postings', 'nbytes')
+
+    def __init__(self):
+        self.rows = {}
+        self.texts = {}
+        self.postings = {}
+        self.nbytes = sys.getsizeof(self.rows) + sys.getsizeof(self.texts) + sys.getsizeof(self.postings)
+
+    def _grams(self, contact_id: int) -> set:
+        grams = set()
+        for text in self.texts[contact_id]:
+            grams |= trigrams(text)
+        return grams
+
+    def add(self, row: tuple) -> None:
+        """
+        The add function indexes a contact row, replacing the previous version of that contact.
+
+        :param self: Represent the instance of the class
+        :param row: tuple: Contact values in ROW_COLUMNS order
+        :return: None
+        """
+        contact_id = row[0]
+        if contact_id in self.rows:
+            self.remove(contact_id)
+        self.rows[contact_id] = row
+        self.texts[contact_id] = tuple((value or '').lower() for value in row[1:1 + len(FIELDS)])
+        grams = self._grams(contact_id)
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+                self.nbytes += 64 + sys.getsizeof(gram)
+            posting.insert(bisect_left(posting, contact_id), contact_id)
+        self.nbytes += self._row_size(contact_id) + len(grams) * 4
+
+    def remove(self, contact_id: int) -> None:
+        """
+        The remove function drops a contact from the postings, if it is indexed.
+
+        :param self: Represent the instance of the class
+        :param contact_id: int: Id of the contact to remove
+        :return: None
+        """
+        if contact_id not in self.rows:
+            return
+        grams = self._grams(contact_id)
+        for gram in grams:
+            posting = self.postings[gram]
+            del posting[bisect_left(posting, contact_id)]
+            if not posting:
+                del self.postings[gram]
+                self.nbytes -= 64 + sys.getsizeof(gram)
+        self.nbytes -= self._row_size(contact_id) + len(grams) * 4
+        del self.rows[contact_id]
+        del self.texts[contact_id]
+
+    def _row_size(self, contact_id: int) -> int:
+        return 200 + sum(len(text) * 2 for text in self.texts[contact_id])
+
+    def search(self, term: str, limit: int) -> list:
+        """
+        The search function returns the rows whose fields contain the term, case-insensitively.
+        The posting lists of the term's trigrams are intersected from the shortest one, and the few
+        remaining candidates are checked against the field texts. Contacts with a field starting with
+        the term come first, then the rest in id order.
+
+        :param self: Represent the instance of the class
+        :param term: str: Substring to search for
+        :param limit: int: Maximum number of rows returned
+        :return: A list of contact rows
+        """
+        term = term.lower()
+        if len(term) >= GRAM:
+            postings = []
+            for gram in trigrams(term):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return []
+            candidates = sorted(candidates)
+        else:
+            candidates = sorted(self.rows)
+
+        prefix, other = [], []
+        for contact_id in candidates:
+            texts = self.texts[contact_id]
+            if any(text.startswith(term) for text in texts):
+                prefix.append(contact_id)
+                if len(prefix) >= limit:
+                    break
+            elif any(term in text for text in texts):
+                other.append(contact_id)
+        return [self.rows[contact_id] for contact_id in (prefix + other)[:limit]]
+
+
+class ContactSearchIndex:
+    """
+    In-process search engine answering search_everywhere_contacts for users whose index is warm.
+    A user's index is built on the first search, kept up to date by the contact write paths and
+    evicted in least recently used order once the memory budget is exceeded.
+    The index only sees writes made by this process, so with several workers it is meant
+    for deployments that route a user to the same worker.
+    """
+
+    def __init__(self, enabled: bool, memory_budget: int):
+        self.enabled = enabled
+        self.memory_budget = memory_budget
+        self._users = OrderedDict()
+        # writes seen per user while a build of their index is in flight, with the number of such builds
+        self._generations = {}
+        self._builders = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def _row(self, contact: Contact) -> tuple:
+        return tuple(getattr(contact, column) for column in ROW_COLUMNS)
+
+    def _touch(self, user_id: int) -> None:
+        if user_id in self._generations:
+            self._generations[user_id] += 1
+
+    def _drop(self, user_id: int) -> None:
+        index = self._users.pop(user_id, None)
+        if index is not None:
+            self.nbytes -= index.nbytes
+
+    async def _build(self, user_id: int, db: AsyncSession) -> UserSearchIndex | None:
+        generation = self._generations.setdefault(user_id, 0)
+        self._builders[user_id] = self._builders.get(user_id, 0) + 1
+        try:
+            columns = [getattr(Contact, column) for column in ROW_COLUMNS]
+            result = await db.execute(select(*columns).where(Contact.user_id == user_id))
+            index = UserSearchIndex()
+            for row in result:
+                index.add(tuple(row))
+            if self._generations[user_id] != generation:
+                # a contact of this user changed while the rows were loading, the snapshot may be stale
+                return None
+        finally:
+            self._builders[user_id] -= 1
+            if not self._builders[user_id]:
+                del self._builders[user_id]
+                del self._generations[user_id]
+        self.builds += 1
+        self._drop(user_id)
+        self._users[user_id] = index
+        self.nbytes += index.nbytes
+        self._evict(keep=user_id)
+        return index
+
+    def _evict(self, keep: int) -> None:
+        while self.nbytes > self.memory_budget and len(self._users) > 1:
+            user_id = next(iter(self._users))
+            if user_id == keep:
+                self._users.move_to_end(user_id)
+                continue
+            self._drop(user_id)
+            self.evictions += 1
+
+    async def search(self, user_id: int, term: str, limit: int, db: AsyncSession) -> list | None:
+        """
+        The search function answers a search from the user's index, building the index if it is cold.
+        It returns None when the index is disabled or could not be built consistently,
+        in which case the caller queries the database.
+
+        :param self: Represent the instance of the class
+        :param user_id: int: Id of the user whose contacts are searched
+        :param term: str: Substring to search for
+        :param limit: int: Maximum number of contacts returned
+        :param db: AsyncSession: Session used to build a cold index
+        :return: A list of detached Contact objects, or None
+        """
+        if not self.enabled:
+            return None
+        index = self._users.get(user_id)
+        if index is None:
+            index = await self._build(user_id, db)
+            if index is None:
+                return None
+        else:
+            self.hits += 1
+            self._users.move_to_end(user_id)
+        return [Contact(**dict(zip(ROW_COLUMNS, row)), user_id=user_id) for row in index.search(term, limit)]
+
+    def upsert(self, user_id: int, contact: Contact) -> None:
+        """
+        The upsert function applies a created or updated contact to the user's index, if it is warm.
+
+        :param self: Represent the instance of the class
+        :param user_id: int: Id of the contact owner
+        :param contact: Contact: The contact as stored in the database
+        :return: None
+        """
+        self._touch(user_id)
+        index = self._users.get(user_id)
+        if index is not None:
+            before = index.nbytes
+            index.add(self._row(contact))
+            self.nbytes += index.nbytes - before
+            self._evict(keep=user_id)
+
+    def remove(self, user_id: int, contact_id: int) -> None:
+        """
+        The remove function drops a deleted contact from the user's index, if it is warm.
+
+        :param self: Represent the instance of the class
+        :param user_id: int: Id of the contact owner
+        :param contact_id: int: Id of the deleted contact
+        :return: None
+        """
+        self._touch(user_id)
+        index = self._users.get(user_id)
+        if index is not None:
+            before = index.nbytes
+            index.remove(contact_id)
+            self.nbytes += index.nbytes - before
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        The invalidate function forgets the user's index, so that the next search rebuilds it.
+
+        :param self: Represent the instance of the class
+        :param user_id: int: Id of the user
+        :return: None
+        """
+        self._touch(user_id)
+        self._drop(user_id)
+
+    def stats(self) -> dict:
+        """
+        The stats function reports the number of warm users, memory use and hit, build and eviction counters.
+
+        :param self: Represent the instance of the class
+        :return: A dictionary of statistics
+        """
+        return {"enabled": self.enabled, "users": len(self._users), "bytes": self.nbytes,
+                "memory_budget": self.memory_budget, "hits": self.hits, "builds": self.builds,
+                "evictions": self.evictions}
+
+
+search_index = ContactSearchIndex(enabled=settings.search_index_enabled,
+                                  memory_budget=settings.search_index_memory_budget)
@@ -0,0 +1,32 @@
+from typing import Iterable, List
+
+from fastapi.responses import ORJSONResponse
+
+from src.database.models import Contact
+from src.schemas import ContactResponseModel
+
+CONTACT_FIELDS = tuple(ContactResponseModel.__fields__)
+
+
+def encode_contacts(contacts: Iterable[Contact]) -> List[dict]:
+    """
+    The encode_contacts function turns contacts loaded from the database into plain dictionaries
+    with the fields of ContactResponseModel. The values were validated when they were written,
+    so they are copied as they are instead of being validated again.
+
+    :param contacts: Iterable[Contact]: Contacts to encode
+    :return: A list of dictionaries
+    """
+    return [{field: getattr(contact, field) for field in CONTACT_FIELDS} for contact in contacts]
+
+
+def fast_response(content, headers: dict | None = None) -> ORJSONResponse:
+    """
+    The fast_response function renders already encoded content with orjson,
+    bypassing the response_model validation and jsonable_encoder pass of FastAPI.
+
+    :param content: Dictionaries, lists, dates and scalars to render
+    :param headers: dict | None: Extra response headers
+    :return: An ORJSONResponse
+    """
+    return ORJSONResponse(content, headers=headers)
@@ -0,0 +1,118 @@
+"""
+Email outbox worker: delivers the emails that the API queued in the email_outbox table.
+
+Run one or more workers next to the API processes::
+
+    python -m src.workers.email_outbox
+    python -m src.workers.email_outbox --once    # drain the outbox and exit
+"""
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.conf.config import settings
+from src.database.db import get_session_factory
+from src.repository.outbox import claim_emails, complete_emails
+from src.services.email import outbox_message
+from src.services.mailer import Mailer, mailer
+
+logger = logging.getLogger(__name__)
+MAX_ERROR_BACKOFF = 60
+
+
+class EmailOutboxWorker:
+    """
+    Claims due emails in batches, sends them over the pooled mailer and records the outcome.
+    The claim and the outcome are separate short transactions, so no database connection is held
+    while the SMTP server is talking.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, sender: Mailer, batch_size: int,
+                 visibility_timeout: float, max_attempts: int, retry_backoff: float, poll_interval: float,
+                 error_backoff: float = 1):
+        self.session_factory = session_factory
+        self.sender = sender
+        self.batch_size = batch_size
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.error_backoff = error_backoff
+
+    async def process_batch(self) -> int:
+        """
+        The process_batch function delivers one batch of due emails.
+        An email that can not even be built, e.g. of an unknown kind, is failed without being sent.
+
+        :param self: Represent the instance of the class
+        :return: The number of emails claimed
+        """
+        async with self.session_factory() as db:
+            emails = await claim_emails(self.batch_size, self.visibility_timeout, self.max_attempts, db)
+        if not emails:
+            return 0
+        errors = [None] * len(emails)
+        messages = {}
+        for position, email in enumerate(emails):
+            try:
+                messages[position] = outbox_message(email.kind, email.recipient, email.payload)
+            except (KeyError, TypeError, ValueError) as err:
+                errors[position] = err
+        results = await self.sender.send_batch(list(messages.values()))
+        for position, error in zip(messages, results):
+            errors[position] = error
+        async with self.session_factory() as db:
+            await complete_emails(emails, errors, self.max_attempts, self.retry_backoff, db)
+        return len(emails)
+
+    async def run(self, once: bool = False) -> None:
+        """
+        The run function keeps processing batches, sleeping poll_interval seconds whenever the outbox is drained.
+        A batch that fails, e.g. because the database is unreachable, is logged and tried again after
+        error_backoff seconds, doubled for every further failure in a row up to MAX_ERROR_BACKOFF;
+        emails it had claimed come due again after the visibility timeout. With once the error is raised.
+
+        :param self: Represent the instance of the class
+        :param once: bool: Stop as soon as the outbox has no due emails
+        :return: None
+        """
+        failures = 0
+        try:
+            while True:
+                try:
+                    processed = await self.process_batch()
+                except Exception:
+                    if once:
+                        raise
+                    failures += 1
+                    delay = min(self.error_backoff * 2 ** (failures - 1), MAX_ERROR_BACKOFF)
+                    logger.exception("Email outbox batch failed, retrying in %.1f s", delay)
+                    await asyncio.sleep(delay)
+                    continue
+                failures = 0
+                if processed < self.batch_size:
+                    if once:
+                        return
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            await self.sender.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help='drain the outbox and exit')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    worker = EmailOutboxWorker(get_session_factory(), mailer, batch_size=settings.outbox_batch_size,
+                               visibility_timeout=settings.outbox_visibility_timeout,
+                               max_attempts=settings.outbox_max_attempts,
+                               retry_backoff=settings.outbox_retry_backoff,
+                               poll_interval=settings.outbox_poll_interval,
+                               error_backoff=settings.outbox_error_backoff)
+    asyncio.run(worker.run(once=args.once))
+
+
+if __name__ == '__main__':
+    main()
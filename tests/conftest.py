@@ -1,21 +1,53 @@
+import unittest
+from contextlib import contextmanager
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
 
 from main import app
-from src.database.models import Base
+from src.database.models import Base, User
 from src.database.db import get_db
+from src.database.instrumentation import db_instrumentation
+from src.services.auth import auth_service
+from src.services.cache import user_cache
+from src.services.rate_limit import rate_limiter
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs every request in its own event loop, so the async engine must not keep pooled connections
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession,
+                                              autoflush=False, expire_on_commit=False)
+
+
+class InMemoryDatabaseTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Base of the unit tests that need a database: every test gets a fresh in-memory SQLite database
+    with all tables, the session factory bound to it as self.sessions and one open session as self.session.
+    """
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.sessions = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.session = self.sessions()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+
 
 @pytest.fixture(scope="module")
 def session():
@@ -23,6 +55,8 @@ def session():
 
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    user_cache.local.clear()
+    rate_limiter.reset()
 
     db = TestingSessionLocal()
     try:
@@ -35,11 +69,9 @@ def session():
 def client(session):
     # Dependency override
 
-    def override_get_db():
-        try:
-            yield session
-        finally:
-            session.close()
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
 
@@ -48,4 +80,46 @@ def client(session):
 
 @pytest.fixture(scope="module")
 def user():
-    return {"username": "deadpool", "email": "deadpool@example.com", "password": "123456789"}
\ No newline at end of file
+    return {"username": "deadpool", "email": "deadpool@example.com", "password": "123456789"}
+
+
+@pytest.fixture(scope="module")
+def token(client, session, user):
+    current_user = session.query(User).filter(User.email == user.get('email')).first()
+    if current_user is None:
+        current_user = User(username=user.get('username'), email=user.get('email'),
+                            password=auth_service.pwd_context.hash(user.get('password')))
+        session.add(current_user)
+    current_user.confirmed = True
+    session.commit()
+    response = client.post(
+        "/api/auth/login",
+        data={"username": user.get('email'), "password": user.get('password')},
+    )
+    return response.json()["access_token"]
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Asserts that every request made inside the with block executes at most max_queries statements:
+
+        with query_budget(3):
+            client.get("/contacts/", headers=headers)
+    """
+
+    @contextmanager
+    def budget(max_queries: int):
+        finished = []
+        listener = finished.append
+        db_instrumentation.listeners.append(listener)
+        try:
+            yield finished
+        finally:
+            db_instrumentation.listeners.remove(listener)
+        assert finished, "No instrumented request was made"
+        for stats in finished:
+            assert stats.queries <= max_queries, \
+                f"{stats.route} executed {stats.queries} statements, budget is {max_queries}: {dict(stats.shapes)}"
+
+    return budget
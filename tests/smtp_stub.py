@@ -0,0 +1,64 @@
+"""
+Minimal SMTP server standing in for the mail relay in the tests.
+
+It speaks just enough plain-text ESMTP for aiosmtplib without authentication (EHLO, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT), keeps the received messages in memory and can inject failures: temporary 421 replies to MAIL FROM,
+or closing the connection after a number of messages.
+"""
+import asyncio
+
+
+class SMTPStub:
+
+    def __init__(self, max_messages_per_connection: int | None = None):
+        self.max_messages_per_connection = max_messages_per_connection
+        self.fail_next = 0
+        self.messages = []
+        self.connections = 0
+        self.port = None
+        self._server = None
+
+    async def start(self) -> 'SMTPStub':
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        sent = 0
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b'\r\n')
+            await writer.drain()
+
+        await reply('220 stub ESMTP')
+        try:
+            while line := await reader.readline():
+                command = line.decode().strip().upper()
+                if command.startswith(('EHLO', 'HELO')):
+                    await reply('250-stub\r\n250 8BITMIME')
+                elif command.startswith('MAIL') and self.fail_next > 0:
+                    self.fail_next -= 1
+                    await reply('421 4.3.2 Service not available, try again later')
+                elif command.startswith(('MAIL', 'RCPT')) or command in ('RSET', 'NOOP'):
+                    await reply('250 OK')
+                elif command == 'DATA':
+                    await reply('354 End data with <CR><LF>.<CR><LF>')
+                    self.messages.append((await reader.readuntil(b'\r\n.\r\n'))[:-5])
+                    sent += 1
+                    await reply('250 OK queued')
+                    if self.max_messages_per_connection and sent >= self.max_messages_per_connection:
+                        break
+                elif command == 'QUIT':
+                    await reply('221 Bye')
+                    break
+                else:
+                    await reply('502 Command not implemented')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,46 @@
+import pytest
+
+from src.conf.config import settings
+from src.services.rate_limit import rate_limiter
+
+
+@pytest.fixture
+def admin(monkeypatch, user):
+    monkeypatch.setattr(settings, "admin_emails", [user["email"]])
+
+
+def test_read_pool_stats(client, token, admin):
+    response = client.get("/api/admin/pool", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["checkout_timeouts"] == 0
+    assert "checked_out" in data
+    assert "overflow" in data
+    assert "wait_max_ms" in data
+
+
+def test_read_pool_stats_unauthorized(client):
+    response = client.get("/api/admin/pool")
+    assert response.status_code == 401, response.text
+
+
+@pytest.mark.parametrize("path", ["pool", "search-index", "caches", "executors", "rate-limit"])
+def test_admin_endpoints_forbidden(client, token, path):
+    response = client.get(f"/api/admin/{path}", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403, response.text
+
+
+def test_rate_limit(client, token, admin, monkeypatch):
+    monkeypatch.setitem(rate_limiter.scopes, "birthdays", (2, 60))
+    rate_limiter.reset()
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(2):
+        assert client.get("/birthdays/", headers=headers).status_code == 200
+    response = client.get("/birthdays/", headers=headers)
+    assert response.status_code == 429, response.text
+    assert int(response.headers["Retry-After"]) >= 1
+
+    response = client.get("/api/admin/rate-limit", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["rejected"] >= 1
+    rate_limiter.reset()
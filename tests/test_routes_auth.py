@@ -1,11 +1,7 @@
-from unittest.mock import MagicMock
+from src.database.models import User, EmailOutbox
 
-from src.database.models import User
 
-
-def test_create_user(client, user, monkeypatch):
-    mock_send_email = MagicMock()
-    monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
+def test_create_user(client, session, user):
     response = client.post(
         "/api/auth/signup",
         json=user,
@@ -14,6 +10,8 @@ def test_create_user(client, user, monkeypatch):
     data = response.json()
     assert data["user"]["email"] == user.get("email")
     assert "id" in data["user"]
+    email = session.query(EmailOutbox).filter(EmailOutbox.recipient == user.get("email")).one()
+    assert (email.kind, email.status, email.payload["username"]) == ("confirm_email", "pending", user.get("username"))
 
 
 def test_repeat_create_user(client, user):
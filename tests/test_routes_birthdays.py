@@ -0,0 +1,36 @@
+from datetime import date
+
+from src.database.models import Contact, User
+
+
+def test_birthdays_window(client, session, user, token):
+    owner = session.query(User).filter(User.email == user.get('email')).first()
+    session.add_all([
+        Contact(name='Mykola', surname='Last', email='mykola@mail.com', phone='1', birthday=date(1990, 1, 2),
+                user_id=owner.id),
+        Contact(name='Nina', surname='First', email='nina@mail.com', phone='2', birthday=date(1985, 12, 30),
+                user_id=owner.id),
+        Contact(name='Leap', surname='Day', email='leap@mail.com', phone='3', birthday=date(2000, 2, 29),
+                user_id=owner.id),
+    ])
+    session.commit()
+
+    response = client.get("/birthdays/", params={"from": "2026-12-28", "days": 7},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert [c["name"] for c in response.json()] == ["Nina", "Mykola"]
+
+
+def test_birthdays_calendar(client, token):
+    response = client.get("/birthdays/calendar", params={"from": "2027-01-01", "to": "2027-12-31"},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [day["date"] for day in data] == ["2027-01-02", "2027-02-28", "2027-12-30"]
+    assert [c["name"] for c in data[1]["contacts"]] == ["Leap"]
+
+
+def test_birthdays_invalid_window(client, token):
+    response = client.get("/birthdays/", params={"from": "2027-01-10", "to": "2027-01-01"},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400, response.text
@@ -0,0 +1,138 @@
+from datetime import datetime
+
+from src.database.models import Contact, User
+from src.services.etag import make_etag, etag_matches
+
+CONTACT = {"name": "Etag", "surname": "Contact", "email": "etag@mail.com", "phone": "+380501234000",
+           "birthday": "1990-05-01"}
+
+
+def test_etag_matches():
+    etag = make_etag('contact', 1, datetime(2023, 5, 1))
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag, f'"other", {etag.removeprefix("W/")}')
+    assert etag_matches(etag, '*')
+    assert not etag_matches(etag, None)
+    assert not etag_matches(etag, make_etag('contact', 1, datetime(2023, 5, 2)))
+
+
+def test_read_contact_not_modified(client, session, user, token):
+    owner = session.query(User).filter(User.email == user.get('email')).first()
+    # CURRENT_TIMESTAMP has a resolution of one second on SQLite, start from an older version
+    contact = Contact(**dict(CONTACT, birthday=datetime(1990, 5, 1).date()), user_id=owner.id,
+                      updated_at=datetime(2020, 1, 1))
+    session.add(contact)
+    session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get(f"/contacts/{contact.id}", headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/contacts/{contact.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304, response.text
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    response = client.put(f"/contacts/update/{contact.id}", json={**CONTACT, "surname": "Changed"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    response = client.get(f"/contacts/{contact.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] != etag
+    assert response.json()["surname"] == "Changed"
+
+
+def test_read_contact_missing_with_etag(client, token):
+    response = client.get("/contacts/999999", headers={"Authorization": f"Bearer {token}", "If-None-Match": "*"})
+    assert response.status_code == 404, response.text
+
+
+def test_read_contacts_not_modified(client, session, user, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/contacts/", params={"limit": 5}, headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+
+    response = client.get("/contacts/", params={"limit": 5}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304, response.text
+
+    response = client.get("/contacts/", params={"limit": 6}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200, response.text
+
+    owner = session.query(User).filter(User.email == user.get('email')).first()
+    session.add(Contact(name="New", surname="One", email="etag-new@mail.com", phone="+380501234001",
+                        birthday=datetime(1991, 1, 1).date(), user_id=owner.id))
+    session.commit()
+    response = client.get("/contacts/", params={"limit": 5}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200, response.text
+
+    # CURRENT_TIMESTAMP has a resolution of one second on SQLite, start from an older version
+    contact_id = response.json()["items"][0]["id"]
+    session.query(Contact).filter(Contact.id == contact_id).update({"updated_at": datetime(2020, 1, 1)})
+    session.commit()
+    etag = client.get("/contacts/", params={"limit": 5}, headers=headers).headers["ETag"]
+    assert client.patch(f"/contacts/update/{contact_id}", json={"surname": "Changed"}, headers=headers).status_code == 200
+    response = client.get("/contacts/", params={"limit": 5}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200, response.text
+
+
+def test_read_contacts_page(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/contacts/", params={"limit": 1}, headers=headers)
+    assert response.status_code == 200, response.text
+    first = response.json()
+    assert len(first["items"]) == 1 and first["next_cursor"]
+
+    response = client.get("/contacts/", params={"limit": 1, "after": first["next_cursor"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["items"][0]["id"] > first["items"][0]["id"]
+
+    response = client.get("/contacts/", params={"limit": 501}, headers=headers)
+    assert response.status_code == 422, response.text
+
+
+def test_patch_contact(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post("/contacts/", json={**CONTACT, "email": "patch@mail.com", "phone": "+380501234002"},
+                           headers=headers)
+    assert response.status_code == 200, response.text
+    contact_id = response.json()["id"]
+
+    response = client.patch(f"/contacts/update/{contact_id}", json={"phone": "+380501234003"}, headers=headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["phone"], data["surname"], data["email"]) == ("+380501234003", "Contact", "patch@mail.com")
+
+    response = client.patch("/contacts/update/999999", json={"phone": "1"}, headers=headers)
+    assert response.status_code == 404, response.text
+
+    for field in ("name", "surname", "email", "phone", "birthday"):
+        response = client.patch(f"/contacts/update/{contact_id}", json={field: None}, headers=headers)
+        assert response.status_code == 422, response.text
+    assert client.get("/contacts/", headers=headers).status_code == 200
+    assert client.get(f"/contacts/{contact_id}", headers=headers).json()["phone"] == "+380501234003"
+
+
+def test_server_timing(client, token):
+    response = client.get("/contacts/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    db, app = response.headers["Server-Timing"].split(", ")
+    assert db.startswith("db;dur=") and db.endswith(' queries"')
+    assert app.startswith("app;dur=")
+
+
+def test_query_budgets(client, token, query_budget):
+    headers = {"Authorization": f"Bearer {token}"}
+    with query_budget(1):
+        response = client.get("/contacts/", params={"limit": 50}, headers=headers)
+        assert response.status_code == 200
+    with query_budget(1):
+        assert client.get("/contacts/", params={"limit": 50},
+                          headers={**headers, "If-None-Match": response.headers["ETag"]}).status_code == 304
+    with query_budget(2):
+        body = {**CONTACT, "email": "budget@mail.com", "phone": "+380501234010"}
+        assert client.post("/contacts/", json=body, headers=headers).status_code == 200
+    with query_budget(3):
+        assert client.get("/contacts/search/", params={"parameter": "Etag"}, headers=headers).status_code == 200
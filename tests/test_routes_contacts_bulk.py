@@ -0,0 +1,138 @@
+import json
+
+from src.database.models import Contact
+from src.services.rate_limit import rate_limiter
+
+
+def ndjson(*rows):
+    return "\n".join(json.dumps(row) for row in rows).encode()
+
+
+def contact(i, **overrides):
+    row = {"name": f"Name{i}", "surname": f"Surname{i}", "email": f"contact{i}@mail.com",
+           "phone": f"+38050{i:07d}", "birthday": "1990-05-17"}
+    row.update(overrides)
+    return row
+
+
+def test_import_ndjson_in_batches(client, session, token):
+    body = ndjson(*(contact(i) for i in range(5)), {"name": "broken"}) + b"\nnot json\n"
+    response = client.post("/contacts/import", params={"batch_size": 2}, content=body,
+                           headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["processed"], data["imported"], data["skipped"], data["failed"]) == (7, 5, 0, 2)
+    assert [error["line"] for error in data["errors"]] == [6, 7]
+    stored = session.query(Contact).filter(Contact.email == "contact3@mail.com").first()
+    assert stored.birthday_mmdd == 517
+
+
+def test_import_line_too_long(client, token, monkeypatch):
+    monkeypatch.setattr("src.routes.contacts_bulk.settings.import_max_line_bytes", 200)
+    body = ndjson(contact(100, name="Ольга")) + b"\n" + b"x" * 1000
+    response = client.post("/contacts/import", content=body,
+                           headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 413, response.text
+    assert response.json()["detail"] == "Line 2 is longer than 200 bytes"
+
+
+def test_import_invalid_utf8(client, token):
+    body = json.dumps(contact(101, name="Тарас"), ensure_ascii=False).encode("cp1251") + b"\n" + ndjson(contact(102))
+    response = client.post("/contacts/import", content=body,
+                           headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["processed"], data["imported"], data["failed"]) == (2, 1, 1)
+    assert data["errors"][0]["line"] == 1
+    assert data["errors"][0]["error"].startswith("Invalid UTF-8")
+
+
+def test_import_csv_skip_conflicts(client, token):
+    body = ("name,surname,email,phone,birthday\r\n"
+            "Name1,Again,contact1@mail.com,+380999999999,1990-01-01\r\n"
+            "New,Person,new@mail.com,+380888888888,1991-02-03\r\n"
+            "Dup,Person,new@mail.com,+380777777777,1991-02-03\r\n").encode()
+    response = client.post("/contacts/import", params={"format": "csv"}, content=body,
+                           headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["imported"], data["skipped"]) == (1, 2)
+    assert [error["line"] for error in data["errors"]] == [2, 4]
+
+
+def test_import_upsert(client, session, token):
+    body = ndjson(contact(2, surname="Updated"), contact(9))
+    response = client.post("/contacts/import", params={"on_conflict": "upsert"}, content=body,
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 2
+    session.expire_all()
+    assert session.query(Contact).filter(Contact.email == "contact2@mail.com").first().surname == "Updated"
+
+
+def test_export_ndjson(client, token):
+    response = client.get("/contacts/export", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert {"id", "name", "surname", "email", "phone", "birthday"} == set(rows[0])
+    assert "contact2@mail.com" in {row["email"] for row in rows}
+
+
+def test_export_csv(client, token):
+    response = client.get("/contacts/export", params={"format": "csv"},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    lines = response.text.splitlines()
+    assert lines[0] == "id,name,surname,email,phone,birthday"
+    assert any(line.endswith(",1990-05-17") for line in lines[1:])
+
+
+def contact_ids(session, *emails):
+    return [session.query(Contact).filter(Contact.email == email).first().id for email in emails]
+
+
+def test_batch_get(client, session, token):
+    first, second = contact_ids(session, "contact0@mail.com", "contact1@mail.com")
+    response = client.post("/contacts/batch/get", json={"ids": [first, 999999, second, first]},
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [(r["id"], r["status"]) for r in results] == [(first, "ok"), (999999, "not_found"), (second, "ok")]
+    assert results[0]["contact"]["email"] == "contact0@mail.com"
+
+
+def test_batch_update(client, session, token):
+    first, second, third = contact_ids(session, "contact0@mail.com", "contact1@mail.com", "contact3@mail.com")
+    response = client.put("/contacts/batch/update", json={"items": [
+        {"id": first, "surname": "Batch", "birthday": "1990-12-31"},
+        {"id": second, "phone": "+380508888888"},
+        {"id": third, "phone": "+380508888888"},
+        {"id": 999999, "name": "Ghost"},
+    ]}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    statuses = [r["status"] for r in response.json()["results"]]
+    assert statuses == ["updated", "updated", "conflict", "not_found"]
+    session.expire_all()
+    updated = session.get(Contact, first)
+    assert (updated.surname, updated.name, updated.birthday_mmdd) == ("Batch", "Name0", 1231)
+
+
+def test_batch_delete(client, session, token):
+    first, second = contact_ids(session, "contact0@mail.com", "contact1@mail.com")
+    response = client.post("/contacts/batch/delete", json={"ids": [first, second, 999999]},
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "deleted", "not_found"]
+    session.expire_all()
+    assert session.get(Contact, first) is None
+
+
+def test_batch_too_large(client, token, monkeypatch):
+    monkeypatch.setattr("src.routes.contacts_bulk.settings.batch_max_items", 2)
+    # the module already spent the contacts_bulk allowance of the rate limiter
+    rate_limiter.reset()
+    response = client.post("/contacts/batch/get", json={"ids": [1, 2, 3]},
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 422, response.text
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from src.services.health import health_prober
+
+
+async def passing():
+    pass
+
+
+async def failing():
+    raise ConnectionRefusedError("Connection refused")
+
+
+@pytest.fixture
+def checks(monkeypatch):
+    monkeypatch.setattr(health_prober, "checks", {})
+    monkeypatch.setattr(health_prober, "results", {})
+    monkeypatch.setattr(health_prober, "required", {"database"})
+    return health_prober.checks
+
+
+def test_liveness(client):
+    response = client.get("/api/health/live")
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "ok"
+
+
+def test_readiness(client, checks):
+    assert client.get("/api/health/ready").json()["status"] == "starting"
+
+    checks.update(database=passing, redis=failing)
+    asyncio.run(health_prober.run_once())
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "degraded"
+    assert set(response.json()["checks"]) == {"database", "redis"}
+    assert client.get("/api/healthchecker").status_code == 200
+    assert 'health_check_up{check="redis"} 0' in client.get("/metrics").text
+
+    checks.update(database=failing)
+    asyncio.run(health_prober.run_once())
+    response = client.get("/api/health/ready")
+    assert response.status_code == 503, response.text
+    assert response.json()["checks"]["database"]["status"] == "error"
+    assert client.get("/api/healthchecker").status_code == 500
@@ -0,0 +1,34 @@
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+
+
+def session_factory(url):
+    return async_sessionmaker(bind=create_async_engine(url, poolclass=NullPool), class_=AsyncSession)
+
+
+def test_metrics(client, token, monkeypatch):
+    factory = session_factory("sqlite+aiosqlite:///./test.db")
+    monkeypatch.setattr("src.routes.metrics.get_session_factory", lambda: factory)
+    response = client.get("/contacts/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    client.get("/contacts/not-a-route/at/all")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/contacts/",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/contacts/",le="+Inf"}' in text
+    assert 'rate_limit_decisions_total{decision="allowed"}' in text
+    assert 'executor_queue_depth{executor="password_hash"}' in text
+    assert 'email_outbox_messages{status="pending"}' in text
+
+
+def test_metrics_without_database(client, monkeypatch):
+    factory = session_factory("sqlite+aiosqlite:////nonexistent/directory/contacts.db")
+    monkeypatch.setattr("src.routes.metrics.get_session_factory", lambda: factory)
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+    assert "http_requests_total" in response.text
+    assert "email_outbox_messages" not in response.text
@@ -0,0 +1,41 @@
+from datetime import date
+
+import pytest
+
+from src.database.models import Contact, User
+from src.services.serialization import encode_contacts, CONTACT_FIELDS
+
+
+def test_encode_contacts():
+    contact = Contact(id=1, name='Olga', surname='P', email='olga@mail.com', phone='+380501111111',
+                      birthday=date(1990, 5, 1), user_id=7)
+    assert CONTACT_FIELDS == ('id', 'name', 'surname', 'email', 'phone', 'birthday')
+    assert encode_contacts([contact]) == [{'id': 1, 'name': 'Olga', 'surname': 'P', 'email': 'olga@mail.com',
+                                           'phone': '+380501111111', 'birthday': date(1990, 5, 1)}]
+
+
+@pytest.fixture()
+def contacts(session, user):
+    owner = session.query(User).filter(User.email == user.get('email')).first()
+    if session.query(Contact).filter(Contact.email == 'fast0@mail.com').first() is None:
+        session.add_all([Contact(name=f'Fast{i}', surname='Path', email=f'fast{i}@mail.com', phone=f'+38050777000{i}',
+                                 birthday=date(1990, i + 1, 10), user_id=owner.id) for i in range(3)])
+        session.commit()
+
+
+@pytest.mark.parametrize("url, params", [
+    ("/contacts/search/", {"parameter": "mail"}),
+    ("/contacts/search/filter", {"email": "mail"}),
+    ("/birthdays/", {"from": "2027-01-01", "days": 366}),
+    ("/birthdays/calendar", {"from": "2027-01-01", "days": 366}),
+])
+def test_fast_serialization_matches(client, token, contacts, monkeypatch, url, params):
+    headers = {"Authorization": f"Bearer {token}"}
+    expected = client.get(url, params=params, headers=headers)
+    assert expected.status_code == 200, expected.text
+    assert expected.json()
+
+    monkeypatch.setattr("src.conf.config.settings.fast_serialization", True)
+    response = client.get(url, params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == expected.json()
@@ -0,0 +1,32 @@
+from src.services.avatar import LocalAvatarStorage, avatar_pipeline, avatar_upload_executor
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def test_update_avatar(client, token, monkeypatch, tmp_path):
+    monkeypatch.setattr(avatar_pipeline, "storage", LocalAvatarStorage(avatar_upload_executor, str(tmp_path), "/media"))
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.png", PNG, "image/png")}, headers=headers)
+    assert response.status_code == 200, response.text
+    avatar = response.json()["avatar"]
+    assert avatar.startswith("/media/")
+    assert (tmp_path / avatar.removeprefix("/media/")).exists()
+    assert client.get("/api/users/me/", headers=headers).json()["avatar"] == avatar
+
+
+def test_update_avatar_too_large(client, token, monkeypatch):
+    monkeypatch.setattr(avatar_pipeline, "max_bytes", 16)
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.png", PNG, "image/png")},
+                            headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 413, response.text
+
+
+def test_update_avatar_too_large_is_refused_before_reading(client, token, monkeypatch):
+    async def receive_upload(*args):
+        raise AssertionError("the body should not be received")
+
+    monkeypatch.setattr(avatar_pipeline, "max_bytes", 16)
+    monkeypatch.setattr("src.services.avatar.receive_upload", receive_upload)
+    response = client.patch("/api/users/avatar", files={"file": ("avatar.png", PNG * 1024, "image/png")},
+                            headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 413, response.text
@@ -0,0 +1,48 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from collections import Counter
+from datetime import date
+
+from benchmarks.datagen import contact_rows, generate
+from benchmarks.load import run, summarize
+from src.database.models import birthday_mmdd
+
+
+class TestDatagen(unittest.TestCase):
+
+    def test_contact_rows(self):
+        rows = list(contact_rows(5000, 50, seed=3, today=date(2024, 6, 1)))
+        self.assertEqual(rows, list(contact_rows(5000, 50, seed=3, today=date(2024, 6, 1))))
+        self.assertEqual(len({row[3] for row in rows}), 5000)
+        self.assertEqual(len({row[4] for row in rows}), 5000)
+        self.assertTrue(all(row[6] == birthday_mmdd(row[5]) for row in rows))
+        self.assertTrue(all(1 <= row[7] <= 50 for row in rows))
+        ages = sorted(2024 - row[5].year for row in rows)
+        self.assertTrue(25 <= ages[len(ages) // 2] <= 50)
+        names = Counter(row[1] for row in rows).most_common()
+        self.assertGreater(names[0][1], 5 * names[-1][1])
+
+
+class TestLoad(unittest.TestCase):
+
+    def test_summarize(self):
+        summary = summarize([i / 1000 for i in range(1, 101)], 2.0, Counter({200: 99, 500: 1}))
+        self.assertEqual((summary["requests"], summary["errors"], summary["throughput_rps"]), (100, 1, 50.0))
+        self.assertEqual((summary["p50_ms"], summary["p99_ms"], summary["max_ms"]), (50.5, 99.01, 100.0))
+        self.assertEqual(summary["status"], {"200": 99, "500": 1})
+
+    def test_scenarios_run_against_generated_data(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f'sqlite+aiosqlite:///{os.path.join(tmp, "load.db")}'
+            asyncio.run(generate(url, users=5, contacts=500))
+            results = asyncio.run(run(url, ['contacts_page', 'search', 'birthdays_week'], requests=10,
+                                      concurrency=2, active_users=3, users=5, seed=1))
+        for name, summary in results.items():
+            self.assertEqual(summary["requests"], 10, name)
+            self.assertEqual(summary["status"], {"200": 10}, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.database import db
+
+
+class TestGetDb(unittest.IsolatedAsyncioTestCase):
+
+    async def test_unreachable_database(self):
+        engine = create_async_engine('sqlite+aiosqlite:////nonexistent/directory/contacts.db')
+        factory = async_sessionmaker(bind=engine, class_=AsyncSession)
+        with patch.object(db, '_session_factory', factory):
+            with self.assertRaises(HTTPException) as raised:
+                await anext(db.get_db())
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(raised.exception.detail, "Database unavailable")
+        await engine.dispose()
+
+    async def test_connection_checked_out(self):
+        engine = create_async_engine('sqlite+aiosqlite://')
+        factory = async_sessionmaker(bind=engine, class_=AsyncSession)
+        with patch.object(db, '_session_factory', factory):
+            sessions = db.get_db()
+            session = await anext(sessions)
+            self.assertTrue(session.in_transaction())
+            await sessions.aclose()
+        await engine.dispose()
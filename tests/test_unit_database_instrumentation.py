@@ -0,0 +1,73 @@
+import unittest
+
+from sqlalchemy import select, text
+
+from src.database.instrumentation import DBInstrumentation, QueryStats, statement_shape
+from conftest import InMemoryDatabaseTestCase
+from src.database.models import Contact
+
+
+class TestStatementShape(unittest.TestCase):
+
+    def test_literals_and_placeholder_lists(self):
+        self.assertEqual(statement_shape("SELECT * FROM contacts WHERE id = 7 AND name = 'O''Neil'"),
+                         "SELECT * FROM contacts WHERE id = ? AND name = ?")
+        self.assertEqual(statement_shape("SELECT *\n  FROM contacts WHERE id IN (?, ?, ?)"),
+                         statement_shape("SELECT * FROM contacts WHERE id IN (?, ?)"))
+        self.assertEqual(statement_shape("SELECT contacts_1.id FROM contacts AS contacts_1 WHERE id IN ($1::INTEGER, $2::INTEGER)"),
+                         "SELECT contacts_1.id FROM contacts AS contacts_1 WHERE id IN (?)")
+
+    def test_route_name(self):
+        self.assertEqual(QueryStats({"method": "GET", "path": "/contacts/5"}).route, "GET /contacts/5")
+        self.assertEqual(QueryStats().route, "-")
+
+
+class TestDBInstrumentation(InMemoryDatabaseTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.instrumentation = DBInstrumentation(enabled=True, slow_query_ms=10_000, n_plus_one_threshold=3)
+        self.instrumentation.install()
+
+    async def test_counts_statements_of_the_tracked_block(self):
+        finished = []
+        self.instrumentation.listeners.append(finished.append)
+        await self.session.execute(text("SELECT 1"))
+        with self.instrumentation.track({"method": "GET", "path": "/contacts/"}) as stats:
+            await self.session.execute(select(Contact))
+            await self.session.execute(text("SELECT 2"))
+        await self.session.execute(text("SELECT 3"))
+        self.assertEqual(stats.queries, 2)
+        self.assertGreater(stats.duration, 0)
+        self.assertEqual(finished, [stats])
+        self.assertEqual(self.instrumentation.stats()["queries"], 2)
+
+    async def test_logs_repeated_statements(self):
+        with self.assertLogs('src.database.instrumentation', level='WARNING') as logs:
+            with self.instrumentation.track({"method": "GET", "path": "/contacts/"}) as stats:
+                for contact_id in range(4):
+                    await self.session.execute(text(f"SELECT * FROM contacts WHERE id = {contact_id}"))
+        self.assertEqual(stats.repeated(3), [("SELECT * FROM contacts WHERE id = ?", 4)])
+        self.assertEqual(self.instrumentation.n_plus_one, 1)
+        self.assertIn("Possible N+1 in GET /contacts/: 4 x", logs.output[0])
+
+    async def test_logs_slow_queries(self):
+        self.instrumentation.slow_query_ms = 0
+        with self.assertLogs('src.database.instrumentation', level='WARNING') as logs:
+            with self.instrumentation.track({"method": "GET", "path": "/contacts/"}) as stats:
+                await self.session.execute(text("SELECT 1"))
+        self.assertEqual(stats.slow, 1)
+        self.assertIn("Slow query", logs.output[0])
+        self.assertIn("GET /contacts/", logs.output[0])
+
+    async def test_failed_statement_does_not_leak_timers(self):
+        with self.instrumentation.track() as stats:
+            with self.assertRaises(Exception):
+                await self.session.execute(text("SELECT * FROM missing"))
+            await self.session.rollback()
+            await self.session.execute(text("SELECT 1"))
+        self.assertEqual(stats.queries, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
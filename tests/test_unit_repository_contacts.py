@@ -1,6 +1,6 @@
 import unittest
-from unittest.mock import MagicMock
-from sqlalchemy.orm import Session
+from unittest.mock import MagicMock, AsyncMock
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import User, Contact
 from src.schemas import ContactInputModel
 from src.repository.contacts import (
@@ -19,7 +19,9 @@ from src.repository.contacts import (
 class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = AsyncMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         self.user = User(id=1)
 
 
@@ -29,31 +31,60 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
                                  email="test@email.com",
                                  phone="111222333",
                                  birthday='1990-01-01')
+        self.session.get_bind.return_value.dialect.insert_returning = False
 
         result = await post_contact(body=body, user=self.user, db=self.session)
         self.assertEqual(result.name, body.name)
         self.assertEqual(result.surname, body.surname)
         self.assertEqual(result.email, body.email)
         self.assertTrue(hasattr(result, "id"))
+        self.session.refresh.assert_awaited_once()
+
+
+    async def test_post_contact_returning(self):
+        body = ContactInputModel(name="Test",
+                                 surname="Surname",
+                                 email="test@email.com",
+                                 phone="111222333",
+                                 birthday='1990-01-01')
+        contact = Contact(id=1, name="Test")
+        self.result.scalar_one.return_value = contact
+
+        result = await post_contact(body=body, user=self.user, db=self.session)
+        self.assertEqual(result, contact)
+        statement = str(self.session.execute.call_args.args[0])
+        self.assertIn("RETURNING", statement)
+        self.session.refresh.assert_not_awaited()
 
 
     async def test_get_contacts(self):
         contacts = [Contact(), ]
-        self.session.query().filter().offset().limit().all.return_value = contacts
+        self.result.scalars().all.return_value = contacts
         result = await get_contacts(skip=0, limit=10, user=self.user, db=self.session)
         self.assertEqual(result, contacts)
         self.assertListEqual(result, contacts)
 
 
+    async def test_get_contacts_after_cursor(self):
+        contacts = [Contact(id=11), Contact(id=12)]
+        self.result.scalars().all.return_value = contacts
+        result = await get_contacts(skip=0, limit=10, user=self.user, db=self.session, after=10)
+        self.assertEqual(result, contacts)
+        statement = str(self.session.execute.call_args.args[0])
+        self.assertIn("contacts.id >", statement)
+        self.assertIn("ORDER BY contacts.user_id, contacts.id", statement)
+        self.assertNotIn("OFFSET", statement)
+
+
     async def test_get_contact(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalars().first.return_value = contact
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, contact)
 
 
     async def test_get_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars().first.return_value = None
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
@@ -65,7 +96,7 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
                                  email="test@email.com",
                                  phone="111222333",
                                  birthday='1990-01-01')
-        self.session.query().filter().first.return_value = contact
+        self.result.scalar_one_or_none.return_value = contact
         self.session.commit.return_value = None
         result = await put_contact(contact_id=1, body=body, user=self.user, db=self.session)
         self.assertEqual(result, contact)
@@ -77,7 +108,7 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
                                  email="test@email.com",
                                  phone="111222333",
                                  birthday='1990-01-01')
-        self.session.query().filter().first.return_value = None
+        self.result.scalar_one_or_none.return_value = None
         self.session.commit.return_value = None
         result = await put_contact(contact_id=1, body=body, user=self.user, db=self.session)
         self.assertIsNone(result)
@@ -85,7 +116,7 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     async def test_delete_contact(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalar_one_or_none.return_value = contact
         result = await delete_contact(contact_id=1,
                                       user=self.user,
                                       db=self.session)
@@ -93,7 +124,7 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
 
     async def test_delete_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalar_one_or_none.return_value = None
 
         result = await delete_contact(contact_id=1,
                                       user=self.user,
@@ -104,7 +135,7 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     async def test_search_everywhere_contacts(self):
         contacts = [Contact(), Contact()]
-        self.session.query().filter().filter().all.return_value = contacts
+        self.result.scalars().all.return_value = contacts
 
         result = await search_everywhere_contacts(parameter='test',
                                                   user=self.user,
@@ -115,7 +146,7 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     async def test_filter_contacts(self):
         contact = [Contact(), Contact()]
-        self.session.query().filter().all.return_value = contact
+        self.result.scalars().all.return_value = contact
 
         result = await filter_contacts(name='Test',
                                        surname='Test',
@@ -128,7 +159,7 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     async def test_get_birthdays_week(self):
         contacts = []
-        self.session.query().filter().all.return_value = contacts
+        self.result.scalars().all.return_value = contacts
 
         result = await get_birthdays_week(user=self.user,
                                           db=self.session)
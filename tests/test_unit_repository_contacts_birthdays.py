@@ -0,0 +1,51 @@
+import unittest
+from datetime import date
+
+from conftest import InMemoryDatabaseTestCase
+from src.database.models import User, Contact
+from src.repository.contacts import get_birthdays
+
+
+class TestBirthdays(InMemoryDatabaseTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = User(id=1, email='owner@example.com', password='secret')
+        birthdays = [date(1990, 12, 30), date(1985, 1, 2), date(2000, 2, 29), date(1970, 3, 1), date(1999, 7, 15)]
+        self.session.add(self.user)
+        self.session.add_all([Contact(name=f'Name{i}', email=f'c{i}@mail.com', phone=str(i), birthday=birthday,
+                                      user_id=1) for i, birthday in enumerate(birthdays)])
+        self.session.add(Contact(name='Other', email='other@mail.com', phone='99', birthday=date(1990, 12, 31),
+                                 user_id=None))
+        await self.session.commit()
+
+    async def test_window_wraps_new_year(self):
+        result = await get_birthdays(self.user, self.session, date(2026, 12, 28), date(2027, 1, 3))
+        self.assertEqual([c.birthday for c in result], [date(1990, 12, 30), date(1985, 1, 2)])
+
+    async def test_window_across_month_includes_leap_day(self):
+        result = await get_birthdays(self.user, self.session, date(2027, 2, 25), date(2027, 3, 3))
+        self.assertEqual([c.birthday for c in result], [date(2000, 2, 29), date(1970, 3, 1)])
+
+    async def test_leap_day_celebrated_on_feb_28_in_common_years(self):
+        result = await get_birthdays(self.user, self.session, date(2027, 2, 22), date(2027, 2, 28))
+        self.assertEqual([c.birthday for c in result], [date(2000, 2, 29)])
+        result = await get_birthdays(self.user, self.session, date(2028, 2, 22), date(2028, 2, 28))
+        self.assertEqual(result, [])
+        result = await get_birthdays(self.user, self.session, date(2026, 12, 20), date(2027, 2, 28))
+        self.assertEqual([c.birthday for c in result], [date(1990, 12, 30), date(1985, 1, 2), date(2000, 2, 29)])
+
+    async def test_whole_year_sorted_from_start(self):
+        result = await get_birthdays(self.user, self.session, date(2026, 7, 1), date(2027, 6, 30))
+        self.assertEqual([c.birthday.month for c in result], [7, 12, 1, 2, 3])
+
+    async def test_birthday_mmdd_follows_updates(self):
+        contact = (await get_birthdays(self.user, self.session, date(2026, 7, 15), date(2026, 7, 15)))[0]
+        contact.birthday = date(1999, 8, 1)
+        await self.session.commit()
+        self.assertEqual(contact.birthday_mmdd, 801)
+        self.assertEqual(await get_birthdays(self.user, self.session, date(2026, 7, 15), date(2026, 7, 15)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from datetime import date
+
+from conftest import InMemoryDatabaseTestCase
+from src.database.models import User, Contact
+from src.repository.contacts import search_everywhere_contacts, filter_contacts
+
+
+class TestContactsSearch(InMemoryDatabaseTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = User(id=1, email='owner@example.com', password='secret')
+        other = User(id=2, email='other@example.com', password='secret')
+        self.session.add_all([
+            self.user, other,
+            Contact(name='Olga', surname='Pasichnyuk', email='olga@example.com', phone='380501',
+                    birthday=date(1990, 1, 1), user_id=1),
+            Contact(name='Oleg', surname='Olgin', email='oleg@mail.com', phone='380502',
+                    birthday=date(1990, 1, 1), user_id=1),
+            Contact(name='Ivan', surname='Petrenko', email='ivan@mail.com', phone='380503',
+                    birthday=date(1990, 1, 1), user_id=1),
+            Contact(name='Olga', surname='Stranger', email='olga@other.com', phone='380504',
+                    birthday=date(1990, 1, 1), user_id=2),
+        ])
+        await self.session.commit()
+
+    async def test_search_uses_substring_and_owner(self):
+        result = await search_everywhere_contacts(parameter='OLG', user=self.user, db=self.session)
+        self.assertEqual({c.surname for c in result}, {'Pasichnyuk', 'Olgin'})
+
+    async def test_search_sees_updates(self):
+        contact = (await search_everywhere_contacts(parameter='Petrenko', user=self.user, db=self.session))[0]
+        contact.surname = 'Shevchenko'
+        await self.session.commit()
+        self.assertEqual(await search_everywhere_contacts(parameter='Petrenko', user=self.user, db=self.session), [])
+        result = await search_everywhere_contacts(parameter='chenko', user=self.user, db=self.session)
+        self.assertEqual([c.name for c in result], ['Ivan'])
+
+    async def test_search_short_term_and_limit(self):
+        result = await search_everywhere_contacts(parameter='ol', user=self.user, db=self.session, limit=1)
+        self.assertEqual(len(result), 1)
+
+    async def test_search_escapes_fts_syntax(self):
+        result = await search_everywhere_contacts(parameter='"ol* OR', user=self.user, db=self.session)
+        self.assertEqual(result, [])
+
+    async def test_filter_contacts(self):
+        result = await filter_contacts(name='ol', surname='olgin', email='', user=self.user, db=self.session)
+        self.assertEqual([c.name for c in result], ['Oleg'])
+
+
+if __name__ == '__main__':
+    unittest.main()
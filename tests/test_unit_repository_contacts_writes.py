@@ -0,0 +1,71 @@
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from conftest import InMemoryDatabaseTestCase
+from src.database.models import User, Contact
+from src.repository.contacts import post_contact, put_contact, patch_contact, delete_contact, get_contact, \
+    _insert_statement, MAX_INSERT_BATCH_SIZE
+from src.schemas import ContactInputModel, ContactPatchModel
+
+
+class TestContactWrites(InMemoryDatabaseTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = User(id=1, email='owner@example.com', password='secret')
+        other = User(id=2, email='other@example.com', password='secret')
+        self.contact = Contact(name='Olga', surname='Pasichnyuk', email='olga@example.com', phone='380501',
+                               birthday=date(1990, 1, 1), user_id=1)
+        self.foreign = Contact(name='Ivan', surname='Stranger', email='ivan@other.com', phone='380502',
+                               birthday=date(1990, 1, 1), user_id=2)
+        self.session.add_all([self.user, other, self.contact, self.foreign])
+        await self.session.commit()
+        self.statements = []
+        event.listen(self.engine.sync_engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.split()[0].upper())
+
+    async def test_post_contact_single_insert(self):
+        body = ContactInputModel(name='New', surname='Contact', email='new@example.com', phone='380503',
+                                 birthday='1995-12-31')
+        contact = await post_contact(body, self.user, self.session)
+        self.assertEqual(self.statements, ['INSERT'])
+        self.assertIsNotNone(contact.id)
+        self.assertIsNotNone(contact.created_at)
+        self.assertEqual(contact.birthday_mmdd, 1231)
+
+    async def test_put_contact_single_update(self):
+        body = ContactInputModel(name='Olha', surname='P', email='olha@example.com', phone='380509',
+                                 birthday='1991-02-03')
+        contact = await put_contact(self.contact.id, body, self.user, self.session)
+        self.assertEqual(self.statements, ['UPDATE'])
+        self.assertEqual((contact.name, contact.email, contact.birthday_mmdd), ('Olha', 'olha@example.com', 203))
+
+    async def test_patch_contact_sets_only_sent_columns(self):
+        contact = await patch_contact(self.contact.id, ContactPatchModel(surname='Changed'), self.user, self.session)
+        self.assertEqual(self.statements, ['UPDATE'])
+        self.assertEqual((contact.name, contact.surname), ('Olga', 'Changed'))
+
+    async def test_update_other_users_contact(self):
+        contact = await patch_contact(self.foreign.id, ContactPatchModel(surname='Mine'), self.user, self.session)
+        self.assertIsNone(contact)
+        self.assertEqual(self.statements, ['UPDATE'])
+
+    async def test_delete_contact_single_delete(self):
+        contact = await delete_contact(self.contact.id, self.user, self.session)
+        self.assertEqual(self.statements, ['DELETE'])
+        self.assertEqual(contact.email, 'olga@example.com')
+        self.assertIsNone(await get_contact(self.contact.id, self.user, self.session))
+
+    async def test_delete_other_users_contact(self):
+        self.assertIsNone(await delete_contact(self.foreign.id, self.user, self.session))
+        self.assertEqual(self.statements, ['DELETE'])
+
+    def test_largest_import_batch_fits_one_statement(self):
+        row = ContactInputModel(name='New', surname='Contact', email='new@example.com', phone='380503',
+                                birthday='1995-12-31').dict()
+        stmt = _insert_statement([row] * MAX_INSERT_BATCH_SIZE, self.user, 'postgresql', 'upsert')
+        self.assertLessEqual(len(stmt.compile(dialect=postgresql.dialect()).params), 32767)
@@ -1,7 +1,7 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
 from src.schemas import UserModel
@@ -13,11 +13,13 @@ from src.repository.users import (
 class TestUsers(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = AsyncMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
 
     async def test_get_user_by_email(self):
         user = User()
-        self.session.query().filter().first.return_value = user
+        self.result.scalars().first.return_value = user
 
         result = await get_user_by_email(email='testuser@example.com',
                                          db=self.session)
@@ -25,7 +27,7 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result, user)
 
     async def test_get_user_by_email_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars().first.return_value = None
 
         result = await get_user_by_email(email='testuser@example.com',
                                          db=self.session)
@@ -53,7 +55,7 @@ class TestUsers(unittest.IsolatedAsyncioTestCase):
 
     async def test_update_avatar(self):
         user = User()
-        self.session.query().filter().first.return_value = user
+        self.result.scalars().first.return_value = user
         result = await update_avatar(email='testuser@example.com',
                                      url='some_url',
                                      db=self.session)
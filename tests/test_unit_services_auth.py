@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch
+
+from jose import JWTError, jwt
+
+from src.services.auth import Auth
+from src.services.cache import LRUCache
+
+
+class TestDecodeToken(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.auth = Auth()
+        self.auth.token_cache = LRUCache(maxsize=10)
+
+    async def test_verified_claims_are_memoized(self):
+        token = await self.auth.create_access_token(data={"sub": "deadpool@example.com"})
+        with patch('src.services.auth.jwt.decode', wraps=jwt.decode) as decode:
+            self.assertEqual(self.auth.decode_token(token)["sub"], "deadpool@example.com")
+            self.assertEqual(self.auth.decode_token(token)["sub"], "deadpool@example.com")
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(self.auth.token_cache.stats()["hits"], 1)
+
+    async def test_entry_not_served_past_exp(self):
+        token = await self.auth.create_access_token(data={"sub": "deadpool@example.com"}, expires_delta=60)
+        self.auth.decode_token(token)
+        with patch('src.services.cache.time.monotonic', return_value=10 ** 12):
+            with self.assertRaises(JWTError):
+                with patch('src.services.auth.jwt.decode', side_effect=JWTError('expired')):
+                    self.auth.decode_token(token)
+
+    async def test_invalid_token_is_not_cached(self):
+        token = await self.auth.create_access_token(data={"sub": "deadpool@example.com"})
+        with self.assertRaises(JWTError):
+            self.auth.decode_token(token[:-2])
+        self.assertEqual(len(self.auth.token_cache), 0)
+
+    async def test_cache_disabled(self):
+        self.auth.token_cache = LRUCache(maxsize=0)
+        token = await self.auth.create_access_token(data={"sub": "deadpool@example.com"})
+        self.auth.decode_token(token)
+        self.assertEqual(len(self.auth.token_cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
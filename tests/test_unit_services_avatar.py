@@ -0,0 +1,103 @@
+import io
+import struct
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+
+from src.services.avatar import (AvatarPipeline, AvatarStorage, LocalAvatarStorage, HAS_PILLOW, prepare_avatar,
+                                 receive_upload, sniff_image_type)
+from src.services.executors import BoundedExecutor
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(filename='avatar.png', file=io.BytesIO(data))
+
+
+class TestAvatar(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.executor = BoundedExecutor('test-avatar', 'thread', workers=1, max_pending=4)
+        self.storage = LocalAvatarStorage(self.executor, self.directory.name, '/media/avatars/')
+        self.pipeline = AvatarPipeline(self.storage, self.executor, size=250, max_bytes=1024,
+                                       max_pixels=1000 * 1000)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.directory.cleanup()
+
+    def test_sniff_image_type(self):
+        self.assertEqual(sniff_image_type(PNG[:16]), 'png')
+        self.assertEqual(sniff_image_type(b'\xff\xd8\xff\xe0'), 'jpg')
+        self.assertEqual(sniff_image_type(b'RIFF\x00\x00\x00\x00WEBPVP8 '), 'webp')
+        self.assertIsNone(sniff_image_type(b'<svg xmlns='))
+
+    async def test_receive_upload_limit(self):
+        path = await receive_upload(upload(b'x' * 1024), max_bytes=1024)
+        self.assertEqual(path.stat().st_size, 1024)
+        path.unlink()
+        with self.assertRaises(HTTPException) as error:
+            await receive_upload(upload(b'x' * 1025), max_bytes=1024)
+        self.assertEqual(error.exception.status_code, 413)
+
+    def test_storage_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AvatarStorage(self.executor)
+
+    async def test_local_storage_is_content_addressed(self):
+        first = await self.storage.save('user-1', b'avatar', 'png', True)
+        second = await self.storage.save('user-2', b'avatar', 'png', True)
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith('/media/avatars/'))
+        stored = Path(self.directory.name) / first.removeprefix('/media/avatars/')
+        self.assertEqual(stored.read_bytes(), b'avatar')
+
+    async def test_pipeline_rejects_non_images(self):
+        before = set(Path(tempfile.gettempdir()).glob('avatar-*'))
+        with self.assertRaises(HTTPException) as error:
+            await self.pipeline.update(upload(b'<svg xmlns="http://www.w3.org/2000/svg"/>'), 'user-1')
+        self.assertEqual(error.exception.status_code, 400)
+        self.assertEqual(set(Path(tempfile.gettempdir()).glob('avatar-*')), before)
+
+    @unittest.skipIf(HAS_PILLOW, "Pillow re-encodes the image")
+    async def test_pipeline_without_pillow_keeps_original(self):
+        url = await self.pipeline.update(upload(PNG), 'user-1')
+        self.assertTrue(url.endswith('.png'))
+        self.assertEqual(prepare_avatar((Path(self.directory.name) / url.split('/', 3)[3]).as_posix(), 250, 1),
+                         (PNG, 'png', False))
+
+    @unittest.skipIf(not HAS_PILLOW, "Pillow is not installed")
+    async def test_pipeline_resizes_with_pillow(self):
+        from PIL import Image
+
+        source = io.BytesIO()
+        Image.new('RGB', (800, 400), 'red').save(source, format='PNG')
+        self.pipeline.max_bytes = len(source.getvalue())
+        url = await self.pipeline.update(upload(source.getvalue()), 'user-1')
+        with Image.open(Path(self.directory.name) / url.split('/', 3)[3]) as avatar:
+            self.assertEqual(avatar.size, (250, 250))
+
+    @unittest.skipIf(not HAS_PILLOW, "Pillow is not installed")
+    async def test_pipeline_rejects_too_many_pixels(self):
+        from PIL import Image
+
+        source = io.BytesIO()
+        Image.new('1', (1001, 1000)).save(source, format='PNG')
+        # the header of a 100000 x 100000 image, past the decompression bomb limit of Pillow itself
+        bomb = PNG[:8] + png_chunk(b'IHDR', struct.pack('>IIBBBBB', 100000, 100000, 1, 0, 0, 0, 0)) + \
+            png_chunk(b'IDAT', zlib.compress(b'')) + png_chunk(b'IEND', b'')
+        self.pipeline.max_bytes = len(source.getvalue())
+        for data in (source.getvalue(), bomb):
+            with self.assertRaises(HTTPException) as error:
+                await self.pipeline.update(upload(data), 'user-1')
+            self.assertEqual(error.exception.status_code, 400)
+            self.assertEqual(error.exception.detail, "Avatar can not have more than 1000000 pixels")
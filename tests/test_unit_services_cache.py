@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database.models import User
+from src.services.cache import LRUCache, UserCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl(self):
+        cache = LRUCache(maxsize=10, ttl=30)
+        with patch('src.services.cache.time.monotonic', return_value=100.0):
+            cache.set('a', 1)
+            cache.set('b', 2, ttl=5)
+        with patch('src.services.cache.time.monotonic', return_value=110.0):
+            self.assertEqual(cache.get('a'), 1)
+            self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.cache = UserCache(LRUCache(maxsize=10, ttl=30), use_redis=False, redis_ttl=300)
+        self.user = User(id=1, username='deadpool', email='deadpool@example.com', password='hash',
+                         refresh_token='token', created_at=datetime(2023, 4, 1), avatar='url', confirmed=True)
+
+    async def test_set_get_invalidate(self):
+        self.assertIsNone(await self.cache.get(self.user.email))
+        await self.cache.set(self.user)
+        cached = await self.cache.get(self.user.email)
+        self.assertIsNot(cached, self.user)
+        self.assertEqual((cached.id, cached.avatar, cached.confirmed), (1, 'url', True))
+        self.assertIsNone(cached.password)
+        self.assertIsNone(cached.refresh_token)
+        await self.cache.invalidate(self.user.email)
+        self.assertIsNone(await self.cache.get(self.user.email))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_redis_payload_round_trip(self):
+        data = {column: getattr(self.user, column) for column in UserCache.COLUMNS}
+        self.assertEqual(UserCache._loads(UserCache._dumps(data)), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
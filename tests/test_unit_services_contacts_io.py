@@ -0,0 +1,55 @@
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.contacts_io import iter_lines, iter_records
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(chunks, max_line_bytes=100):
+    return [line async for line in iter_lines(chunks, max_line_bytes)]
+
+
+class TestIterLines(unittest.IsolatedAsyncioTestCase):
+
+    async def test_lines_split_across_chunks(self):
+        text = 'Ольга,Шевченко\r\nTaras\n\nlast'.encode()
+        chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+        self.assertEqual(await collect(stream(*chunks)), ['Ольга,Шевченко'.encode(), b'Taras', b'', b'last'])
+
+    async def test_long_line_fails_before_the_rest_is_read(self):
+        read = []
+
+        async def endless():
+            while True:
+                read.append(1)
+                yield b'x' * 64
+
+        with self.assertRaises(HTTPException) as raised:
+            await collect(endless())
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertEqual(len(read), 2)
+
+    async def test_limit_is_inclusive(self):
+        self.assertEqual(await collect(stream(b'a' * 100 + b'\r\n', b'b' * 100), 100), [b'a' * 100, b'b' * 100])
+        with self.assertRaises(HTTPException):
+            await collect(stream(b'a' * 101 + b'\n'), 100)
+
+
+class TestIterRecords(unittest.IsolatedAsyncioTestCase):
+
+    async def test_invalid_utf8_line_is_an_error(self):
+        body = 'name,surname\nОльга,Шевченко\n'.encode() + 'Тарас,Шевченко\n'.encode('cp1251') + b'Taras,Bulba\n'
+        records = [record async for record in iter_records(stream(body), 'csv', 100)]
+        self.assertEqual(records[0], (2, {'name': 'Ольга', 'surname': 'Шевченко'}, None))
+        self.assertEqual(records[1][:2], (3, None))
+        self.assertTrue(records[1][2].startswith('Invalid UTF-8: invalid continuation byte at byte 1'))
+        self.assertEqual(records[2], (4, {'name': 'Taras', 'surname': 'Bulba'}, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.executors import BoundedExecutor
+
+
+class TestBoundedExecutor(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.executor = BoundedExecutor('test', kind='thread', workers=1, max_pending=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def test_run_off_loop(self):
+        result = await self.executor.run(threading.current_thread)
+        self.assertIsNot(result, threading.current_thread())
+        self.assertEqual(self.executor.stats()["completed"], 1)
+
+    async def test_rejects_when_saturated(self):
+        release = threading.Event()
+        first = asyncio.create_task(self.executor.run(release.wait))
+        second = asyncio.create_task(self.executor.run(release.wait))
+        await asyncio.sleep(0)
+        self.assertEqual(self.executor.queue_depth, 1)
+
+        with self.assertRaises(HTTPException) as ctx:
+            await self.executor.run(release.wait)
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertEqual(self.executor.stats()["rejected"], 1)
+
+        release.set()
+        await asyncio.gather(first, second)
+        self.assertEqual(self.executor.stats()["in_flight"], 0)
+
+    async def test_failures_are_counted_apart(self):
+        with self.assertRaises(ZeroDivisionError):
+            await self.executor.run(divmod, 1, 0)
+        self.assertEqual((self.executor.stats()["completed"], self.executor.stats()["failed"]), (0, 1))
+
+    async def test_cancelled_call_keeps_its_slot_until_it_returns(self):
+        started, release = threading.Event(), threading.Event()
+
+        def work():
+            started.set()
+            release.wait()
+
+        task = asyncio.create_task(self.executor.run(work))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.executor.stats()["in_flight"], 1)
+
+        release.set()
+        for _ in range(100):
+            if self.executor.stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.executor.stats()["in_flight"], 0)
+        self.assertEqual(self.executor.stats()["completed"], 1)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            BoundedExecutor('test', kind='fiber', workers=1, max_pending=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+import unittest
+
+from src.services.health import HealthProber
+
+
+async def passing():
+    pass
+
+
+async def failing():
+    raise ConnectionRefusedError("Connection refused")
+
+
+async def hanging():
+    await asyncio.sleep(10)
+
+
+class TestHealthProber(unittest.IsolatedAsyncioTestCase):
+
+    def make_prober(self, **checks) -> HealthProber:
+        return HealthProber(checks, required=['database'], interval=0.01, timeout=0.05, stale_after=1)
+
+    async def test_starting_until_first_probe(self):
+        prober = self.make_prober(database=passing)
+        self.assertEqual(prober.readiness(), (False, {"status": "starting", "checks": {}}))
+        self.assertEqual(prober.liveness()["status"], "ok")
+
+    async def test_ready_and_degraded(self):
+        prober = self.make_prober(database=passing, cache=failing, redis=hanging)
+        await prober.run_once()
+        ready, report = prober.readiness()
+        self.assertTrue(ready)
+        self.assertEqual(report["status"], "degraded")
+        self.assertEqual(report["checks"]["database"]["status"], "ok")
+        self.assertTrue(report["checks"]["database"]["required"])
+        self.assertIn("ConnectionRefusedError", report["checks"]["cache"]["error"])
+        self.assertIn("Timed out", report["checks"]["redis"]["error"])
+        self.assertFalse(report["checks"]["redis"]["required"])
+
+    async def test_required_failure_and_stale_results(self):
+        prober = self.make_prober(database=failing)
+        await prober.run_once()
+        self.assertEqual(prober.readiness()[1]["status"], "unavailable")
+
+        prober.checks["database"] = passing
+        await prober.run_once()
+        self.assertTrue(prober.readiness()[0])
+        prober.results["database"].checked_at = time.monotonic() - 5
+        self.assertIsNone(prober.is_up("database"))
+        self.assertFalse(prober.readiness()[0])
+
+    async def test_background_task(self):
+        calls = []
+
+        async def counting():
+            calls.append(1)
+
+        prober = self.make_prober(database=counting)
+        prober.start()
+        await asyncio.sleep(0.05)
+        await prober.stop()
+        self.assertGreater(len(calls), 1)
+        self.assertTrue(prober.readiness()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import aiosmtplib
+
+from smtp_stub import SMTPStub
+from src.services.email import confirmation_message
+from src.services.mailer import Mailer, SMTPPool, build_message, render_template, is_transient
+
+
+def make_mailer(port: int, size: int = 2, max_messages: int = 100, batch_size: int = 10) -> Mailer:
+    pool = SMTPPool(hostname='127.0.0.1', port=port, username=None, password=None, use_tls=False,
+                    start_tls=False, size=size, max_messages=max_messages, timeout=5)
+    return Mailer(pool, batch_size=batch_size, retries=2, backoff=0.001)
+
+
+def make_messages(count: int):
+    return [build_message('sender@example.com', f'user{i}@example.com', 'Hello', f'<p>{i}</p>')
+            for i in range(count)]
+
+
+class TestMailer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = await SMTPStub().start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def test_render_confirmation(self):
+        html = render_template('email_template.html', {'host': 'http://test/', 'username': '<b>', 'token': 'abc'})
+        self.assertIn('http://test/api/auth/confirmed_email/abc', html)
+        self.assertIn('&lt;b&gt;', html)
+        message = confirmation_message('user@example.com', 'user', 'http://test/')
+        self.assertEqual(message['To'], 'user@example.com')
+
+    def test_is_transient(self):
+        self.assertTrue(is_transient(aiosmtplib.SMTPServerDisconnected('gone')))
+        self.assertTrue(is_transient(aiosmtplib.SMTPResponseException(421, 'later')))
+        self.assertFalse(is_transient(aiosmtplib.SMTPResponseException(550, 'no such user')))
+
+    async def test_batch_reuses_sessions(self):
+        mailer = make_mailer(self.server.port, size=2, batch_size=10)
+        results = await mailer.send_batch(make_messages(40))
+        await mailer.close()
+        self.assertEqual(results, [None] * 40)
+        self.assertEqual(len(self.server.messages), 40)
+        self.assertLessEqual(self.server.connections, 2)
+        self.assertEqual(mailer.stats()['sent'], 40)
+
+    async def test_session_rotated_after_max_messages(self):
+        mailer = make_mailer(self.server.port, size=1, max_messages=5)
+        await mailer.send_batch(make_messages(12))
+        self.assertEqual(len(self.server.messages), 12)
+        self.assertEqual(self.server.connections, 3)
+
+    async def test_retries_transient_failures(self):
+        self.server.fail_next = 2
+        mailer = make_mailer(self.server.port, size=1)
+        await mailer.send(make_messages(1)[0])
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertEqual(mailer.stats()['retried'], 2)
+
+    async def test_dropped_session_is_replaced(self):
+        self.server.max_messages_per_connection = 3
+        mailer = make_mailer(self.server.port, size=1)
+        results = await mailer.send_batch(make_messages(7))
+        self.assertEqual(results, [None] * 7)
+        self.assertEqual(len(self.server.messages), 7)
+
+    async def test_gives_up_after_retries(self):
+        self.server.fail_next = 10
+        mailer = make_mailer(self.server.port, size=1)
+        with self.assertRaises(aiosmtplib.SMTPResponseException):
+            await mailer.send(make_messages(1)[0])
+        self.assertEqual(mailer.stats()['failed'], 1)
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from src.services.metrics import Histogram, MetricsRegistry, labels
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_bucket_bounds_are_inclusive(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 1.0, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 2, 1])
+        self.assertAlmostEqual(histogram.sum, 4.65)
+
+    def test_labels_are_escaped(self):
+        self.assertEqual(labels(route='/a"b', status=200), 'route="/a\\"b",status="200"')
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry(enabled=True, directory=None, flush_interval=5, stale_after=60,
+                                        buckets=(0.1, 1.0))
+
+    def test_render(self):
+        self.registry.register(lambda: [('gauge', 'executor_queue_depth', labels(executor='avatar'), 2),
+                                        ('counter', 'cache_hits_total', labels(cache='users'), 7),
+                                        ('gauge', 'db_pool_size', '', None)])
+        self.registry.observe_request('GET', '/contacts/', 200, 0.05)
+        self.registry.observe_request('GET', '/contacts/', 200, 0.5)
+        self.registry.observe_request('GET', '/contacts/', 404, 2)
+        text = self.registry.render({"email_outbox_messages": {labels(status='pending'): 3}})
+        self.assertIn('# TYPE http_requests_total counter', text)
+        self.assertIn('http_requests_total{method="GET",route="/contacts/",status="200"} 2', text)
+        self.assertIn('http_requests_total{method="GET",route="/contacts/",status="404"} 1', text)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/contacts/",le="0.1"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/contacts/",le="1.0"} 2', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/contacts/",le="+Inf"} 3', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/contacts/"} 3', text)
+        self.assertIn('executor_queue_depth{executor="avatar"} 2', text)
+        self.assertIn('cache_hits_total{cache="users"} 7', text)
+        self.assertIn('email_outbox_messages{status="pending"} 3', text)
+        self.assertNotIn('db_pool_size', text)
+
+    def test_workers_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(enabled=True, directory=directory, flush_interval=5, stale_after=60,
+                                       buckets=(0.1, 1.0))
+            registry.register(lambda: [('gauge', 'executor_queue_depth', labels(executor='avatar'), 2),
+                                       ('counter', 'mail_sent_total', '', 10)])
+            registry.observe_request('GET', '/contacts/', 200, 0.05)
+            other = {"counters": {"http_requests_total": {labels(method='GET', route='/contacts/', status=200): 4},
+                                  "mail_sent_total": {"": 5}},
+                     "gauges": {"executor_queue_depth": {labels(executor='avatar'): 1}},
+                     "histograms": {"http_request_duration_seconds": {
+                         labels(method='GET', route='/contacts/'): [1, 2, 1, 3.5]}}}
+            Path(directory, '1.json').write_text(json.dumps(other))
+
+            merged = registry.collect()
+            self.assertTrue(Path(directory, f'{os.getpid()}.json').exists())
+            self.assertEqual(merged["counters"]["http_requests_total"][
+                                 labels(method='GET', route='/contacts/', status=200)], 5)
+            self.assertEqual(merged["counters"]["mail_sent_total"][""], 15)
+            self.assertEqual(merged["gauges"]["executor_queue_depth"][labels(executor='avatar')], 3)
+            self.assertEqual(merged["histograms"]["http_request_duration_seconds"][
+                                 labels(method='GET', route='/contacts/')], [2, 2, 1, 3.55])
+
+            stale = time.time() - 120
+            os.utime(Path(directory, '1.json'), (stale, stale))
+            merged = registry.collect()
+            self.assertEqual(merged["counters"]["mail_sent_total"][""], 15)
+            self.assertEqual(merged["gauges"]["executor_queue_depth"][labels(executor='avatar')], 2)
+
+    def test_worker_gauges_are_combined(self):
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(enabled=True, directory=directory, flush_interval=5, stale_after=60)
+            registry.register(lambda: [('gauge', 'health_check_up', labels(check='database'), 1),
+                                       ('gauge', 'health_check_up', labels(check='redis'), 1),
+                                       ('gauge', 'health_check_latency_seconds', labels(check='database'), 0.002),
+                                       ('gauge', 'db_pool_checked_out', '', 2)])
+            for pid, redis_up, latency in ((1, 1, 0.004), (2, 0, 0.001)):
+                other = {"counters": {}, "histograms": {},
+                         "gauges": {"health_check_up": {labels(check='database'): 1, labels(check='redis'): redis_up},
+                                    "health_check_latency_seconds": {labels(check='database'): latency},
+                                    "db_pool_checked_out": {"": 3}}}
+                Path(directory, f'{pid}.json').write_text(json.dumps(other))
+
+            gauges = registry.collect()["gauges"]
+            self.assertEqual(gauges["health_check_up"], {labels(check='database'): 1, labels(check='redis'): 0})
+            self.assertEqual(gauges["health_check_latency_seconds"][labels(check='database')], 0.004)
+            self.assertEqual(gauges["db_pool_checked_out"][""], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
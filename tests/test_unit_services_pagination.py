@@ -0,0 +1,23 @@
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.pagination import encode_cursor, decode_cursor
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(10_000)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), 10_000)
+
+    def test_decode_invalid_cursor(self):
+        for cursor in ("not-a-cursor", encode_cursor("x"), "e30"):
+            with self.assertRaises(HTTPException) as ctx:
+                decode_cursor(cursor)
+            self.assertEqual(ctx.exception.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
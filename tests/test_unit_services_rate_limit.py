@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+
+from src.database.models import User
+from src.services.rate_limit import RateLimiter, TokenBucket, parse_limit
+
+
+def make_limiter(use_redis=False, **overrides):
+    options = dict(enabled=True, scopes={'read': '10/10'}, tiers={'default': 1, 'premium': 3},
+                   user_tiers={'vip@example.com': 'premium'}, use_redis=use_redis, lease_fraction=0.5,
+                   lease_ttl=1, redis_retry=5, local_size=100)
+    options.update(overrides)
+    return RateLimiter(**options)
+
+
+class FakeBucketScript:
+    """
+    Python version of TOKEN_BUCKET_SCRIPT over a dictionary, using the patched monotonic clock.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.buckets = {}
+
+    async def __call__(self, keys, args):
+        capacity, rate, requested, returned = args
+        now = self.clock.return_value
+        tokens, ts = self.buckets.get(keys[0], (capacity, now))
+        tokens = min(capacity, tokens + max(0, now - ts) * rate + returned)
+        granted = min(requested, int(tokens))
+        tokens -= granted
+        self.buckets[keys[0]] = (tokens, now)
+        return [granted, str((1 - tokens) / rate if granted == 0 else 0)]
+
+
+class TestRateLimit(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.user = User(id=1, email='user@example.com')
+        self.clock = patch('src.services.rate_limit.time.monotonic', return_value=1000.0)
+        self.now = self.clock.start()
+
+    def tearDown(self):
+        self.clock.stop()
+
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit('60/30'), (60, 30.0))
+        with self.assertRaises(ValueError):
+            parse_limit('0/10')
+
+    def test_token_bucket_refills(self):
+        bucket = TokenBucket(capacity=2, rate=1, now=0)
+        self.assertEqual(bucket.take(0), 0)
+        self.assertEqual(bucket.take(0), 0)
+        self.assertAlmostEqual(bucket.take(0), 1)
+        self.assertEqual(bucket.take(1), 0)
+
+    async def test_local_limit(self):
+        limiter = make_limiter()
+        for _ in range(10):
+            await limiter.check('read', self.user)
+        with self.assertRaises(HTTPException) as error:
+            await limiter.check('read', self.user)
+        self.assertEqual(error.exception.status_code, 429)
+        self.assertEqual(error.exception.headers['Retry-After'], '1')
+        self.now.return_value = 1001.0
+        await limiter.check('read', self.user)
+        self.assertEqual(limiter.stats()['rejected'], 1)
+
+    async def test_user_tier(self):
+        limiter = make_limiter()
+        self.assertEqual(limiter.limit_for('read', self.user), (10, 1.0))
+        self.assertEqual(limiter.limit_for('read', User(id=2, email='vip@example.com')), (30, 3.0))
+
+    async def test_disabled(self):
+        limiter = make_limiter(enabled=False)
+        for _ in range(20):
+            await limiter.check('read', self.user)
+
+    async def test_redis_lease_absorbs_checks(self):
+        limiter = make_limiter(use_redis=True)
+        limiter._redis = object()
+        limiter._script = AsyncMock(return_value=[5, '0'])
+        for _ in range(10):
+            await limiter.check('read', self.user)
+        self.assertEqual(limiter._script.await_count, 2)
+        self.assertEqual(limiter.stats()['lease_hits'], 8)
+
+    async def test_steady_low_rate_is_never_throttled(self):
+        script = FakeBucketScript(self.now)
+        workers = [make_limiter(use_redis=True, scopes={'read': '60/60'}, lease_fraction=0.1) for _ in range(4)]
+        for limiter in workers:
+            limiter._redis, limiter._script = object(), script
+        # one request every 1.5 seconds against a limit of one per second, spread over the workers
+        for i in range(400):
+            self.now.return_value = 1000.0 + i * 1.5
+            await workers[i % len(workers)].check('read', self.user)
+        self.assertEqual(sum(limiter.stats()['rejected'] for limiter in workers), 0)
+
+    async def test_expired_lease_tokens_are_returned(self):
+        limiter = make_limiter(use_redis=True)
+        limiter._redis = object()
+        limiter._script = AsyncMock(return_value=[5, '0'])
+        await limiter.check('read', self.user)
+        self.now.return_value = 1002.0
+        await limiter.check('read', self.user)
+        self.assertEqual(limiter._script.await_args.kwargs['args'], [10, 1.0, 5, 4])
+
+    async def test_redis_refusal_is_cached(self):
+        limiter = make_limiter(use_redis=True)
+        limiter._redis = object()
+        limiter._script = AsyncMock(return_value=[0, '2.5'])
+        for _ in range(3):
+            with self.assertRaises(HTTPException) as error:
+                await limiter.check('read', self.user)
+            self.assertEqual(error.exception.headers['Retry-After'], '3')
+        self.assertEqual(limiter._script.await_count, 1)
+
+    async def test_redis_down_falls_back_to_local(self):
+        limiter = make_limiter(use_redis=True)
+        limiter._redis = object()
+        limiter._script = AsyncMock(side_effect=ConnectionError('down'))
+        for _ in range(10):
+            await limiter.check('read', self.user)
+        with self.assertRaises(HTTPException):
+            await limiter.check('read', self.user)
+        self.assertEqual(limiter._script.await_count, 1)
+        self.assertFalse(limiter.stats()['redis_available'])
+        self.now.return_value = 1006.0
+        limiter._script = AsyncMock(return_value=[1, '0'])
+        await limiter.check('read', self.user)
+        self.assertEqual(limiter._script.await_count, 1)
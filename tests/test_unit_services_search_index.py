@@ -0,0 +1,113 @@
+import unittest
+from datetime import date
+from unittest.mock import AsyncMock
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Contact
+from src.services.search_index import ContactSearchIndex, UserSearchIndex
+
+
+def contact(contact_id, name, surname, email, phone):
+    return Contact(id=contact_id, name=name, surname=surname, email=email, phone=phone, birthday=date(1990, 1, 1))
+
+
+ROWS = [
+    (1, 'Olga', 'Pasichnyuk', 'olga@example.com', '380501', date(1990, 1, 1)),
+    (2, 'Oleg', 'Volgin', 'oleg@mail.com', '380502', date(1990, 1, 1)),
+    (3, 'Ivan', 'Petrenko', 'ivan@mail.com', '380503', date(1990, 1, 1)),
+]
+
+
+class TestUserSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = UserSearchIndex()
+        for row in ROWS:
+            self.index.add(row)
+
+    def test_search_substring(self):
+        self.assertEqual([row[0] for row in self.index.search('OLG', 10)], [1, 2])
+
+    def test_search_prefix_first(self):
+        self.assertEqual([row[0] for row in self.index.search('lg', 10)], [1, 2])
+        self.assertEqual([row[0] for row in self.index.search('olgin', 10)], [2])
+        self.assertEqual([row[0] for row in self.index.search('volg', 10)], [2])
+
+    def test_search_no_cross_field_match(self):
+        self.assertEqual(self.index.search('olgapas', 10), [])
+
+    def test_update_and_remove(self):
+        size = self.index.nbytes
+        self.index.add((3, 'Ivan', 'Shevchenko', 'ivan@mail.com', '380503', date(1990, 1, 1)))
+        self.assertEqual(self.index.search('petrenko', 10), [])
+        self.assertEqual(self.index.search('chenko', 10)[0][0], 3)
+        self.index.remove(3)
+        self.assertEqual(self.index.search('ivan', 10), [])
+        self.assertLess(self.index.nbytes, size)
+        self.assertNotIn('iva', self.index.postings)
+
+
+class TestContactSearchIndex(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.session = AsyncMock(spec=AsyncSession)
+        self.session.execute.return_value = ROWS
+        self.engine = ContactSearchIndex(enabled=True, memory_budget=10 ** 9)
+
+    async def test_disabled(self):
+        engine = ContactSearchIndex(enabled=False, memory_budget=10 ** 9)
+        self.assertIsNone(await engine.search(1, 'olg', 10, self.session))
+        self.session.execute.assert_not_called()
+
+    async def test_lazy_build_and_incremental_updates(self):
+        result = await engine_search(self.engine, self.session, 'olg')
+        self.assertEqual([c.id for c in result], [1, 2])
+        self.assertEqual(self.session.execute.call_count, 1)
+
+        self.engine.upsert(1, contact(4, 'Olgerd', 'Bondar', 'olgerd@mail.com', '380504'))
+        self.engine.remove(1, 2)
+        result = await engine_search(self.engine, self.session, 'olg')
+        self.assertEqual([c.id for c in result], [1, 4])
+        self.assertEqual(self.session.execute.call_count, 1)
+        self.assertEqual(self.engine.stats()["hits"], 1)
+
+    async def test_write_during_build_discards_snapshot(self):
+        async def execute(*args, **kwargs):
+            self.engine.upsert(1, contact(4, 'Olgerd', 'Bondar', 'olgerd@mail.com', '380504'))
+            return ROWS
+        self.session.execute.side_effect = execute
+        self.assertIsNone(await self.engine.search(1, 'olg', 10, self.session))
+        self.assertEqual(self.engine.stats()["users"], 0)
+
+    async def test_lru_eviction(self):
+        await engine_search(self.engine, self.session, 'olg', user_id=1)
+        self.engine.memory_budget = self.engine.nbytes * 2 - 1
+        await engine_search(self.engine, self.session, 'olg', user_id=2)
+        await engine_search(self.engine, self.session, 'olg', user_id=3)
+        stats = self.engine.stats()
+        self.assertEqual(stats["users"], 1)
+        self.assertEqual(stats["evictions"], 2)
+        self.engine.invalidate(3)
+        self.assertEqual(self.engine.stats()["users"], 0)
+        self.assertEqual(self.engine.nbytes, 0)
+
+    async def test_bookkeeping_is_bounded(self):
+        for user_id in range(100):
+            self.engine.upsert(user_id, contact(4, 'Olgerd', 'Bondar', 'olgerd@mail.com', '380504'))
+            self.engine.remove(user_id, 4)
+        self.assertEqual(self.engine._generations, {})
+
+        await engine_search(self.engine, self.session, 'olg')
+        self.engine.upsert(1, contact(4, 'Olgerd', 'Bondar', 'olgerd@mail.com', '380504'))
+        self.engine.remove(1, 2)
+        self.assertEqual(self.engine._generations, {})
+        self.assertEqual(self.engine.nbytes, self.engine._users[1].nbytes)
+
+
+async def engine_search(engine, session, term, user_id=1):
+    return await engine.search(user_id, term, 10, session)
+
+
+if __name__ == '__main__':
+    unittest.main()
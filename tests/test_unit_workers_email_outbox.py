@@ -0,0 +1,105 @@
+import asyncio
+from unittest.mock import patch
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from conftest import InMemoryDatabaseTestCase
+from smtp_stub import SMTPStub
+from src.database.models import EmailOutbox
+from src.repository.outbox import enqueue_email, claim_emails, CONFIRM_EMAIL
+from src.services.mailer import Mailer, SMTPPool
+from src.workers.email_outbox import EmailOutboxWorker
+
+
+class TestEmailOutboxWorker(InMemoryDatabaseTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.server = await SMTPStub().start()
+        pool = SMTPPool(hostname='127.0.0.1', port=self.server.port, username=None, password=None, use_tls=False,
+                        start_tls=False, size=2, max_messages=100, timeout=5)
+        self.worker = EmailOutboxWorker(self.sessions, Mailer(pool, batch_size=10, retries=0, backoff=0),
+                                        batch_size=2, visibility_timeout=60, max_attempts=2, retry_backoff=30,
+                                        poll_interval=0)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        await super().asyncTearDown()
+
+    async def enqueue(self, *items):
+        async with self.sessions() as db:
+            for kind, recipient in items:
+                enqueue_email(kind, recipient, {"username": "user", "host": "http://test/"}, db)
+            await db.commit()
+
+    async def outbox(self):
+        async with self.sessions() as db:
+            return (await db.execute(select(EmailOutbox).order_by(EmailOutbox.id))).scalars().all()
+
+    async def test_drains_outbox_in_batches(self):
+        await self.enqueue(*[(CONFIRM_EMAIL, f'user{i}@example.com') for i in range(5)])
+        await self.worker.run(once=True)
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual({email.status for email in await self.outbox()}, {'sent'})
+        self.assertTrue(all(email.sent_at for email in await self.outbox()))
+
+    async def test_claimed_emails_are_hidden_until_timeout(self):
+        await self.enqueue((CONFIRM_EMAIL, 'user@example.com'))
+        async with self.sessions() as db:
+            self.assertEqual(len(await claim_emails(10, 60, 5, db)), 1)
+            self.assertEqual(await claim_emails(10, 60, 5, db), [])
+            email = await db.get(EmailOutbox, 1)
+            email.available_at = datetime.utcnow() - timedelta(seconds=1)
+            await db.commit()
+            reclaimed = await claim_emails(10, 60, 5, db)
+        self.assertEqual([email.attempts for email in reclaimed], [2])
+
+    async def test_transient_failure_is_rescheduled_then_dead_lettered(self):
+        await self.enqueue((CONFIRM_EMAIL, 'user@example.com'))
+        self.server.fail_next = 10
+        await self.worker.process_batch()
+        email = (await self.outbox())[0]
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.available_at, datetime.utcnow() + timedelta(seconds=20))
+        self.assertIn('421', email.last_error)
+
+        async with self.sessions() as db:
+            (await db.get(EmailOutbox, email.id)).available_at = datetime.utcnow()
+            await db.commit()
+        await self.worker.process_batch()
+        email = (await self.outbox())[0]
+        self.assertEqual((email.status, email.attempts), ('dead', 2))
+
+    async def test_abandoned_claims_are_dead_lettered(self):
+        await self.enqueue((CONFIRM_EMAIL, 'user@example.com'))
+        async with self.sessions() as db:
+            for attempt in range(2):
+                self.assertEqual(len(await claim_emails(10, 0, 2, db)), 1)
+            self.assertEqual(await claim_emails(10, 0, 2, db), [])
+        email = (await self.outbox())[0]
+        self.assertEqual((email.status, email.attempts), ('dead', 2))
+        self.assertEqual(email.last_error, 'No outcome reported after 2 attempts')
+
+    async def test_run_survives_failed_batches(self):
+        self.worker.error_backoff = 0
+        calls = []
+
+        async def process_batch():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError('database is down')
+            if len(calls) == 3:
+                return 0
+            raise asyncio.CancelledError
+
+        with patch.object(self.worker, 'process_batch', process_batch), self.assertLogs('src.workers.email_outbox'):
+            with self.assertRaises(asyncio.CancelledError):
+                await self.worker.run()
+        self.assertEqual(len(calls), 4)
+
+    async def test_unknown_kind_fails_without_sending(self):
+        await self.enqueue(('newsletter', 'user@example.com'), (CONFIRM_EMAIL, 'other@example.com'))
+        await self.worker.process_batch()
+        self.assertEqual([email.status for email in await self.outbox()], ['failed', 'sent'])
+        self.assertEqual(len(self.server.messages), 1)